@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""Microbenchmark compile_path getters against access_nested_map.
+"""
+import sys
+from timeit import timeit
+from types import MappingProxyType
+
+from fixtures import TEST_PAYLOAD
+from utils import access_nested_map, compile_path
+
+REPO = TEST_PAYLOAD[0][1][0]
+CASES = [
+    ("name", REPO, ("name",)),
+    ("license.key", REPO, ("license", "key")),
+    ("owner.login", REPO, ("owner", "login")),
+    ("a.b.c.d", {"a": {"b": {"c": {"d": 1}}}}, ("a", "b", "c", "d")),
+    ("proxy license.key", MappingProxyType(
+        {"license": MappingProxyType(REPO["license"])}), ("license", "key")),
+]
+
+
+if __name__ == "__main__":
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print("{:<20} {:>12} {:>12} {:>8}".format(
+        "path", "access ns", "compiled ns", "speedup"))
+    for label, nested_map, path in CASES:
+        get = compile_path(path)
+        reference = timeit(lambda: access_nested_map(nested_map, path),
+                           number=number) / number
+        compiled = timeit(lambda: get(nested_map), number=number) / number
+        print("{:<20} {:>12.1f} {:>12.1f} {:>7.1f}x".format(
+            label, reference * 1e9, compiled * 1e9, reference / compiled))
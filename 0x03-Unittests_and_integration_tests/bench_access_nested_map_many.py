@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Benchmark access_nested_map_many against per-field access_nested_map.
+"""
+import sys
+from time import perf_counter
+
+from fixtures import TEST_PAYLOAD
+from utils import access_nested_map, access_nested_map_many
+
+PATHS = [
+    ("name",),
+    ("license", "key"),
+    ("owner", "login"),
+    ("stargazers_count",),
+    ("forks",),
+    ("language",),
+]
+
+
+def per_field(records: list) -> dict:
+    """One access_nested_map loop per field"""
+    columns = {}
+    for path in PATHS:
+        column = columns[path] = []
+        for record in records:
+            try:
+                column.append(access_nested_map(record, path))
+            except KeyError:
+                column.append(None)
+    return columns
+
+
+if __name__ == "__main__":
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    records = TEST_PAYLOAD[0][1] * scale
+
+    start = perf_counter()
+    expected = per_field(records)
+    per_field_time = perf_counter() - start
+
+    start = perf_counter()
+    columns = access_nested_map_many(records, PATHS)
+    batch_time = perf_counter() - start
+    assert columns == expected
+
+    print("{} records x {} paths".format(len(records), len(PATHS)))
+    print("per field : {:8.1f} ms".format(per_field_time * 1e3))
+    print("batched   : {:8.1f} ms ({:.1f}x)".format(
+        batch_time * 1e3, per_field_time / batch_time))
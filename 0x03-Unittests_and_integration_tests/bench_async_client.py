@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Benchmark AsyncGithubOrgClient against GithubOrgClient on many orgs.
+"""
+import asyncio
+import sys
+from time import perf_counter
+from typing import List
+
+from client import AsyncGithubOrgClient, GithubOrgClient
+from fixtures import TEST_PAYLOAD
+from stub_server import StubServer
+
+
+def sync_crawl(orgs: List[str]) -> float:
+    """Seconds to list the repos of `orgs` one after another"""
+    start = perf_counter()
+    for org in orgs:
+        GithubOrgClient(org).public_repos()
+    return perf_counter() - start
+
+
+async def async_crawl(orgs: List[str], limit: int) -> float:
+    """Seconds to list the repos of `orgs` concurrently"""
+    semaphore = asyncio.Semaphore(limit)
+    start = perf_counter()
+    await asyncio.gather(*(AsyncGithubOrgClient(org, semaphore)
+                           .public_repos() for org in orgs))
+    return perf_counter() - start
+
+
+if __name__ == "__main__":
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.02
+    routes = {}
+    with StubServer(routes, latency=latency) as server:
+        AsyncGithubOrgClient.ORG_URL = server.url("/orgs/{org}")
+        GithubOrgClient.ORG_URL = server.url("/orgs/{org}")
+        for n in (1, 10, 100):
+            orgs = ["org{}".format(i) for i in range(n)]
+            for org in orgs:
+                repos_path = "/orgs/{}/repos".format(org)
+                routes["/orgs/" + org] = {"repos_url": server.url(repos_path)}
+                routes[repos_path] = TEST_PAYLOAD[0][1]
+            sync_time = sync_crawl(orgs)
+            async_time = asyncio.run(async_crawl(orgs, limit=32))
+            print("{:>4} orgs: sync {:7.3f}s  async {:7.3f}s  x{:.1f}".format(
+                n, sync_time, async_time, sync_time / async_time))
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Benchmark time-to-first-public_repos with a cold and a warm disk cache.
+"""
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+from cache import DiskBackend
+from client import GithubOrgClient
+from fixtures import TEST_PAYLOAD
+from stub_server import StubServer
+
+
+def first_public_repos(directory: str) -> float:
+    """Seconds for a brand new cache and client to list the repos"""
+    start = perf_counter()
+    client = GithubOrgClient("google", cache=DiskBackend(directory))
+    client.public_repos()
+    return perf_counter() - start
+
+
+if __name__ == "__main__":
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    repos = TEST_PAYLOAD[0][1] * scale
+    routes = {"/orgs/google/repos": repos}
+    directory = tempfile.mkdtemp()
+    with StubServer(routes, latency=latency) as server:
+        routes["/orgs/google"] = {"repos_url":
+                                  server.url("/orgs/google/repos")}
+        GithubOrgClient.ORG_URL = server.url("/orgs/{org}")
+        cold = first_public_repos(directory)
+        warm = first_public_repos(directory)
+    DiskBackend(directory).clear()
+    os.rmdir(directory)
+    print("{} repos, {:.0f} ms server latency".format(
+        len(repos), latency * 1e3))
+    print("cold start: {:8.1f} ms".format(cold * 1e3))
+    print("warm start: {:8.1f} ms".format(warm * 1e3))
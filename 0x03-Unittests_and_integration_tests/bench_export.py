@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Measure NDJSON export throughput in records per second.
+Usage: ./bench_export.py [repos]
+Pipeline rows encode generated repos straight to /dev/null, with the
+JSON line encoder of the standard library and the default one; their
+peak is the memory traced while exporting, for `repos` and ten times
+as many. Emulator rows export an org served by the GitHub emulator,
+100 repos a page, to a file and, asynchronously, to a socket.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import tracemalloc
+from time import perf_counter
+from unittest.mock import patch
+
+from client import AsyncGithubOrgClient, GithubOrgClient
+from export import _json_line, encode_line, export_ndjson
+from fixture_generator import generate_repos
+from github_emulator import GithubEmulator
+
+FIELDS = ["name", "license.key", "stargazers_count"]
+
+
+def pipeline(count: int, fields, encoder) -> float:
+    """Seconds to export `count` generated repos to /dev/null"""
+    with open(os.devnull, "wb") as sink:
+        with patch("export.encode_line", encoder):
+            start = perf_counter()
+            export_ndjson(generate_repos(count), sink, fields)
+            return perf_counter() - start
+
+
+def peak(count: int, fields) -> float:
+    """MB traced at the peak of exporting `count` generated repos"""
+    tracemalloc.start()
+    with open(os.devnull, "wb") as sink:
+        export_ndjson(generate_repos(count), sink, fields)
+    size = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size / 2**20
+
+
+async def async_export(fields) -> int:
+    """Export the emulated org through a local socket, return bytes read"""
+    received = [0]
+    done = asyncio.Event()
+
+    async def drain(reader, writer) -> None:
+        """Read and discard until EOF"""
+        while True:
+            chunk = await reader.read(1 << 16)
+            if not chunk:
+                break
+            received[0] += len(chunk)
+        writer.close()
+        done.set()
+
+    server = await asyncio.start_server(drain, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        _, writer = await asyncio.open_connection("127.0.0.1", port)
+        await AsyncGithubOrgClient("google").export_repos(writer,
+                                                          fields=fields)
+        writer.close()
+        await writer.wait_closed()
+        await done.wait()
+    return received[0]
+
+
+def timed(fn, *args) -> float:
+    """Seconds `fn(*args)` takes"""
+    start = perf_counter()
+    fn(*args)
+    return perf_counter() - start
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print("{} repos".format(count))
+    print("{:<31} {:>12} {:>10}".format("mode", "records/s", "peak MB"))
+    for label, fields in (("full", None), ("projected", FIELDS)):
+        for name, encoder in (("json", _json_line), ("default", encode_line)):
+            seconds = pipeline(count, fields, encoder)
+            print("{:<31} {:>12,.0f}".format(
+                "pipeline {} {}".format(label, name), count / seconds))
+        print("{:<31} {:>12} {:>10.2f}".format(
+            "pipeline {} x1".format(label), "", peak(count, fields)))
+        print("{:<31} {:>12} {:>10.2f}".format(
+            "pipeline {} x10".format(label), "", peak(count * 10, fields)))
+    orgs = {"google": list(generate_repos(count))}
+    with GithubEmulator(orgs, per_page=100, rate_limit=10 ** 9) as github:
+        GithubOrgClient.ORG_URL = github.url("/orgs/{org}")
+        AsyncGithubOrgClient.ORG_URL = GithubOrgClient.ORG_URL
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "repos.ndjson")
+            for label, fields in (("full", None), ("projected", FIELDS)):
+                seconds = timed(GithubOrgClient("google").export_repos,
+                                path, None, fields)
+                print("{:<31} {:>12,.0f}".format(
+                    "emulator file " + label, count / seconds))
+                seconds = timed(asyncio.run, async_export(fields))
+                print("{:<31} {:>12,.0f}".format(
+                    "emulator async socket " + label, count / seconds))
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Benchmark JSON decode throughput of each backend on repos listings.
+Listings repeat the fixture repos `scale` times, and the baseline is
+`requests`' own `response.json()` on a response declaring UTF-8, as
+the GitHub API does.
+"""
+import json
+import sys
+from time import perf_counter
+
+import requests
+
+from decoders import DECODERS
+from fixtures import TEST_PAYLOAD
+
+
+def response_for(body: bytes) -> requests.Response:
+    """requests.Response holding `body`"""
+    response = requests.Response()
+    response._content = body
+    response.encoding = "utf-8"
+    return response
+
+
+def throughput(decode, body: bytes, seconds: float) -> float:
+    """Megabytes per second parsed by `decode(body)`"""
+    decode(body)
+    runs, start = 0, perf_counter()
+    while perf_counter() - start < seconds:
+        decode(body)
+        runs += 1
+    return runs * len(body) / (perf_counter() - start) / 2**20
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    scales = [1, 10, 100, 1000]
+    print("{:>8} {:>10} {:>16}".format("repos", "bytes", "decoder") +
+          " {:>10} {:>8}".format("MB/s", "speedup"))
+    for scale in scales:
+        repos = TEST_PAYLOAD[0][1] * scale
+        body = json.dumps(repos).encode()
+        baseline = throughput(lambda body: response_for(body).json(),
+                              body, seconds)
+        rows = [("response.json()", baseline)]
+        rows += [(name, throughput(decode, body, seconds))
+                 for name, decode in DECODERS.items()]
+        for name, rate in rows:
+            print("{:>8} {:>10} {:>16} {:>10.1f} {:>7.2f}x".format(
+                len(repos), len(body), name, rate, rate / baseline))
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Benchmark license queries by scan and by license_index on a big org.
+"""
+import sys
+from time import perf_counter
+from unittest.mock import patch
+
+from client import GithubOrgClient
+from fixture_generator import generate_repos
+
+QUERIES = ["apache-2.0", "bsd-3-clause", "bsl-1.0", "other", "mit"]
+
+
+def scan(client: GithubOrgClient, license: str) -> list:
+    """public_repos(license) as a scan over every repo"""
+    return [repo["name"] for repo in client.repos_payload
+            if client.has_license(repo, license)]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    payloads = [{"repos_url": "repos"}, list(generate_repos(count))]
+    with patch("client.get_json", side_effect=payloads):
+        client = GithubOrgClient("synthetic")
+        client.repos_payload
+
+    start = perf_counter()
+    for _ in range(rounds):
+        for license in QUERIES:
+            scan(client, license)
+    scan_time = perf_counter() - start
+
+    start = perf_counter()
+    client.license_index
+    build_time = perf_counter() - start
+    start = perf_counter()
+    for _ in range(rounds):
+        for license in QUERIES:
+            client.public_repos(license=license)
+    index_time = perf_counter() - start
+    for license in QUERIES:
+        assert client.public_repos(license=license) == scan(client, license)
+
+    queries = rounds * len(QUERIES)
+    print("{} repos, {} license queries".format(count, queries))
+    print("scan      : {:8.2f} ms/query".format(scan_time / queries * 1e3))
+    print("index     : {:8.2f} ms/query (+{:.1f} ms one-off build)".format(
+        index_time / queries * 1e3, build_time * 1e3))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Load-test GithubOrgClient.public_repos against the GitHub emulator.
+Usage: ./bench_load.py [clients] [repos] [latency] [seconds]
+Each of `clients` threads calls public_repos on a fresh client in a
+loop, as a request handler would, so every call fetches the org and
+its listing; conditional calls revalidate them with a shared cache.
+"""
+import statistics
+import sys
+import threading
+from functools import partial
+from time import perf_counter
+from typing import (
+    Callable,
+    List,
+    Tuple,
+)
+
+from cache import ValidatorCache
+from client import GithubOrgClient
+from github_emulator import GithubEmulator, scaled_repos
+from utils import get_json
+
+
+def run(call: Callable[[], object], clients: int,
+        seconds: float) -> Tuple[List[float], int, float]:
+    """Latencies of `call` from `clients` threads, errors and wall time"""
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = perf_counter() + seconds
+
+    def client() -> None:
+        mine, failed = [], 0
+        while perf_counter() < deadline:
+            start = perf_counter()
+            try:
+                call()
+            except Exception:
+                failed += 1
+                continue
+            mine.append(perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], perf_counter() - start
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.01
+    seconds = float(sys.argv[4]) if len(sys.argv) > 4 else 3
+    orgs = {"google": scaled_repos(count)}
+    with GithubEmulator(orgs, rate_limit=10 ** 9,
+                        latency=latency) as github:
+        GithubOrgClient.ORG_URL = github.url("/orgs/{org}")
+        fetch = partial(get_json, cache=ValidatorCache())
+        modes = [
+            ("first page", lambda: GithubOrgClient("google").public_repos()),
+            ("all pages", lambda: GithubOrgClient("google").public_repos(
+                stream=True)),
+            ("conditional", lambda: GithubOrgClient(
+                "google", fetch=fetch).public_repos()),
+        ]
+        print("{} clients, {} repos, {:.0f} ms server latency".format(
+            clients, count, latency * 1e3))
+        print("{:<12} {:>9} {:>9} {:>9} {:>9} {:>7}".format(
+            "mode", "calls/s", "p50 ms", "p95 ms", "p99 ms", "errors"))
+        for label, call in modes:
+            latencies, errors, elapsed = run(call, clients, seconds)
+            cuts = statistics.quantiles(latencies, n=100)
+            print("{:<12} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f} {:>7}".format(
+                label, len(latencies) / elapsed, cuts[49] * 1e3,
+                cuts[94] * 1e3, cuts[98] * 1e3, errors))
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Count get_json calls when many threads or tasks read one client's org.
+"""
+import asyncio
+import sys
+import threading
+import time
+from typing import Any, Callable
+from unittest.mock import patch
+
+import client
+from client import AsyncGithubOrgClient, GithubOrgClient
+
+
+def unlocked_memoize(fn: Callable) -> Callable:
+    """memoize without locking, as it was before"""
+    attr_name = "_{}".format(fn.__name__)
+
+    def memoized(self):
+        if not hasattr(self, attr_name):
+            setattr(self, attr_name, fn(self))
+        return getattr(self, attr_name)
+
+    return property(memoized)
+
+
+class UnlockedClient(GithubOrgClient):
+    """GithubOrgClient with the unlocked memoize"""
+    org = unlocked_memoize(GithubOrgClient.org.fget.__wrapped__)
+
+
+def contend(client_class: type, threads: int) -> int:
+    """Number of get_json calls made by `threads` concurrent readers"""
+    calls = []
+
+    def slow_get_json(url: str) -> Any:
+        calls.append(url)
+        time.sleep(0.05)
+        return {"repos_url": url + "/repos"}
+
+    shared = client_class("google")
+    barrier = threading.Barrier(threads)
+
+    def read() -> None:
+        barrier.wait()
+        shared.org
+
+    with patch.object(client, "get_json", slow_get_json):
+        workers = [threading.Thread(target=read) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    return len(calls)
+
+
+def contend_async(tasks: int) -> int:
+    """Number of get_json calls made by `tasks` concurrent awaiters"""
+    calls = []
+
+    async def slow_get_json(url: str, **kwargs: Any) -> Any:
+        calls.append(url)
+        await asyncio.sleep(0.05)
+        return {"repos_url": url + "/repos"}
+
+    async def read_all() -> None:
+        shared = AsyncGithubOrgClient("google")
+        await asyncio.gather(*(shared.org() for _ in range(tasks)))
+
+    with patch.object(client, "async_get_json", slow_get_json):
+        asyncio.run(read_all())
+    return len(calls)
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    print("{} threads reading client.org".format(threads))
+    print("unlocked memoize: {:3} get_json calls".format(
+        contend(UnlockedClient, threads)))
+    print("locked memoize  : {:3} get_json calls".format(
+        contend(GithubOrgClient, threads)))
+    print("async memoize   : {:3} get_json calls".format(
+        contend_async(threads)))
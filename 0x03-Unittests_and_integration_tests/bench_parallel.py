@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Measure how filter_columns scales from 1 to N worker processes.
+Usage: ./bench_parallel.py [repos] [max_workers]
+Two jobs run over generated repos: extracting the columns RepoStore
+holds, and keeping the apache-2.0 repos while extracting name, owner
+and stars. Each is timed serially, then sharded across 2 to
+`max_workers` processes, the CPU count by default, with the size
+threshold lowered so that every run really uses the pool.
+"""
+import os
+import sys
+from functools import partial
+from time import perf_counter
+
+from client import GithubOrgClient
+from fixture_generator import generate_repos
+from parallel import MIN_SHARD_SIZE, filter_columns
+from store import RepoStore
+
+STORE_PATHS = ([("name",), ("archived",)]
+               + list(RepoStore.CATEGORICAL.values())
+               + list(RepoStore.NUMERIC.values()))
+FILTER_PATHS = [("name",), ("owner", "login"), ("stargazers_count",)]
+APACHE2 = partial(GithubOrgClient._matches, license="apache-2.0")
+
+
+def best(fn, repeat: int = 3) -> float:
+    """Fastest of `repeat` runs of `fn`, in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        fn()
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    repos = list(generate_repos(count))
+    jobs = [
+        ("store columns", STORE_PATHS, None),
+        ("apache-2.0 filter", FILTER_PATHS, APACHE2),
+    ]
+    print("{} repos, {} CPUs, serial below {} repos per worker".format(
+        count, os.cpu_count(), MIN_SHARD_SIZE))
+    print("{:<18} {:>8} {:>10} {:>8}".format(
+        "job", "workers", "ms", "speedup"))
+    for label, paths, predicate in jobs:
+        serial = best(partial(filter_columns, repos, paths, predicate))
+        print("{:<18} {:>8} {:>10.0f} {:>8.2f}".format(
+            label, "serial", serial * 1e3, 1))
+        for workers in range(2, max_workers + 1):
+            seconds = best(partial(filter_columns, repos, paths, predicate,
+                                   workers=workers, min_shard=1))
+            print("{:<18} {:>8} {:>10.0f} {:>8.2f}".format(
+                label, workers, seconds * 1e3, serial / seconds))
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Compare the memory held by full and projected repos payloads.
+Payloads go through a JSON round trip so that, as when parsed from a
+response, every repo owns its own objects.
+"""
+import json
+import sys
+import tracemalloc
+from unittest.mock import patch
+
+from client import GithubOrgClient
+from fixtures import TEST_PAYLOAD
+
+
+def held_bytes(scale: int, fields) -> int:
+    """Bytes still allocated once a client holds `scale` x fixture repos"""
+    payloads = [TEST_PAYLOAD[0][0], None]
+    tracemalloc.start()
+    payloads[1] = json.loads(json.dumps(TEST_PAYLOAD[0][1] * scale))
+    with patch("client.get_json", side_effect=payloads):
+        client = GithubOrgClient("google", fields=fields)
+        client.repos_payload
+    payloads.clear()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del client
+    return size
+
+
+if __name__ == "__main__":
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    count = scale * len(TEST_PAYLOAD[0][1])
+    full = held_bytes(scale, None)
+    projected = held_bytes(scale, [])
+    wider = held_bytes(scale, ["owner.login", "stargazers_count", "language"])
+    print("{} repos".format(count))
+    print("full dicts              : {:10.1f} MB  {:6.0f} B/repo".format(
+        full / 2**20, full / count))
+    print("name, license.key       : {:10.1f} MB  {:6.0f} B/repo".format(
+        projected / 2**20, projected / count))
+    print("+ owner, stars, language: {:10.1f} MB  {:6.0f} B/repo".format(
+        wider / 2**20, wider / count))
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Benchmark org throughput of public_repos_many against a serial loop.
+"""
+import statistics
+import sys
+from time import perf_counter
+
+from client import GithubOrgClient
+from fixtures import TEST_PAYLOAD
+from stub_server import StubServer
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.02
+    routes = {}
+    with StubServer(routes, latency=latency) as server:
+        GithubOrgClient.ORG_URL = server.url("/orgs/{org}")
+        orgs = ["org{}".format(i) for i in range(count)]
+        for org in orgs:
+            repos_path = "/orgs/{}/repos".format(org)
+            routes["/orgs/" + org] = {"repos_url": server.url(repos_path)}
+            routes[repos_path] = TEST_PAYLOAD[0][1]
+
+        start = perf_counter()
+        for org in orgs:
+            GithubOrgClient(org).public_repos()
+        serial = perf_counter() - start
+
+        start = perf_counter()
+        results = list(GithubOrgClient.public_repos_many(
+            orgs, max_workers=workers))
+        bulk = perf_counter() - start
+
+    assert not any(result.error for result in results)
+    latencies = sorted(result.elapsed for result in results)
+    print("{} orgs, {:.0f} ms server latency".format(count, latency * 1e3))
+    print("serial loop        : {:8.1f} orgs/s".format(count / serial))
+    print("public_repos_many  : {:8.1f} orgs/s ({} workers)".format(
+        count / bulk, workers))
+    print("per-org latency    : p50 {:.1f} ms  p95 {:.1f} ms  max {:.1f} ms"
+          .format(statistics.median(latencies) * 1e3,
+                  latencies[int(len(latencies) * 0.95)] * 1e3,
+                  latencies[-1] * 1e3))
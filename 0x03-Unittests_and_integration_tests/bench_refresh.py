@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Compare incremental refresh_repos with a full refetch as repos change.
+Usage: ./bench_refresh.py [repos] [latency]
+The emulator serves the org in pages of 100; a full refetch streams
+every page and rebuilds license_index and repo_store, while a refresh
+reads only the pages holding changed repos and updates them in place.
+"""
+import sys
+from time import perf_counter
+
+from client import GithubOrgClient
+from fixture_generator import generate_repos
+from github_emulator import GithubEmulator
+from utils import prime
+
+
+def loaded_client(github: GithubEmulator, repos: list) -> GithubOrgClient:
+    """Client holding `repos` with its indexes built"""
+    client = GithubOrgClient("google")
+    prime(client, "org", {"repos_url": github.url("/orgs/google/repos")})
+    prime(client, "repos_payload", list(repos))
+    client.license_index, client.repo_store
+    return client
+
+
+def touch(repos: list, count: int, round_: int) -> list:
+    """Copy of `repos` with `count` of them updated in round `round_`"""
+    repos = list(repos)
+    for i in range(count):
+        position = (round_ * 7919 + i * 104729) % len(repos)
+        repos[position] = dict(repos[position], updated_at=(
+            "2031-01-01T00:{:02d}:{:02d}Z".format(round_, i % 60)),
+            stargazers_count=repos[position]["stargazers_count"] + 1)
+    return repos
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.005
+    repos = list(generate_repos(count))
+    with GithubEmulator({"google": repos}, per_page=100,
+                        latency=latency) as github:
+        client = loaded_client(github, repos)
+        print("{} repos, {:.0f} ms server latency".format(
+            count, latency * 1e3))
+        print("{:>8} {:>12} {:>12} {:>8}".format(
+            "changed", "refetch ms", "refresh ms", "speedup"))
+        for round_, changed in enumerate((0, 1, 10, 100, 1000), 1):
+            repos = touch(repos, changed, round_)
+            github.set_repos("google", repos)
+
+            start = perf_counter()
+            fresh = list(client.iter_repos())
+            rebuilt = loaded_client(github, fresh)
+            refetch = perf_counter() - start
+
+            start = perf_counter()
+            names = client.refresh_repos()
+            refresh = perf_counter() - start
+            assert len(names) == changed
+            assert client.license_index == rebuilt.license_index
+            print("{:>8} {:>12.1f} {:>12.1f} {:>7.1f}x".format(
+                changed, refetch * 1e3, refresh * 1e3, refetch / refresh))
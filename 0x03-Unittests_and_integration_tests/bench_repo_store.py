@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Benchmark RepoStore queries against dict scans on synthetic repos.
+Usage: ./bench_repo_store.py [repos] [rounds]
+Repos are projected onto the store's fields as they are generated, so
+the scans run over the slim dicts a projecting client would hold.
+"""
+import sys
+from time import perf_counter
+
+from fixture_generator import generate_repos
+from store import RepoStore
+
+FIELDS = ["name", "language", "stargazers_count", "forks_count",
+          "archived", "size"]
+
+
+def slim(repo: dict) -> dict:
+    """`repo` reduced to the fields the store holds"""
+    projected = {field: repo[field] for field in FIELDS}
+    projected["license"] = repo["license"] and {"key": repo["license"]["key"]}
+    return projected
+
+
+def license_of(repo: dict):
+    """License key of `repo`, or None"""
+    return repo["license"] and repo["license"]["key"]
+
+
+SCANS = {
+    "license": lambda repos: [
+        repo["name"] for repo in repos if license_of(repo) == "apache-2.0"],
+    "license+lang+stars top": lambda repos: [repo["name"] for repo in sorted(
+        (repo for repo in repos if license_of(repo) == "apache-2.0"
+         and repo["language"] == "Python"
+         and repo["stargazers_count"] > 100),
+        key=lambda repo: repo["stargazers_count"], reverse=True)],
+    "top 10 stars": lambda repos: [repo["name"] for repo in sorted(
+        repos, key=lambda repo: repo["stargazers_count"],
+        reverse=True)[:10]],
+    "not archived, small": lambda repos: [
+        repo["name"] for repo in repos
+        if not repo["archived"] and repo["size"] <= 1000],
+}
+
+QUERIES = {
+    "license": lambda store: store.select(
+        store.equals("license", "apache-2.0")),
+    "license+lang+stars top": lambda store: store.top("stars", None, (
+        store.equals("license", "apache-2.0")
+        & store.equals("language", "Python")
+        & store.between("stars", 101))),
+    "top 10 stars": lambda store: store.top("stars", 10),
+    "not archived, small": lambda store: store.select(
+        ~store.archived & store.between("size", high=1000)),
+}
+
+
+def timed(fn, arg, rounds: int):
+    """Result of `fn(arg)` and its average seconds over `rounds` calls"""
+    start = perf_counter()
+    for _ in range(rounds):
+        result = fn(arg)
+    return result, (perf_counter() - start) / rounds
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    repos = [slim(repo) for repo in generate_repos(count)]
+    start = perf_counter()
+    store = RepoStore(repos)
+    built = perf_counter() - start
+    start = perf_counter()
+    for column in RepoStore.NUMERIC:
+        store.top(column, 1)
+    print("{} repos, store built in {:.2f} s, rankings in {:.2f} s".format(
+        count, built, perf_counter() - start))
+    print("{:<24} {:>10} {:>10} {:>8} {:>8}".format(
+        "query", "scan ms", "store ms", "speedup", "matches"))
+    for label, scan in SCANS.items():
+        expected, scan_time = timed(scan, repos, rounds)
+        result, store_time = timed(QUERIES[label], store, rounds)
+        assert result == expected, label
+        print("{:<24} {:>10.1f} {:>10.1f} {:>7.1f}x {:>8}".format(
+            label, scan_time * 1e3, store_time * 1e3,
+            scan_time / store_time, len(result)))
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Measure get_json failures and tail latency with retries and hedging
+against a local server injecting slow answers and 503 errors.
+"""
+import random
+import sys
+from time import perf_counter
+
+import requests
+
+from fixtures import TEST_PAYLOAD
+from stub_server import StubServer
+from utils import HedgePolicy, RetryPolicy, get_json
+
+
+def run(url: str, n: int, **kwargs) -> tuple:
+    """Latencies of successful calls and the number of failures"""
+    latencies, failures = [], 0
+    for _ in range(n):
+        start = perf_counter()
+        try:
+            payload = get_json(url, **kwargs)
+            if "repos_url" not in payload:
+                raise ValueError(payload)
+        except (requests.RequestException, ValueError):
+            failures += 1
+            continue
+        latencies.append(perf_counter() - start)
+    return sorted(latencies), failures
+
+
+def tail_latency() -> float:
+    """5 ms, with one answer in 20 taking 200 ms"""
+    return 0.2 if random.random() < 0.05 else 0.005
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    routes = {"/orgs/google": TEST_PAYLOAD[0][0]}
+    with StubServer(routes, latency=tail_latency, error_rate=0.1) as server:
+        url = server.url("/orgs/google")
+        modes = [
+            ("plain", {}),
+            ("retry", {"retry": RetryPolicy(retries=4, base=0.01, cap=0.1)}),
+            ("retry+hedge", {"retry": RetryPolicy(retries=4, base=0.01,
+                                                  cap=0.1),
+                             "hedge": HedgePolicy(quantile=0.9)}),
+        ]
+        print("{:<12} {:>8} {:>9} {:>9} {:>9}".format(
+            "mode", "failures", "p50 ms", "p95 ms", "p99 ms"))
+        for label, kwargs in modes:
+            latencies, failures = run(url, n, **kwargs)
+            print("{:<12} {:>8} {:>9.1f} {:>9.1f} {:>9.1f}".format(
+                label, failures,
+                latencies[len(latencies) // 2] * 1e3,
+                latencies[int(len(latencies) * 0.95)] * 1e3,
+                latencies[int(len(latencies) * 0.99)] * 1e3))
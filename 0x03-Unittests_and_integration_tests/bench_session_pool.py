@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Benchmark per-request latency of `get_json` with and without pooling.
+"""
+import sys
+from time import perf_counter
+
+import requests
+
+from fixtures import TEST_PAYLOAD
+from stub_server import StubServer
+from utils import SessionPool
+
+
+def measure(fetch, url: str, n: int) -> float:
+    """Average seconds per `fetch(url)` call over `n` calls"""
+    fetch(url)
+    start = perf_counter()
+    for _ in range(n):
+        fetch(url).json()
+    return (perf_counter() - start) / n
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with StubServer({"/orgs/google": TEST_PAYLOAD[0][0]}) as server:
+        url = server.url("/orgs/google")
+        pool = SessionPool()
+        unpooled = measure(requests.get, url, n)
+        pooled = measure(pool.get, url, n)
+        pool.close()
+    print("requests.get     : {:8.1f} us/request".format(unpooled * 1e6))
+    print("SessionPool.get  : {:8.1f} us/request".format(pooled * 1e6))
+    print("saved            : {:8.1f} us/request ({:.0%})".format(
+        (unpooled - pooled) * 1e6, 1 - pooled / unpooled))
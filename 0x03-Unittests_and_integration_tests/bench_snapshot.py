@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Compare repo snapshots with JSON and pickle on size and load time.
+Usage: ./bench_snapshot.py [repos]
+"Query" is loading the file and listing the apache-2.0 repos, by a
+dict scan for JSON and pickle and through SnapshotStore otherwise.
+Full payloads are the repos as fetched; slim ones keep only the fields
+a snapshot holds.
+"""
+import json
+import os
+import pickle
+import sys
+import tempfile
+from time import perf_counter
+
+from bench_repo_store import slim
+from fixture_generator import generate_repos
+from store import RepoStore, SnapshotStore
+
+
+def apache2(repos: list) -> list:
+    """Names of the apache-2.0 repos, by a scan"""
+    return [repo["name"] for repo in repos
+            if repo["license"] and repo["license"]["key"] == "apache-2.0"]
+
+
+def timed(fn, *args):
+    """Result of `fn(*args)` and the seconds it took"""
+    start = perf_counter()
+    result = fn(*args)
+    return result, perf_counter() - start
+
+
+def dump_json(path: str, repos: list) -> None:
+    """Write `repos` to `path` as JSON"""
+    with open(path, "w") as file:
+        json.dump(repos, file)
+
+
+def load_json(path: str) -> list:
+    """Read a JSON file"""
+    with open(path) as file:
+        return json.load(file)
+
+
+def dump_pickle(path: str, repos: list) -> None:
+    """Write `repos` to `path` as a pickle"""
+    with open(path, "wb") as file:
+        pickle.dump(repos, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_pickle(path: str) -> list:
+    """Read a pickle file"""
+    with open(path, "rb") as file:
+        return pickle.load(file)
+
+
+def query_snapshot(path: str) -> list:
+    """apache-2.0 repos of the snapshot at `path`"""
+    with SnapshotStore(path) as store:
+        return store.select(store.equals("license", "apache-2.0"))
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    repos = list(generate_repos(count))
+    slim_repos = [slim(repo) for repo in repos]
+    expected = apache2(repos)
+    directory = tempfile.mkdtemp()
+    print("{} repos".format(count))
+    print("{:<14} {:>10} {:>10} {:>10} {:>10}".format(
+        "format", "MB", "save ms", "load ms", "query ms"))
+    rows = [
+        ("json full", dump_json, load_json, repos),
+        ("pickle full", dump_pickle, load_pickle, repos),
+        ("json slim", dump_json, load_json, slim_repos),
+        ("pickle slim", dump_pickle, load_pickle, slim_repos),
+    ]
+    try:
+        for label, dump, load, payload in rows:
+            path = os.path.join(directory, label.replace(" ", "."))
+            _, save_time = timed(dump, path, payload)
+            _, load_time = timed(load, path)
+            names, query_time = timed(lambda: apache2(load(path)))
+            assert names == expected
+            print("{:<14} {:>10.1f} {:>10.0f} {:>10.0f} {:>10.0f}".format(
+                label, os.path.getsize(path) / 2**20, save_time * 1e3,
+                load_time * 1e3, query_time * 1e3))
+            os.unlink(path)
+        path = os.path.join(directory, "repos.snapshot")
+        store = RepoStore(slim_repos)
+        _, save_time = timed(store.save, path, {"org": "google"})
+        snapshot, load_time = timed(SnapshotStore, path)
+        snapshot.close()
+        names, query_time = timed(query_snapshot, path)
+        assert names == expected
+        print("{:<14} {:>10.1f} {:>10.0f} {:>10.1f} {:>10.0f}".format(
+            "snapshot", os.path.getsize(path) / 2**20, save_time * 1e3,
+            load_time * 1e3, query_time * 1e3))
+        os.unlink(path)
+    finally:
+        os.rmdir(directory)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Compare peak RSS of get_json and streamed parsing on a huge listing.
+Usage: ./bench_streaming_json.py [megabytes]
+Each mode runs in a child process so that its peak RSS is its own.
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from fixtures import TEST_PAYLOAD
+from utils import get_json, iter_items
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler without request logging"""
+
+    def log_message(self, format: str, *args) -> None:
+        """Keep the report readable"""
+
+
+def write_payload(path: str, megabytes: int) -> int:
+    """Write a repo listing of about `megabytes` MB, return repo count"""
+    repos = TEST_PAYLOAD[0][1]
+    count = 0
+    with open(path, "w") as file:
+        file.write("[")
+        while file.tell() < megabytes << 20:
+            repo = dict(repos[count % len(repos)], name="repo{}".format(count))
+            file.write(("," if count else "") + json.dumps(repo))
+            count += 1
+        file.write("]")
+    return count
+
+
+def child(mode: str, url: str) -> None:
+    """Filter apache-2.0 repo names in `mode` and print peak RSS in MB"""
+    if mode == "get_json":
+        repos = get_json(url)
+    else:
+        repos = iter_items(url)
+    names = [repo["name"] for repo in repos
+             if (repo.get("license") or {}).get("key") == "apache-2.0"]
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print("{:<10} {:>8} matches  peak RSS {:8.1f} MB".format(
+        mode, len(names), peak))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3])
+        sys.exit()
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "repos.json")
+    count = write_payload(path, megabytes)
+    handler = partial(QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:{}/repos.json".format(server.server_address[1])
+    print("{} repos, {:.0f} MB".format(count, os.path.getsize(path) / 2**20))
+    try:
+        for mode in ("get_json", "iter_items"):
+            subprocess.run([sys.executable, __file__, "--child", mode, url],
+                           check=True)
+    finally:
+        server.shutdown()
+        os.unlink(path)
+        os.rmdir(directory)
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""Cache backends and the HTTP validator cache used by get_json.
+"""
+import hashlib
+import json
+import mmap
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import (
+    Any,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from decoders import decode, decode_response
+from frozen import freeze, jsonable
+
+
+class MemoryBackend:
+    """In-memory LRU backend holding at most `max_entries` values.
+    """
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        """Init method of MemoryBackend"""
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Value stored under `key`, marking it most recently used"""
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def set(self, key: str, value: Any) -> None:
+        """Store `value` under `key`, evicting the least recently used"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """Drop `key` if present"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        """Number of entries"""
+        return len(self._data)
+
+
+def approx_size(value: Any) -> int:
+    """Approximate number of bytes held by a parsed JSON value"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + approx_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += approx_size(item)
+    elif isinstance(value, Mapping):
+        for item in value.values():
+            size += approx_size(item)
+    elif isinstance(value, Sequence) and not isinstance(value, (str, bytes)):
+        for item in value:
+            size += approx_size(item)
+    return size
+
+
+class SizedLRUCache:
+    """Thread-safe LRU cache bounded by the approximate bytes it holds.
+    Entries are evicted least recently used first once `max_bytes` or
+    `max_entries` is exceeded; values bigger than `max_bytes` are never
+    stored. With `ttl`, entries expire that many seconds after being set.
+    Example
+    -------
+    >>> GithubOrgClient.shared_cache = SizedLRUCache(max_bytes=64 << 20)
+    >>> GithubOrgClient("google").public_repos()
+    >>> GithubOrgClient.shared_cache.stats()["hit_rate"]
+    0.0
+    """
+
+    def __init__(self, max_bytes: int,
+                 max_entries: Optional[int] = None,
+                 ttl: Optional[float] = None) -> None:
+        """Init method of SizedLRUCache"""
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[str, Tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Value stored under `key`, marking it most recently used"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[2] <= time.monotonic():
+                self._pop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: Any) -> None:
+        """Store `value` under `key`, evicting least recently used ones"""
+        size = approx_size(value)
+        expires = float("inf")
+        if self.ttl is not None:
+            expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._pop(key)
+            if size > self.max_bytes:
+                return
+            self._data[key] = (value, size, expires)
+            self.resident_bytes += size
+            while (self.resident_bytes > self.max_bytes
+                   or self.max_entries is not None
+                   and len(self._data) > self.max_entries):
+                self._pop(next(iter(self._data)))
+                self.evictions += 1
+
+    def _pop(self, key: str) -> None:
+        """Drop `key` if present, lock held"""
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.resident_bytes -= entry[1]
+
+    def delete(self, key: str) -> None:
+        """Drop `key` if present"""
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._data.clear()
+            self.resident_bytes = 0
+
+    def __len__(self) -> int:
+        """Number of entries"""
+        return len(self._data)
+
+    def stats(self) -> Dict[str, float]:
+        """Hit rate, eviction and residency counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._data),
+                "resident_bytes": self.resident_bytes,
+            }
+
+
+class DiskBackend:
+    """On-disk backend storing one JSON file per key under `directory`.
+    Each file holds a JSON header line with the key and the time it was
+    stored, followed by the JSON value; values must be JSON serializable.
+    Files are read through a memory map, the value parsed in place from
+    a memoryview of it when the decoder allows, and written to a
+    temporary file that is synced and renamed over the old one, so a
+    crash never leaves a partial entry behind.
+    With `max_bytes`, least recently used files are deleted once the
+    directory grows past it; reads refresh a file's modification time,
+    so recency survives restarts. With `max_age`, entries stored more
+    than that many seconds ago are ignored.
+    Example
+    -------
+    >>> backend = DiskBackend("/var/cache/github", max_bytes=1 << 30)
+    >>> client = GithubOrgClient("google", cache=backend)
+    """
+
+    def __init__(self, directory: str,
+                 max_bytes: Optional[int] = None,
+                 max_age: Optional[float] = None) -> None:
+        """Init method of DiskBackend"""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        entries = [entry for entry in os.scandir(directory)
+                   if entry.name.endswith(".json")]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries:
+            self._sizes[entry.path] = entry.stat().st_size
+        self.resident_bytes = sum(self._sizes.values())
+
+    def _path(self, key: str) -> str:
+        """File holding `key`"""
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, digest + ".json")
+
+    def load(self, key: str) -> Optional[Tuple[float, Any]]:
+        """Time `key` was stored and its value"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                with mmap.mmap(file.fileno(), 0,
+                               access=mmap.ACCESS_READ) as mm:
+                    split = mm.find(b"\n")
+                    header = json.loads(mm[:split])
+                    if header["key"] != key or self._expired(header):
+                        return None
+                    with memoryview(mm) as view:
+                        with view[split + 1:] as body:
+                            value = decode(body)
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            return None
+        with self._lock:
+            if path in self._sizes:
+                self._sizes.move_to_end(path)
+        return header["stored_at"], value
+
+    def _expired(self, header: Dict) -> bool:
+        """Whether an entry is older than `max_age`"""
+        if self.max_age is None:
+            return False
+        return time.time() - header["stored_at"] >= self.max_age
+
+    def get(self, key: str) -> Optional[Any]:
+        """Value stored under `key`"""
+        loaded = self.load(key)
+        return None if loaded is None else loaded[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Store `value` under `key`, replacing the file atomically"""
+        header = json.dumps({"key": key, "stored_at": time.time()})
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as file:
+                file.write(header)
+                file.write("\n")
+                json.dump(value, file, default=jsonable)
+                file.flush()
+                os.fsync(file.fileno())
+                size = file.tell()
+            path = self._path(key)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self.resident_bytes += size - self._sizes.pop(path, 0)
+            self._sizes[path] = size
+            evicted = self._evict()
+        for old_path in evicted:
+            self._unlink(old_path)
+
+    def _evict(self) -> List[str]:
+        """Paths to drop to get back under `max_bytes`, lock held"""
+        evicted = []
+        if self.max_bytes is None:
+            return evicted
+        while len(self._sizes) > 1 and self.resident_bytes > self.max_bytes:
+            path, size = self._sizes.popitem(last=False)
+            self.resident_bytes -= size
+            evicted.append(path)
+        return evicted
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        """Delete `path` if it still exists"""
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def delete(self, key: str) -> None:
+        """Drop `key` if present"""
+        path = self._path(key)
+        with self._lock:
+            self.resident_bytes -= self._sizes.pop(path, 0)
+        self._unlink(path)
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            paths = list(self._sizes)
+            self._sizes.clear()
+            self.resident_bytes = 0
+        for path in paths:
+            self._unlink(path)
+
+    def __len__(self) -> int:
+        """Number of entries"""
+        return len(self._sizes)
+
+
+class CacheEntry(NamedTuple):
+    """Validators and parsed body of a cached response"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    payload: Any
+
+
+class ValidatorCache:
+    """Conditional-request cache keyed by URL.
+    Responses carrying an ETag or Last-Modified header are stored with
+    their parsed body; later requests for the same URL send
+    If-None-Match / If-Modified-Since and a 304 answer is served from
+    the cache without downloading or parsing the body again.
+    Bodies are returned as read-only views from `frozen`, so a caller
+    cannot alter the copy later hits are served from.
+    Example
+    -------
+    >>> cache = ValidatorCache(DiskBackend("/tmp/github-cache"))
+    >>> org = get_json("https://api.github.com/orgs/google", cache=cache)
+    >>> cache.stats()
+    {'hits': 0, 'misses': 1}
+    """
+
+    def __init__(self, backend: Any = None) -> None:
+        """Init method of ValidatorCache"""
+        self.backend = MemoryBackend() if backend is None else backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, url: str) -> Tuple[Optional[CacheEntry], Dict[str, str]]:
+        """Cached entry for `url` and the conditional headers to send"""
+        stored = self.backend.get(url)
+        if stored is None:
+            return None, {}
+        entry = CacheEntry(*stored)
+        headers = {}
+        if entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified is not None:
+            headers["If-Modified-Since"] = entry.last_modified
+        return entry, headers
+
+    def resolve(self, url: str, entry: Optional[CacheEntry],
+                response: Any) -> Any:
+        """Parsed body for `response`, served from `entry` on a 304"""
+        if entry is not None and response.status_code == 304:
+            self._count(hit=True)
+            return freeze(entry.payload)
+        self._count(hit=False)
+        payload = decode_response(response)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code == 200 and (etag or last_modified):
+            self.backend.set(url, CacheEntry(etag, last_modified, payload))
+            return freeze(payload)
+        return payload
+
+    def _count(self, hit: bool) -> None:
+        """Record a hit or a miss"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Hit and miss counters"""
+        return {"hits": self.hits, "misses": self.misses}
@@ -1,58 +1,664 @@
 #!/usr/bin/env python3
 """A github org client
 """
+import asyncio
+import heapq
+import time
+from bisect import bisect_left, insort
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
     List,
     Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
 )
+from urllib.parse import urlencode
 
 from utils import (
     get_json,
-    access_nested_map,
+    async_get_json,
+    async_get_pages,
+    async_iter_pages,
+    iter_items,
+    iter_pages,
+    compile_path,
+    record_type,
     memoize,
+    async_memoize,
+    invalidate,
+    prime,
+    AsyncSingleFlight,
+    SingleFlight,
 )
+from frozen import freeze
+from store import RepoStore, SnapshotStore
+from parallel import filter_columns
+from export import (
+    DEFAULT_BUFFER_SIZE,
+    Fields,
+    async_export_ndjson,
+    export_ndjson,
+)
+
+License = Union[None, str, Iterable[str]]
+
+_license_key = compile_path(("license", "key"))
+
+
+def _license_of(repo: Mapping) -> Optional[str]:
+    """License key of `repo`, or None without one"""
+    try:
+        return _license_key(repo)
+    except KeyError:
+        return None
+
+
+class OrgResult(NamedTuple):
+    """Outcome of one org of GithubOrgClient.public_repos_many"""
+    org: str
+    repos: Optional[List[str]]
+    elapsed: float
+    error: Optional[BaseException] = None
+
+
+def _ttl(name: str):
+    """Expiry of the memoized property `name` of a client"""
+    return lambda client: client._expiry(client._ttl, name)
+
+
+def _stale_ttl(name: str):
+    """Stale-while-revalidate window of the memoized property `name`"""
+    return lambda client: client._expiry(client._stale_ttl, name) or 0
 
 
 class GithubOrgClient:
     """A Githib org client
+    `ttl` expires the memoized org and repos payload after that many
+    seconds, either for both or per property name; for `stale_ttl` more
+    seconds expired values are still served while they are refreshed in
+    the background.
+    Payloads are looked up in `cache`, keyed by org name and URL, before
+    being fetched. It defaults to the class-wide `shared_cache`, which
+    lets clients built per request reuse each other's payloads; values
+    recomputed after their ttl are refetched and replace cached ones.
+    With `fields`, repos are projected at ingest onto those key paths,
+    plus the name and license key public_repos needs and the update
+    time refresh_repos needs, and kept as slim records instead of full
+    dicts.
+    Setting the class-wide `flight` to a SingleFlight makes clients
+    asking for the same URL at the same time share one request; the
+    payloads they get are then read-only views.
+    Setting the class-wide `workers` lets repo_store and extract_repos
+    shard payloads large enough across that many processes.
     """
     ORG_URL = "https://api.github.com/orgs/{org}"
+    REPO_FIELDS = ("name", "license.key", "updated_at")
+    shared_cache: Optional[Any] = None
+    flight: Optional[SingleFlight] = None
+    workers: Optional[int] = None
 
-    def __init__(self, org_name: str) -> None:
+    def __init__(self, org_name: str,
+                 ttl: Union[None, float, Mapping[str, float]] = None,
+                 stale_ttl: Union[float, Mapping[str, float]] = 0,
+                 cache: Optional[Any] = None,
+                 fields: Optional[Iterable[Union[str, Sequence]]] = None,
+                 fetch: Optional[Callable[[str], Any]] = None) -> None:
         """Init method of GithubOrgClient"""
         self._org_name = org_name
+        self._fetch = fetch
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._cache = cache
+        self._cache_keys: Dict[str, str] = {}
+        self._record_type = None
+        if fields is not None:
+            self._record_type = record_type(
+                list(self.REPO_FIELDS) + list(fields))
+
+    def _project(self, repos: Iterable[Dict]) -> List:
+        """Repos projected onto the client's fields"""
+        record = self._record_type
+        return [repo if type(repo) is record else record.from_map(repo)
+                for repo in repos]
+
+    @property
+    def _payload_cache(self) -> Optional[Any]:
+        """Cache of fetched payloads in use"""
+        return self._cache if self._cache is not None else self.shared_cache
+
+    def _get_json(self, name: str, url: str,
+                  ingest: Optional[Callable] = None) -> Any:
+        """get_json through the cache, for the memoized property `name`
+        `ingest` transforms fetched payloads before they are cached.
+        Only the first computation of `name` may be served by the cache:
+        recomputing it, once its ttl expired, refetches and overwrites
+        the cached payload. Cached payloads are shared between clients,
+        so they are returned as read-only views.
+        """
+        fetch = self._fetch or get_json
+        if self.flight is not None:
+            fetch = partial(self.flight.do, url, partial(fetch, url))
+        else:
+            fetch = partial(fetch, url)
+        cache = self._payload_cache
+        if cache is None:
+            payload = fetch()
+            return payload if ingest is None else ingest(payload)
+        key = "{}:{}".format(self._org_name, url)
+        if ingest is not None:
+            key += "#" + ",".join(".".join(map(str, path))
+                                  for path in self._record_type._paths)
+        refetch = name in self._cache_keys
+        self._cache_keys[name] = key
+        payload = None if refetch else cache.get(key)
+        if payload is None:
+            payload = fetch()
+            if ingest is not None:
+                payload = ingest(payload)
+            cache.set(key, payload)
+        elif ingest is not None:
+            payload = ingest(payload)
+        return freeze(payload)
+
+    @staticmethod
+    def _expiry(setting: Union[None, float, Mapping[str, float]],
+                name: str) -> Optional[float]:
+        """Value of a ttl setting for the memoized property `name`"""
+        if isinstance(setting, Mapping):
+            return setting.get(name)
+        return setting
 
-    @memoize
+    def invalidate(self, *names: str) -> None:
+        """Drop the named memoized properties, such as repos_payload"""
+        invalidate(self, *names)
+        self._uncache(names)
+        if "repos_payload" in names:
+            self._uncache(["repos_watermark"])
+            vars(self).pop("_watermark", None)
+            vars(self).pop("_license_index", None)
+            vars(self).pop("_repo_store", None)
+            vars(self).pop("_refresh_state", None)
+            self.close()
+
+    def invalidate_all(self) -> None:
+        """Drop every memoized property"""
+        invalidate(self)
+        self._uncache(list(self._cache_keys))
+        vars(self).pop("_watermark", None)
+        vars(self).pop("_license_index", None)
+        vars(self).pop("_repo_store", None)
+        vars(self).pop("_refresh_state", None)
+        self.close()
+
+    def close(self) -> None:
+        """Close the snapshot the client was loaded from, if any
+        Queries then fall back to fetching the org.
+        """
+        snapshot = vars(self).pop("_snapshot", None)
+        if snapshot is not None:
+            snapshot.close()
+
+    def __enter__(self) -> "GithubOrgClient":
+        """The client itself"""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Close the client"""
+        self.close()
+
+    def _uncache(self, names: Iterable[str]) -> None:
+        """Drop the cached payloads of the named properties"""
+        cache = self._payload_cache
+        for name in names:
+            key = self._cache_keys.pop(name, None)
+            if cache is not None and key is not None:
+                cache.delete(key)
+
+    @memoize(ttl=_ttl("org"), stale_ttl=_stale_ttl("org"))
     def org(self) -> Dict:
         """Memoize org"""
-        return get_json(self.ORG_URL.format(org=self._org_name))
+        return self._get_json("org", self.ORG_URL.format(org=self._org_name))
 
     @property
     def _public_repos_url(self) -> str:
         """Public repos URL"""
         return self.org["repos_url"]
 
-    @memoize
+    @staticmethod
+    def _by_update(url: str, per_page: int) -> str:
+        """URL of a repos listing sorted by last update, newest first"""
+        return "{}?{}".format(url, urlencode({
+            "sort": "updated", "direction": "desc", "per_page": per_page}))
+
+    @memoize(ttl=_ttl("repos_payload"), stale_ttl=_stale_ttl("repos_payload"))
     def repos_payload(self) -> Dict:
-        """Memoize repos payload"""
-        return get_json(self._public_repos_url)
+        """Memoize repos payload
+        The most recently updated repo of the whole listing is read just
+        before it, as the watermark refresh_repos starts from.
+        """
+        url = self._public_repos_url
+        newest = self._get_json("repos_watermark", self._by_update(url, 1))
+        ingest = self._project if self._record_type is not None else None
+        payload = self._get_json("repos_payload", url, ingest)
+        self._watermark = (payload, newest)
+        return payload
 
-    def public_repos(self, license: str = None) -> List[str]:
-        """Public repos"""
+    def iter_repos(self) -> Iterator[Dict]:
+        """Stream every repo of the org, following pagination
+        Repos are parsed one at a time from the response stream, so the
+        full listing is never held in memory.
+        """
+        repos = iter_items(self._public_repos_url)
+        if self._record_type is None:
+            return repos
+        return map(self._record_type.from_map, repos)
+
+    def refresh_repos(self, per_page: int = 100) -> List[str]:
+        """Merge the repos updated since the last fetch into repos_payload
+        The listing is read sorted by last update, newest first, and only
+        down to the watermark: the newest update in the whole listing
+        when repos_payload was fetched, then the newest update merged.
+        A refresh thus costs in proportion to the repos that changed
+        rather than to the org, and merges only those, even though
+        repos_payload holds the first page of the listing only.
+        Changed repos replace their old version and others, new or from
+        a later page, are appended; license_index and repo_store, when
+        built, are updated in place. Deleted repos stay until
+        repos_payload is refetched.
+        Returns the names of the repos added or changed.
+        """
+        self.close()
+        payload = self.repos_payload
+        state = vars(self).get("_refresh_state")
+        if state is None or state[0] is not payload:
+            positions = {repo["name"]: position
+                         for position, repo in enumerate(payload)}
+            newest = payload
+            watermark = vars(self).get("_watermark")
+            if watermark is not None and watermark[0] is payload:
+                newest = watermark[1]
+            since = max((repo.get("updated_at") or "" for repo in newest),
+                        default="")
+            seen = {repo["name"] for repo in newest
+                    if (repo.get("updated_at") or "") == since}
+        else:
+            positions, since, seen = state[1:]
+        updated = []
+        for page in iter_pages(self._by_update(self._public_repos_url,
+                                               per_page), prefetch=False):
+            fresh = [repo for repo in page
+                     if (repo.get("updated_at") or "") >= since]
+            updated.extend(fresh)
+            if len(fresh) < len(page):
+                break
+        if self._record_type is not None:
+            updated = self._project(updated)
+        merged = list(payload)
+        changed = []
+        newest, latest = since, set(seen)
+        for repo in reversed(updated):
+            stamp = repo.get("updated_at") or ""
+            if stamp > newest:
+                newest, latest = stamp, set()
+            if stamp == newest:
+                latest.add(repo["name"])
+            if stamp == since and repo["name"] in seen:
+                continue
+            position = positions.get(repo["name"])
+            if position is None:
+                old = None
+                position = positions[repo["name"]] = len(merged)
+                merged.append(repo)
+            else:
+                old = merged[position]
+                if old == repo:
+                    continue
+                merged[position] = repo
+            changed.append((position, old, repo))
+        if changed:
+            key = self._cache_keys.get("repos_payload")
+            if key is not None and self._payload_cache is not None:
+                self._payload_cache.set(key, merged)
+                merged = freeze(merged)
+            self._apply(payload, merged, changed)
+            payload = merged
+        prime(self, "repos_payload", payload)
+        self._refresh_state = (payload, positions, newest, latest)
+        return [repo["name"] for _, _, repo in changed]
+
+    def _apply(self, payload: List, merged: List, changed: List) -> None:
+        """Carry the indexes of `payload` over to `merged` in place"""
+        built = vars(self).get("_license_index")
+        if built is not None and built[0] is payload:
+            index = built[1]
+            for position, old, repo in changed:
+                key = _license_of(repo)
+                if old is not None:
+                    old_key = _license_of(old)
+                    if old_key == key:
+                        continue
+                    if old_key is not None:
+                        positions = index[old_key]
+                        del positions[bisect_left(positions, position)]
+                        if not positions:
+                            del index[old_key]
+                if key is not None:
+                    insort(index.setdefault(key, []), position)
+            self._license_index = (merged, index)
+        built = vars(self).get("_repo_store")
+        if built is not None and built[0] is payload:
+            for position, _, repo in changed:
+                built[1].set(position, repo)
+            self._repo_store = (merged, built[1])
+
+    @property
+    def license_index(self) -> Dict[str, List[int]]:
+        """Positions in repos_payload of the repos under each license key
+        Built in one pass the first time it is needed, and again whenever
+        repos_payload is refetched.
+        """
+        payload = self.repos_payload
+        built = vars(self).get("_license_index")
+        if built is None or built[0] is not payload:
+            index: Dict[str, List[int]] = {}
+            for position, repo in enumerate(payload):
+                try:
+                    key = _license_key(repo)
+                except KeyError:
+                    continue
+                index.setdefault(key, []).append(position)
+            built = self._license_index = (payload, index)
+        return built[1]
+
+    @property
+    def repo_store(self) -> RepoStore:
+        """repos_payload as a columnar RepoStore, for search_repos
+        Built the first time it is needed, and again whenever
+        repos_payload is refetched. Clients from load_snapshot answer
+        from the snapshot instead.
+        """
+        snapshot = vars(self).get("_snapshot")
+        if snapshot is not None:
+            return snapshot
+        payload = self.repos_payload
+        built = vars(self).get("_repo_store")
+        if built is None or built[0] is not payload:
+            built = self._repo_store = (payload,
+                                        RepoStore(payload, self.workers))
+        return built[1]
+
+    def save_snapshot(self, path: str) -> None:
+        """Write repo_store to `path` as a binary snapshot of the org"""
+        self.repo_store.save(path, {"org": self._org_name})
+
+    @classmethod
+    def load_snapshot(cls, path: str,
+                      **kwargs: Any) -> "GithubOrgClient":
+        """Client answering queries from the snapshot at `path`
+        The file is memory-mapped and each column read on first use, so
+        public_repos(license=...) decodes only the license codes and the
+        names it returns. Queries keep using the snapshot until
+        repos_payload is invalidated or refreshed, which closes it, or the
+        client is closed. `kwargs` are passed to the client.
+        Example
+        -------
+        >>> GithubOrgClient("google").save_snapshot("google.snapshot")
+        >>> with GithubOrgClient.load_snapshot("google.snapshot") as client:
+        ...     client.public_repos(license="apache-2.0")
+        ['dagger', 'kratu', 'traceur-compiler', 'firmata.py']
+        """
+        snapshot = SnapshotStore(path)
+        try:
+            client = cls(snapshot.meta["org"], **kwargs)
+        except BaseException:
+            snapshot.close()
+            raise
+        client._snapshot = snapshot
+        return client
+
+    def public_repos(self, license: License = None,
+                     stream: bool = False) -> List[str]:
+        """Public repos
+        `license` is a license key or a collection of keys, any of which
+        matches. Filtered queries are answered from `license_index`, and
+        clients from load_snapshot answer from their snapshot.
+        With `stream`, every page of the listing is consumed repo by repo
+        through `iter_repos` instead of the memoized first page.
+        """
+        if stream:
+            return [repo["name"] for repo in self.iter_repos()
+                    if self._matches(repo, license)]
+        snapshot = vars(self).get("_snapshot")
+        if snapshot is not None:
+            if license is None:
+                return snapshot.select()
+            return snapshot.select(snapshot.equals("license", license))
         json_payload = self.repos_payload
-        public_repos = [
-            repo["name"] for repo in json_payload
-            if license is None or self.has_license(repo, license)
-        ]
+        if license is None:
+            return [repo["name"] for repo in json_payload]
+        index = self.license_index
+        if isinstance(license, str):
+            positions = index.get(license, [])
+        else:
+            positions = heapq.merge(*(index.get(key, [])
+                                      for key in set(license)))
+        return [json_payload[position]["name"] for position in positions]
+
+    def export_repos(self, sink: Any, license: License = None,
+                     fields: Fields = None,
+                     buffer_size: int = DEFAULT_BUFFER_SIZE) -> int:
+        """Stream the org's repos to `sink` as NDJSON, return their count
+        `sink` is a path, a binary file or a connected socket. Repos are
+        read through `iter_repos`, kept if under `license`, projected
+        onto `fields` and written a buffer at a time, so memory does not
+        grow with the org.
+        Example
+        -------
+        >>> client.export_repos("apache.ndjson", license="apache-2.0",
+        ...                     fields=["name", "stargazers_count"])
+        """
+        repos = (repo for repo in self.iter_repos()
+                 if self._matches(repo, license))
+        return export_ndjson(repos, sink, fields, buffer_size)
+
+    def extract_repos(self, fields: Iterable[Union[str, Sequence]],
+                      license: License = None) -> Dict[Tuple, List]:
+        """Values of `fields` for the repos under `license`, in order
+        Fields are key paths, as for `fields` of the client, and values
+        are returned one list per path, keyed by the path tuple, None
+        where a repo lacks it. With the class-wide `workers`, payloads
+        large enough are filtered and extracted in parallel processes.
+        Example
+        -------
+        >>> client.extract_repos(["name", "owner.login"], license="bsl-1.0")
+        {('name',): ['cpp-netlib'], ('owner', 'login'): ['google']}
+        """
+        paths = [tuple(path.split(".")) if isinstance(path, str)
+                 else tuple(path) for path in fields]
+        predicate = None
+        if license is not None:
+            predicate = partial(self._matches, license=license)
+        return filter_columns(self.repos_payload, paths, predicate,
+                              workers=self.workers)
 
-        return public_repos
+    def search_repos(self, license: License = None,
+                     language: Union[None, str, Iterable[str]] = None,
+                     min_stars: Optional[int] = None,
+                     archived: Optional[bool] = None,
+                     sort: Optional[str] = None,
+                     limit: Optional[int] = None) -> List[str]:
+        """Names of the repos meeting every condition given
+        `license` and `language` are a value or a collection of values.
+        With `sort`, one of "stars", "forks" or "size", repos come
+        largest first; `limit` keeps the first that many.
+        Example
+        -------
+        >>> client.search_repos(license="apache-2.0", language="Python",
+        ...                     min_stars=100, sort="stars", limit=10)
+        """
+        store = self.repo_store
+        mask = None
+        conditions = [("license", license), ("language", language),
+                      ("archived", archived)]
+        for column, value in conditions:
+            if value is not None:
+                selected = store.equals(column, value)
+                mask = selected if mask is None else mask & selected
+        if min_stars is not None:
+            selected = store.between("stars", min_stars)
+            mask = selected if mask is None else mask & selected
+        if sort is not None:
+            return store.top(sort, limit, mask)
+        return store.select(mask)[:limit]
+
+    @classmethod
+    def _matches(cls, repo: Dict[str, Dict], license: License) -> bool:
+        """Whether `repo` is under `license`, a key or a collection"""
+        if license is None:
+            return True
+        if isinstance(license, str):
+            return cls.has_license(repo, license)
+        return any(cls.has_license(repo, key) for key in license)
+
+    @classmethod
+    def public_repos_many(cls, orgs: Iterable[str],
+                          license: License = None,
+                          max_workers: int = 8,
+                          **kwargs: Any) -> Iterator[OrgResult]:
+        """Public repos of many orgs, fetched concurrently
+        Orgs are processed by `max_workers` threads and yielded as each
+        one completes, with the seconds it took and the exception it
+        raised, if any. Repeated org names are processed once, and
+        requests for a URL already in flight share its response through
+        a SingleFlight. Nothing is kept once an org completes, so memory
+        does not grow with the orgs. `kwargs` are passed to each client.
+        Example
+        -------
+        >>> for result in GithubOrgClient.public_repos_many(["google", "abc"]):
+        ...     print(result.org, len(result.repos), result.elapsed)
+        """
+        flight = SingleFlight()
+
+        def fetch(url: str) -> Any:
+            """get_json shared with concurrent requests for `url`"""
+            return flight.do(url, partial(get_json, url))
+
+        def run(org: str) -> OrgResult:
+            """Public repos of one org"""
+            start = time.perf_counter()
+            try:
+                client = cls(org, fetch=fetch, **kwargs)
+                repos = client.public_repos(license=license)
+            except Exception as exc:
+                return OrgResult(org, None, time.perf_counter() - start, exc)
+            return OrgResult(org, repos, time.perf_counter() - start)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(run, org)
+                       for org in dict.fromkeys(orgs)]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
 
     @staticmethod
     def has_license(repo: Dict[str, Dict], license_key: str) -> bool:
         """Static: has_license"""
         assert license_key is not None, "license_key cannot be None"
         try:
-            has_license = access_nested_map(repo, ("license", "key")) == license_key
+            has_license = _license_key(repo) == license_key
         except KeyError:
             return False
         return has_license
+
+
+class AsyncGithubOrgClient:
+    """An asyncio Github org client
+    Mirrors GithubOrgClient with coroutine methods. Requests share the
+    pooled connections of get_json and `semaphore`, when given, bounds
+    the requests in flight across every client sharing it. The
+    class-wide `flight`, when set to an AsyncSingleFlight, coalesces
+    concurrent requests for the same org.
+    Example
+    -------
+    >>> async def main():
+    ...     semaphore = asyncio.Semaphore(20)
+    ...     clients = [AsyncGithubOrgClient(org, semaphore)
+    ...                for org in ("google", "abc")]
+    ...     return await asyncio.gather(*(client.public_repos()
+    ...                                   for client in clients))
+    >>> asyncio.run(main())
+    """
+    ORG_URL = GithubOrgClient.ORG_URL
+    flight: Optional[AsyncSingleFlight] = None
+
+    def __init__(self, org_name: str,
+                 semaphore: Optional[asyncio.Semaphore] = None) -> None:
+        """Init method of AsyncGithubOrgClient"""
+        self._org_name = org_name
+        self._semaphore = semaphore
+
+    @async_memoize
+    async def org(self) -> Dict:
+        """Memoize org"""
+        url = self.ORG_URL.format(org=self._org_name)
+        if self.flight is None:
+            return await async_get_json(url, semaphore=self._semaphore)
+        return await async_get_json(url, semaphore=self._semaphore,
+                                    flight=self.flight)
+
+    async def _public_repos_url(self) -> str:
+        """Public repos URL"""
+        return (await self.org())["repos_url"]
+
+    @async_memoize
+    async def repos_payload(self) -> List[Dict]:
+        """Memoize repos payload, every page fetched concurrently"""
+        pages = await async_get_pages(await self._public_repos_url(),
+                                      semaphore=self._semaphore)
+        return [repo for page in pages for repo in page]
+
+    async def iter_repos(self) -> AsyncIterator[Dict]:
+        """Stream every repo of the org, one page at a time"""
+        pages = async_iter_pages(await self._public_repos_url(),
+                                 semaphore=self._semaphore)
+        async for page in pages:
+            for repo in page:
+                yield repo
+
+    async def export_repos(self, writer: Any, license: License = None,
+                           fields: Fields = None,
+                           buffer_size: int = DEFAULT_BUFFER_SIZE) -> int:
+        """Stream the org's repos to an asyncio StreamWriter as NDJSON
+        Mirrors GithubOrgClient.export_repos; returns the repo count.
+        """
+        async def repos() -> AsyncIterator[Dict]:
+            """Repos under `license`"""
+            async for repo in self.iter_repos():
+                if GithubOrgClient._matches(repo, license):
+                    yield repo
+
+        return await async_export_ndjson(repos(), writer, fields,
+                                         buffer_size)
+
+    async def public_repos(self, license: str = None) -> List[str]:
+        """Public repos"""
+        json_payload = await self.repos_payload()
+        return [
+            repo["name"] for repo in json_payload
+            if license is None or self.has_license(repo, license)
+        ]
+
+    has_license = staticmethod(GithubOrgClient.has_license)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""JSON decoder backends used to parse response bodies.
+"""
+import json
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Optional,
+    Union,
+)
+
+Decoder = Callable[[bytes], Any]
+
+
+# Decoders parsing memoryviews in place; others get a bytes copy.
+_BUFFER_DECODERS = set()
+
+
+def _available() -> Dict[str, Decoder]:
+    """Installed decoders, fastest first"""
+    decoders: Dict[str, Decoder] = {}
+    try:
+        import orjson
+    except ImportError:
+        pass
+    else:
+        decoders["orjson"] = orjson.loads
+        _BUFFER_DECODERS.add(orjson.loads)
+    try:
+        import simdjson
+    except ImportError:
+        pass
+    else:
+        decoders["simdjson"] = simdjson.loads
+    decoders["json"] = json.loads
+    return decoders
+
+
+DECODERS = _available()
+_decoder: Decoder = next(iter(DECODERS.values()))
+_decoder_lock = threading.Lock()
+
+
+def get_decoder() -> Decoder:
+    """Decoder used by `decode`: the fastest installed one by default.
+    """
+    return _decoder
+
+
+def set_decoder(decoder: Optional[Union[str, Decoder]]) -> None:
+    """Replace the decoder used by `decode`.
+    `decoder` is a name from `DECODERS`, a callable taking UTF-8 bytes,
+    or None for the fastest installed one.
+    """
+    global _decoder
+    if decoder is None:
+        decoder = next(iter(DECODERS))
+    if isinstance(decoder, str):
+        if decoder not in DECODERS:
+            raise ValueError("unknown JSON decoder {!r}, expected one of "
+                             "{}".format(decoder, ", ".join(DECODERS)))
+        decoder = DECODERS[decoder]
+    with _decoder_lock:
+        _decoder = decoder
+
+
+def decode(data: Union[bytes, memoryview]) -> Any:
+    """Parse a JSON document from UTF-8 bytes or a memoryview of them.
+    Memoryviews are parsed without a copy when the decoder supports it.
+    """
+    decoder = _decoder
+    if type(data) is memoryview and decoder not in _BUFFER_DECODERS:
+        data = data.tobytes()
+    return decoder(data)
+
+
+def decode_response(response: Any) -> Any:
+    """Parse the JSON body of `response` straight from its raw bytes.
+    Unlike `response.json()`, the body is never decoded to a str first.
+    Responses that do not expose their body as bytes fall back to their
+    own `json()` method.
+    """
+    content = response.content
+    if not isinstance(content, (bytes, bytearray)):
+        return response.json()
+    return _decoder(content)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Deterministic synthetic org and repos payloads at any scale.
+Usage: ./fixture_generator.py count path [seed]
+Writes `count` repos to `path`, as NDJSON if it ends in .ndjson or
+.jsonl and as a JSON array otherwise.
+"""
+import base64
+import json
+import random
+import sys
+import time
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+API_URL = "https://api.github.com"
+
+LICENSES: Dict[str, Dict[str, Any]] = {
+    "apache-2.0": {"key": "apache-2.0", "name": "Apache License 2.0",
+                   "spdx_id": "Apache-2.0", "node_id": "MDc6TGljZW5zZTI="},
+    "bsd-3-clause": {"key": "bsd-3-clause",
+                     "name": 'BSD 3-Clause "New" or "Revised" License',
+                     "spdx_id": "BSD-3-Clause",
+                     "node_id": "MDc6TGljZW5zZTU="},
+    "bsl-1.0": {"key": "bsl-1.0", "name": "Boost Software License 1.0",
+                "spdx_id": "BSL-1.0", "node_id": "MDc6TGljZW5zZTI4"},
+    "mit": {"key": "mit", "name": "MIT License", "spdx_id": "MIT",
+            "node_id": "MDc6TGljZW5zZTEz"},
+    "gpl-3.0": {"key": "gpl-3.0",
+                "name": "GNU General Public License v3.0",
+                "spdx_id": "GPL-3.0", "node_id": "MDc6TGljZW5zZTk="},
+    "other": {"key": "other", "name": "Other", "spdx_id": "NOASSERTION",
+              "url": None, "node_id": "MDc6TGljZW5zZTA="},
+}
+
+# Shares of the fixture org: None stands for repos without a license.
+DEFAULT_LICENSES: Dict[Optional[str], float] = {
+    "apache-2.0": 4, "other": 2, "bsd-3-clause": 1, "bsl-1.0": 1, None: 1,
+}
+
+LANGUAGES = ["JavaScript", "Java", "Python", "C++", "Go", "C", "Shell",
+             "Dart", "HTML", "TypeScript", None]
+WORDS = ["episodes", "netlib", "dagger", "proxy", "kratu", "traceur",
+         "firmata", "cloud", "debug", "build", "compiler", "webkit"]
+
+_REPO_PATHS = [
+    ("forks_url", "/forks"), ("keys_url", "/keys{/key_id}"),
+    ("collaborators_url", "/collaborators{/collaborator}"),
+    ("teams_url", "/teams"), ("hooks_url", "/hooks"),
+    ("issue_events_url", "/issues/events{/number}"),
+    ("events_url", "/events"), ("assignees_url", "/assignees{/user}"),
+    ("branches_url", "/branches{/branch}"), ("tags_url", "/tags"),
+    ("blobs_url", "/git/blobs{/sha}"), ("git_tags_url", "/git/tags{/sha}"),
+    ("git_refs_url", "/git/refs{/sha}"),
+    ("trees_url", "/git/trees{/sha}"), ("statuses_url", "/statuses/{sha}"),
+    ("languages_url", "/languages"), ("stargazers_url", "/stargazers"),
+    ("contributors_url", "/contributors"),
+    ("subscribers_url", "/subscribers"),
+    ("subscription_url", "/subscription"),
+    ("commits_url", "/commits{/sha}"),
+    ("git_commits_url", "/git/commits{/sha}"),
+    ("comments_url", "/comments{/number}"),
+    ("issue_comment_url", "/issues/comments{/number}"),
+    ("contents_url", "/contents/{+path}"),
+    ("compare_url", "/compare/{base}...{head}"), ("merges_url", "/merges"),
+    ("archive_url", "/{archive_format}{/ref}"),
+    ("downloads_url", "/downloads"), ("issues_url", "/issues{/number}"),
+    ("pulls_url", "/pulls{/number}"),
+    ("milestones_url", "/milestones{/number}"),
+    ("notifications_url", "/notifications{?since,all,participating}"),
+    ("labels_url", "/labels{/name}"), ("releases_url", "/releases{/id}"),
+    ("deployments_url", "/deployments"),
+]
+
+_EPOCH = 1202428800  # 2008-02-08, when the GitHub API opened
+_SPAN = 12 * 365 * 86400
+
+
+def _node_id(kind: str, number: int) -> str:
+    """GitHub global node id of the `kind` object `number`"""
+    return base64.b64encode(
+        "{:03d}:{}{}".format(len(kind), kind, number).encode()).decode()
+
+
+def _timestamp(seconds: float) -> str:
+    """ISO 8601 UTC time `seconds` after the epoch of the generator"""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ",
+                         time.gmtime(_EPOCH + int(seconds)))
+
+
+def license_payload(key: str) -> Dict[str, Any]:
+    """License object of the repos payload for `key`"""
+    known = LICENSES.get(key)
+    if known is None:
+        known = {"key": key, "name": key.upper(), "spdx_id": key.upper(),
+                 "node_id": _node_id("License", len(key))}
+    url = "{}/licenses/{}".format(API_URL, key)
+    return {"key": known["key"], "name": known["name"],
+            "spdx_id": known["spdx_id"], "url": known.get("url", url),
+            "node_id": known["node_id"]}
+
+
+def generate_org(org: str = "google", count: int = 0,
+                 base_url: str = API_URL) -> Dict[str, Any]:
+    """Org payload of `org`, listing `count` public repos"""
+    return {
+        "login": org,
+        "url": "{}/orgs/{}".format(base_url, org),
+        "repos_url": "{}/orgs/{}/repos".format(base_url, org),
+        "public_repos": count,
+    }
+
+
+def _owner(org: str, org_id: int) -> Dict[str, Any]:
+    """Owner object shared by the repos of `org`"""
+    user = "{}/users/{}".format(API_URL, org)
+    return {
+        "login": org, "id": org_id,
+        "node_id": _node_id("Organization", org_id),
+        "avatar_url": "https://avatars1.githubusercontent.com/u/{}?v=4"
+                      .format(org_id),
+        "gravatar_id": "", "url": user,
+        "html_url": "https://github.com/{}".format(org),
+        "followers_url": user + "/followers",
+        "following_url": user + "/following{/other_user}",
+        "gists_url": user + "/gists{/gist_id}",
+        "starred_url": user + "/starred{/owner}{/repo}",
+        "subscriptions_url": user + "/subscriptions",
+        "organizations_url": user + "/orgs",
+        "repos_url": user + "/repos",
+        "events_url": user + "/events{/privacy}",
+        "received_events_url": user + "/received_events",
+        "type": "Organization", "site_admin": False,
+    }
+
+
+def generate_repos(count: int, org: str = "google", seed: int = 0,
+                   licenses: Optional[Mapping[Optional[str], float]] = None
+                   ) -> Iterator[Dict[str, Any]]:
+    """Yield `count` repos of `org` with the schema of the fixtures.
+    The same `seed` always yields the same repos. Licenses are drawn
+    with the weights of `licenses`, a mapping of license keys, or None
+    for no license, to relative shares; DEFAULT_LICENSES by default.
+    The owner and license objects are shared between repos.
+    Example
+    -------
+    >>> repos = list(generate_repos(1000, licenses={"mit": 1, None: 1}))
+    >>> sum(repo["license"] is not None for repo in repos)
+    517
+    """
+    rng = random.Random(seed)
+    weights = DEFAULT_LICENSES if licenses is None else licenses
+    keys = list(weights)
+    cum_weights = []
+    total = 0.0
+    for key in keys:
+        total += weights[key]
+        cum_weights.append(total)
+    license_objects = {key: None if key is None else license_payload(key)
+                       for key in keys}
+    owner = _owner(org, 1000000 + rng.randrange(10 ** 6))
+    first_id = rng.randrange(10 ** 6, 10 ** 8)
+    for i in range(count):
+        repo_id = first_id + i
+        name = "{}-{}".format(rng.choice(WORDS), i)
+        full_name = "{}/{}".format(org, name)
+        url = "{}/repos/{}".format(API_URL, full_name)
+        html_url = "https://github.com/" + full_name
+        created = rng.random() * _SPAN
+        pushed = created + rng.random() * (_SPAN - created)
+        updated = pushed + rng.random() * (_SPAN - pushed)
+        stars = int(rng.paretovariate(1.1)) - 1
+        forks = int(stars * rng.random() / 2)
+        issues = rng.randrange(50)
+        language = rng.choice(LANGUAGES)
+        repo: Dict[str, Any] = {
+            "id": repo_id,
+            "node_id": _node_id("Repository", repo_id),
+            "name": name,
+            "full_name": full_name,
+            "private": False,
+            "owner": owner,
+            "html_url": html_url,
+            "description": "Synthetic {} repo {}".format(language, i),
+            "fork": rng.random() < 0.3,
+            "url": url,
+        }
+        for field, path in _REPO_PATHS:
+            repo[field] = url + path
+        repo.update({
+            "created_at": _timestamp(created),
+            "updated_at": _timestamp(updated),
+            "pushed_at": _timestamp(pushed),
+            "git_url": "git://github.com/{}.git".format(full_name),
+            "ssh_url": "git@github.com:{}.git".format(full_name),
+            "clone_url": html_url + ".git",
+            "svn_url": html_url,
+            "homepage": None,
+            "size": rng.randrange(1, 100000),
+            "stargazers_count": stars,
+            "watchers_count": stars,
+            "language": language,
+            "has_issues": True,
+            "has_projects": True,
+            "has_downloads": True,
+            "has_wiki": True,
+            "has_pages": rng.random() < 0.1,
+            "forks_count": forks,
+            "mirror_url": None,
+            "archived": rng.random() < 0.05,
+            "disabled": False,
+            "open_issues_count": issues,
+            "license": license_objects[
+                rng.choices(keys, cum_weights=cum_weights)[0]],
+            "forks": forks,
+            "open_issues": issues,
+            "watchers": stars,
+            "default_branch": "master",
+            "permissions": {"admin": False, "push": False, "pull": True},
+        })
+        yield repo
+
+
+def generate_payload(count: int, org: str = "google", seed: int = 0,
+                     licenses: Optional[Mapping[Optional[str], float]] = None
+                     ) -> Tuple[Dict, List[Dict], List[str], List[str]]:
+    """Org payload, repos, repo names and apache-2.0 repo names.
+    Shaped like the entries of fixtures.TEST_PAYLOAD, so tests can be
+    parametrized over generated payloads of any size.
+    """
+    repos = list(generate_repos(count, org, seed, licenses))
+    names = [repo["name"] for repo in repos]
+    apache2 = [repo["name"] for repo in repos
+               if repo["license"] and repo["license"]["key"] == "apache-2.0"]
+    return generate_org(org, count), repos, names, apache2
+
+
+def write_json(path: str, repos: Iterable[Dict]) -> int:
+    """Stream `repos` to `path` as one JSON array, return their count"""
+    count = 0
+    with open(path, "w") as file:
+        file.write("[")
+        for repo in repos:
+            file.write(("," if count else "") + json.dumps(repo))
+            count += 1
+        file.write("]")
+    return count
+
+
+def write_ndjson(path: str, repos: Iterable[Dict]) -> int:
+    """Stream `repos` to `path` as one JSON line each, return their count"""
+    count = 0
+    with open(path, "w") as file:
+        for repo in repos:
+            file.write(json.dumps(repo) + "\n")
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    count, path = int(sys.argv[1]), sys.argv[2]
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    ndjson = path.endswith((".ndjson", ".jsonl"))
+    write = write_ndjson if ndjson else write_json
+    print(write(path, generate_repos(count, seed=seed)), "repos written")
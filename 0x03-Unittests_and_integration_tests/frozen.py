@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Read-only views of parsed JSON payloads.
+"""
+import copy
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Sequence,
+)
+
+
+class FrozenDict(Mapping):
+    """Read-only view of a parsed JSON object.
+    Nested objects and arrays are wrapped on access, so a payload shared
+    between callers cannot be modified through its views; `thaw` gives a
+    private mutable copy.
+    """
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Dict) -> None:
+        """Init method of FrozenDict"""
+        self._data = data
+
+    def __getitem__(self, key: Any) -> Any:
+        """Frozen value under `key`"""
+        return freeze(self._data[key])
+
+    def __iter__(self) -> Iterator:
+        """Keys"""
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        """Number of keys"""
+        return len(self._data)
+
+    def __eq__(self, other: Any) -> bool:
+        """Equal to the same object, frozen or not"""
+        if isinstance(other, (FrozenDict, FrozenList)):
+            other = other._data
+        return self._data == other
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        """View shown as its object"""
+        return "FrozenDict({!r})".format(self._data)
+
+    def thaw(self) -> Dict:
+        """Mutable deep copy"""
+        return copy.deepcopy(self._data)
+
+
+class FrozenList(Sequence):
+    """Read-only view of a parsed JSON array, see FrozenDict"""
+    __slots__ = ("_data",)
+
+    def __init__(self, data: List) -> None:
+        """Init method of FrozenList"""
+        self._data = data
+
+    def __getitem__(self, index: Any) -> Any:
+        """Frozen element or slice at `index`"""
+        return freeze(self._data[index])
+
+    def __len__(self) -> int:
+        """Number of elements"""
+        return len(self._data)
+
+    __eq__ = FrozenDict.__eq__
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        """View shown as its array"""
+        return "FrozenList({!r})".format(self._data)
+
+    def thaw(self) -> List:
+        """Mutable deep copy"""
+        return copy.deepcopy(self._data)
+
+
+def freeze(value: Any) -> Any:
+    """Read-only view of a parsed JSON value"""
+    if type(value) is dict:
+        return FrozenDict(value)
+    if type(value) is list:
+        return FrozenList(value)
+    return value
+
+
+def jsonable(value: Any) -> Any:
+    """JSON encoder fallback for frozen views, other mappings and sequences
+    Frozen views give the value they wrap, mappings such as slim records
+    a dict and other sequences a list.
+    """
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value._data
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, Sequence) and not isinstance(value, (str, bytes)):
+        return list(value)
+    raise TypeError("{!r} is not JSON serializable".format(value))
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""A local emulator of the GitHub orgs API built from the fixtures.
+"""
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from fixtures import TEST_PAYLOAD
+from stub_server import StubHandler, StubServer
+
+_ROUTE = re.compile(r"^/orgs/([^/]+)(/repos)?$")
+_SORT_FIELDS = {"created": "created_at", "updated": "updated_at",
+                "pushed": "pushed_at", "full_name": "full_name"}
+
+
+def scaled_repos(count: int,
+                 repos: List[Dict] = TEST_PAYLOAD[0][1]) -> List[Dict]:
+    """`count` repos cycling through `repos`, with unique names and ids"""
+    return [dict(repos[i % len(repos)], id=i + 1,
+                 name="{}-{}".format(repos[i % len(repos)]["name"], i))
+            for i in range(count)]
+
+
+class GithubHandler(StubHandler):
+    """Answer GitHub API requests from the emulator's orgs"""
+
+    def do_GET(self) -> None:
+        """Answer a GET request"""
+        emulator = self.server.emulator
+        latency = self.server.latency
+        time.sleep(latency() if callable(latency) else latency)
+        if self.server.fail():
+            self.send_error(503)
+            return
+        found = emulator.resource(self.path)
+        if found is None:
+            self._send(404, b'{"message": "Not Found"}', {})
+            return
+        body, headers = found
+        if self.headers.get("If-None-Match") == headers["ETag"]:
+            headers.update(emulator.rate_headers(consume=False)[0])
+            self._send(304, None, headers)
+            return
+        rate, allowed = emulator.rate_headers(consume=True)
+        if not allowed:
+            self._send(403, b'{"message": "API rate limit exceeded"}', rate)
+            return
+        headers.update(rate)
+        self._send(200, body, headers)
+
+    def _send(self, status: int, body: Optional[bytes],
+              headers: Dict[str, str]) -> None:
+        """Write a response, with a JSON `body` unless it is None"""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if body is not None:
+            self.send_header("Content-Type",
+                             "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body is not None:
+            self.wfile.write(body)
+
+
+class GithubEmulator(StubServer):
+    """Serve `orgs`, a mapping of org names to repos, like the GitHub API.
+    ``/orgs/<org>`` answers the org with its repos_url pointing back at
+    the emulator, and ``/orgs/<org>/repos`` answers pages of `per_page`
+    repos, at most 100, selected with the ``page`` and ``per_page``
+    query parameters and linked through a ``Link`` header. ``sort`` and
+    ``direction`` order them by created, updated, pushed or full_name.
+    Every answer carries an ETag, and requests sending it back in
+    If-None-Match get a 304. Requests other than 304s count against
+    `rate_limit` per window of `reset_after` seconds; the X-RateLimit-*
+    headers report it, and requests past it are rejected with a 403.
+    `latency`, `error_rate` and `seed` are those of StubServer.
+    Example
+    -------
+    >>> with GithubEmulator({"google": scaled_repos(1000)}) as github:
+    ...     GithubOrgClient.ORG_URL = github.url("/orgs/{org}")
+    ...     len(GithubOrgClient("google").public_repos(stream=True))
+    1000
+    """
+    handler_class = GithubHandler
+
+    def __init__(self, orgs: Optional[Mapping[str, List[Dict]]] = None,
+                 per_page: int = 30, rate_limit: int = 5000,
+                 reset_after: float = 3600,
+                 latency: Union[float, Callable[[], float]] = 0,
+                 error_rate: float = 0, seed: int = 0,
+                 wall_clock: Callable[[], float] = time.time) -> None:
+        """Init method of GithubEmulator"""
+        super().__init__({}, latency=latency, error_rate=error_rate,
+                         seed=seed)
+        self._server.emulator = self
+        if orgs is None:
+            orgs = {"google": TEST_PAYLOAD[0][1]}
+        self.orgs = dict(orgs)
+        self.per_page = per_page
+        self.rate_limit = rate_limit
+        self.reset_after = reset_after
+        self._wall_clock = wall_clock
+        self._used = 0
+        self._reset_at = wall_clock() + reset_after
+        self._bodies: Dict[Tuple, Tuple[bytes, Dict[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def set_repos(self, org: str, repos: List[Dict]) -> None:
+        """Replace the repos of `org`, changing the ETags of its pages"""
+        with self._lock:
+            self.orgs[org] = repos
+            self._bodies = {key: value for key, value in self._bodies.items()
+                            if key[0] != org}
+
+    def resource(self, path: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        """Encoded body at `path` and its headers, or None if unknown"""
+        parts = urlsplit(path)
+        match = _ROUTE.match(parts.path)
+        if match is None or match.group(1) not in self.orgs:
+            return None
+        org = match.group(1)
+        repos = self.orgs[org]
+        query = dict(parse_qsl(parts.query))
+        if match.group(2) is None:
+            key: Tuple = (org,)
+        else:
+            per_page = min(_int(query.get("per_page"), self.per_page), 100)
+            sort = query.get("sort")
+            if sort not in _SORT_FIELDS:
+                sort = None
+            direction = query.get("direction")
+            if direction not in ("asc", "desc"):
+                direction = "asc" if sort in (None, "full_name") else "desc"
+            key = (org, max(_int(query.get("page"), 1), 1), per_page,
+                   sort, direction)
+        found = self._bodies.get(key)
+        if found is None:
+            found = self._render(key, repos)
+            with self._lock:
+                if self.orgs.get(org) is repos:
+                    self._bodies[key] = found
+        return found[0], dict(found[1])
+
+    def _render(self, key: Tuple,
+                repos: List[Dict]) -> Tuple[bytes, Dict[str, str]]:
+        """Encode the org or repos page `key` and its headers"""
+        org = key[0]
+        repos_path = "/orgs/{}/repos".format(org)
+        headers = {}
+        if len(key) == 1:
+            payload: Any = {"login": org, "public_repos": len(repos),
+                            "repos_url": self.url(repos_path)}
+        else:
+            page, per_page, sort, direction = key[1:]
+            if sort is not None:
+                field = _SORT_FIELDS[sort]
+                repos = sorted(repos, key=lambda repo: repo[field],
+                               reverse=direction == "desc")
+            elif direction == "desc":
+                repos = repos[::-1]
+            payload = repos[(page - 1) * per_page:page * per_page]
+            last = max(1, math.ceil(len(repos) / per_page))
+            params = {"per_page": per_page}
+            if sort is not None:
+                params.update(sort=sort, direction=direction)
+            links = [("first", 1), ("prev", page - 1),
+                     ("next", page + 1), ("last", last)]
+            link = ", ".join(
+                '<{}?{}>; rel="{}"'.format(
+                    self.url(repos_path),
+                    urlencode(dict(params, page=n)), rel)
+                for rel, n in links if 1 <= n <= last and n != page)
+            if link:
+                headers["Link"] = link
+        body = json.dumps(payload).encode()
+        headers["ETag"] = '"{}"'.format(hashlib.sha1(body).hexdigest())
+        return body, headers
+
+    def rate_headers(self, consume: bool) -> Tuple[Dict[str, str], bool]:
+        """X-RateLimit-* headers, and whether a request is allowed.
+        With `consume`, an allowed request is counted against the limit.
+        """
+        with self._lock:
+            now = self._wall_clock()
+            if now >= self._reset_at:
+                self._used = 0
+                self._reset_at = now + self.reset_after
+            allowed = self._used < self.rate_limit
+            if consume and allowed:
+                self._used += 1
+            used, reset_at = self._used, self._reset_at
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(self.rate_limit - used),
+            "X-RateLimit-Used": str(used),
+            "X-RateLimit-Reset": str(math.ceil(reset_at)),
+        }, allowed
+
+
+def _int(value: Optional[str], default: int) -> int:
+    """`value` as an int, or `default` if missing or malformed"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
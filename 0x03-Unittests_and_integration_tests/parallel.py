@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Filtering and key path extraction sharded across processes.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from utils import access_nested_map_many
+
+Predicate = Optional[Callable[[Any], bool]]
+
+# Fewest records worth a worker: below twice this, work stays serial.
+MIN_SHARD_SIZE = 25000
+
+# Records and predicate of the current call, inherited by forked workers.
+_inherited: Tuple[Sequence, Predicate] = ((), None)
+
+
+def shard_bounds(count: int, shards: int) -> List[Tuple[int, int]]:
+    """`shards` contiguous (start, stop) ranges covering `count` items"""
+    size, extra = divmod(count, shards)
+    bounds = []
+    start = 0
+    for shard in range(shards):
+        stop = start + size + (shard < extra)
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+
+def _extract(records: Iterable[Mapping], paths: List[Tuple],
+             predicate: Predicate,
+             defaults: Optional[Mapping]) -> Dict[Tuple, List]:
+    """Columns of `paths` for the records `predicate` keeps"""
+    if predicate is not None:
+        records = filter(predicate, records)
+    return access_nested_map_many(records, paths, defaults=defaults)
+
+
+def _adopt(records: Sequence, predicate: Predicate) -> None:
+    """Keep the records of a forked worker's call"""
+    global _inherited
+    _inherited = (records, predicate)
+
+
+def _extract_range(start: int, stop: int, paths: List[Tuple],
+                   defaults: Optional[Mapping]) -> Dict[Tuple, List]:
+    """Columns of one shard of the inherited records"""
+    records, predicate = _inherited
+    return _extract(records[start:stop], paths, predicate, defaults)
+
+
+def filter_columns(records: Sequence[Mapping],
+                   paths: Iterable[Sequence],
+                   predicate: Predicate = None,
+                   defaults: Optional[Mapping] = None,
+                   workers: Optional[int] = None,
+                   min_shard: Optional[int] = None) -> Dict[Tuple, List]:
+    """access_nested_map_many over the records `predicate` keeps.
+    With `workers`, records are split into contiguous shards of at
+    least `min_shard` records, MIN_SHARD_SIZE by default, processed by
+    a pool of that many processes and merged back in order; smaller
+    inputs, or fewer than two shards, are processed serially. Where
+    processes can fork, workers inherit `records` and only shard bounds
+    and columns cross process boundaries; elsewhere each shard is sent
+    pickled, and so must `predicate` be.
+    Example
+    -------
+    >>> columns = filter_columns(repos, [("name",), ("license", "key")],
+    ...                          workers=4, predicate=is_public)
+    >>> len(columns[("name",)])
+    400000
+    """
+    paths = [tuple(path) for path in paths]
+    if min_shard is None:
+        min_shard = MIN_SHARD_SIZE
+    shards = 0
+    if workers is not None and isinstance(records, Sequence):
+        shards = min(workers, len(records) // max(min_shard, 1))
+    if shards < 2:
+        return _extract(records, paths, predicate, defaults)
+    bounds = shard_bounds(len(records), shards)
+    if "fork" in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(
+                shards, mp_context=multiprocessing.get_context("fork"),
+                initializer=_adopt, initargs=(records, predicate)) as pool:
+            parts = list(pool.map(_extract_range, *zip(*bounds),
+                                  repeat(paths), repeat(defaults)))
+    else:
+        with ProcessPoolExecutor(shards) as pool:
+            slices = [records[start:stop] for start, stop in bounds]
+            parts = list(pool.map(_extract, slices, repeat(paths),
+                                  repeat(predicate), repeat(defaults)))
+    columns = parts[0]
+    for part in parts[1:]:
+        for path, values in part.items():
+            columns[path].extend(values)
+    return columns
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""Columnar in-memory store of the repos of an org.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from itertools import accumulate, compress, islice, repeat
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from parallel import filter_columns
+from utils import memoize
+
+_INVERT = bytes.maketrans(b"\x00\x01", b"\x01\x00")
+
+SNAPSHOT_MAGIC = b"GHREPO"
+SNAPSHOT_VERSION = 1
+# Magic, version, row count and metadata length, then the metadata JSON.
+_HEADER = struct.Struct("<6sHQI")
+# Column name, kind, offset and length of each section of the directory.
+_ENTRY = struct.Struct("<16sBQQ")
+_STRINGS, _TABLE, _U8, _U32, _I64 = range(5)
+_NULL = 0xFFFFFFFF
+
+
+class Mask(bytes):
+    """Rows selected in a RepoStore, as one 0 or 1 byte per row.
+    Masks combine with ``&``, ``|`` and ``~`` a whole column at a time,
+    through big-integer and translate operations running in C.
+    """
+
+    def _combine(self, other: "Mask", op: Any) -> "Mask":
+        """Bytewise `op` of two masks of the same length"""
+        if len(self) != len(other):
+            raise ValueError("masks of different stores")
+        result = op(int.from_bytes(self, "little"),
+                    int.from_bytes(other, "little"))
+        return Mask(result.to_bytes(len(self), "little"))
+
+    def __and__(self, other: "Mask") -> "Mask":
+        """Rows selected by both masks"""
+        return self._combine(other, int.__and__)
+
+    def __or__(self, other: "Mask") -> "Mask":
+        """Rows selected by either mask"""
+        return self._combine(other, int.__or__)
+
+    def __invert__(self) -> "Mask":
+        """Rows not selected"""
+        return Mask(self.translate(_INVERT))
+
+
+class RepoStore:
+    """Repos held column by column instead of as one dict each.
+    Names are kept in a list and stars, forks and size in int64 arrays.
+    License keys and languages are dictionary-encoded: each column holds
+    codes into a table of its distinct values, one byte per repo while
+    there are at most 256 of them. Repos without a license have the
+    license None; the archived flags form a Mask of their own.
+    Filters return masks over every row at once and combine like sets.
+    Range filters and top-k sorts on a numeric column use its ranking,
+    the positions sorted by value, built the first time it is needed.
+    With `workers`, payloads large enough are extracted by that many
+    processes, as by parallel.filter_columns.
+    Example
+    -------
+    >>> store = RepoStore(client.repos_payload)
+    >>> mask = (store.equals("license", "apache-2.0")
+    ...         & store.equals("language", "Python")
+    ...         & store.between("stars", 10))
+    >>> store.top("stars", 10, mask)
+    ['firmata.py']
+    """
+    CATEGORICAL = {"license": ("license", "key"), "language": ("language",)}
+    NUMERIC = {"stars": ("stargazers_count",), "forks": ("forks_count",),
+               "size": ("size",)}
+
+    def __init__(self, repos: Iterable[Mapping],
+                 workers: Optional[int] = None) -> None:
+        """Init method of RepoStore"""
+        columns = self._columns(repos, workers)
+        self.names: List[str] = columns[("name",)]
+        self._archived = bytearray(map(bool, columns[("archived",)]))
+        self.tables: Dict[str, List[Any]] = {}
+        self._codes: Dict[str, Union[bytearray, array]] = {}
+        self._lookup: Dict[str, Dict[Any, int]] = {}
+        for column, path in self.CATEGORICAL.items():
+            lookup: Dict[Any, int] = {}
+            codes = [lookup.setdefault(value, len(lookup))
+                     for value in columns[path]]
+            self._lookup[column] = lookup
+            self.tables[column] = list(lookup)
+            if len(lookup) <= 256:
+                self._codes[column] = bytearray(codes)
+            else:
+                self._codes[column] = array("I", codes)
+        self._numeric: Dict[str, array] = {
+            column: array("q", columns[path])
+            for column, path in self.NUMERIC.items()}
+        self._rankings: Dict[str, Tuple[array, array]] = {}
+
+    @classmethod
+    def _columns(cls, repos: Iterable[Mapping],
+                 workers: Optional[int] = None) -> Dict[Tuple, List]:
+        """Values of the stored fields of `repos`, keyed by path
+        Large payloads are extracted by `workers` processes if given.
+        """
+        paths = ([("name",), ("archived",)] + list(cls.CATEGORICAL.values())
+                 + list(cls.NUMERIC.values()))
+        return filter_columns(repos, paths, defaults={
+            path: 0 for path in cls.NUMERIC.values()}, workers=workers)
+
+    @property
+    def archived(self) -> Mask:
+        """Archived repos"""
+        return Mask(self._archived)
+
+    def set(self, position: int, repo: Mapping) -> None:
+        """Store `repo` at `position`, or append it at `len(self)`
+        Columns, code tables and the rankings already built are updated
+        in place, in time independent of the number of repos apart from
+        moving array items.
+        """
+        if not 0 <= position <= len(self):
+            raise IndexError("position out of range")
+        row = {path: values[0]
+               for path, values in self._columns([repo]).items()}
+        append = position == len(self)
+
+        def put(column: Any, value: Any) -> None:
+            if append:
+                column.append(value)
+            else:
+                column[position] = value
+
+        put(self.names, row[("name",)])
+        put(self._archived, bool(row[("archived",)]))
+        for column, path in self.CATEGORICAL.items():
+            lookup = self._lookup[column]
+            code = lookup.setdefault(row[path], len(lookup))
+            if code == len(self.tables[column]):
+                self.tables[column].append(row[path])
+            codes = self._codes[column]
+            if code > 255 and isinstance(codes, bytearray):
+                codes = self._codes[column] = array("I", codes)
+            put(codes, code)
+        for column, path in self.NUMERIC.items():
+            values = self._numeric[column]
+            ranking = self._rankings.get(column)
+            if ranking is not None and not append:
+                index = self._rank_of(ranking, values[position], position)
+                del ranking[0][index], ranking[1][index]
+            put(values, row[path])
+            if ranking is not None:
+                index = self._rank_of(ranking, row[path], position)
+                ranking[0].insert(index, position)
+                ranking[1].insert(index, -row[path])
+
+    @staticmethod
+    def _rank_of(ranking: Tuple[array, array], value: int,
+                 position: int) -> int:
+        """Index of `position` with `value` in a ranking"""
+        order, negated = ranking
+        low = bisect_left(negated, -value)
+        high = bisect_right(negated, -value, low)
+        return bisect_left(order, position, low, high)
+
+    def __len__(self) -> int:
+        """Number of repos"""
+        return len(self.names)
+
+    def column(self, column: str) -> List[Any]:
+        """Decoded values of `column`, one per repo"""
+        if column == "name":
+            return list(self.names)
+        if column == "archived":
+            return [bool(flag) for flag in self._archived]
+        if column in self._numeric:
+            return self._numeric[column].tolist()
+        table = self.tables[column]
+        return [table[code] for code in self._codes[column]]
+
+    def equals(self, column: str, value: Any) -> Mask:
+        """Repos whose `column` is `value`, or any of a collection of them"""
+        if column == "archived":
+            return self.archived if value else ~self.archived
+        if value is None or isinstance(value, str):
+            value = (value,)
+        lookup = self._lookup[column]
+        wanted = {lookup[item] for item in value if item in lookup}
+        codes = self._codes[column]
+        if isinstance(codes, (bytes, bytearray)):
+            table = bytearray(256)
+            for code in wanted:
+                table[code] = 1
+            return Mask(codes.translate(table))
+        return Mask(bytes(map(wanted.__contains__, codes)))
+
+    def _ranking(self, column: str) -> Tuple[array, array]:
+        """Positions by decreasing `column`, and their negated values"""
+        ranking = self._rankings.get(column)
+        if ranking is None:
+            values = self._numeric[column]
+            order = array("q", sorted(range(len(values)),
+                                      key=values.__getitem__, reverse=True))
+            negated = array("q", [-values[position] for position in order])
+            ranking = self._rankings[column] = (order, negated)
+        return ranking
+
+    def between(self, column: str, low: Optional[int] = None,
+                high: Optional[int] = None) -> Mask:
+        """Repos whose numeric `column` lies within `low`..`high`"""
+        order, negated = self._ranking(column)
+        start = 0 if high is None else bisect_left(negated, -high)
+        end = len(order) if low is None else bisect_right(negated, -low)
+        if end - start <= len(order) // 2:
+            mask = bytearray(len(order))
+            inside = [order[start:end]]
+            flag = 1
+        else:
+            mask = bytearray(b"\x01" * len(order))
+            inside = [order[:start], order[end:]]
+            flag = 0
+        for positions in inside:
+            deque(map(mask.__setitem__, positions, repeat(flag)), maxlen=0)
+        return Mask(mask)
+
+    def positions(self, mask: Optional[Mask] = None) -> Iterator[int]:
+        """Positions of the repos selected by `mask`, in order"""
+        if mask is None:
+            return iter(range(len(self)))
+        return compress(range(len(self)), mask)
+
+    def select(self, mask: Optional[Mask] = None) -> List[str]:
+        """Names of the repos selected by `mask`, in order"""
+        if mask is None:
+            return list(self.names)
+        return list(compress(self.names, mask))
+
+    def top(self, column: str, k: Optional[int] = None,
+            mask: Optional[Mask] = None) -> List[str]:
+        """Names of the `k` selected repos with the largest `column`.
+        Ties keep the order of the listing; without `k`, every selected
+        repo is returned, sorted. Few selected repos are sorted directly;
+        otherwise the ranking is walked until `k` selected ones are found.
+        """
+        order: Iterable[int] = self._ranking(column)[0]
+        if mask is not None:
+            selected = mask.count(1)
+            if k is None or k * len(mask) > selected * selected:
+                order = sorted(self.positions(mask),
+                               key=self._numeric[column].__getitem__,
+                               reverse=True)
+            else:
+                order = compress(order, map(mask.__getitem__, order))
+        names = self.names
+        return [names[position] for position in islice(order, k)]
+
+    def save(self, path: str, meta: Optional[Mapping] = None) -> None:
+        """Write the store to `path` as a binary snapshot.
+        The file starts with a header, the JSON `meta` and a directory
+        of sections, each 8-byte aligned: names as offsets into a UTF-8
+        blob, code tables as length-prefixed strings, and codes, flags
+        and numeric columns as fixed-width little-endian arrays. It is
+        written to a temporary file renamed over `path`.
+        """
+        sections = [("name", _STRINGS, _encode_strings(self.names)),
+                    ("archived", _U8, bytes(self._archived))]
+        for column in self.CATEGORICAL:
+            codes = self._codes[column]
+            wide = memoryview(codes).itemsize > 1
+            sections.append((column, _U32 if wide else _U8,
+                             _little_endian(codes, "I") if wide
+                             else bytes(codes)))
+            sections.append((column + ".table", _TABLE,
+                             _encode_table(self.tables[column])))
+        for column in self.NUMERIC:
+            sections.append((column, _I64,
+                             _little_endian(self._numeric[column], "q")))
+        meta_bytes = json.dumps(dict(meta or {})).encode()
+        offset = _align(_HEADER.size + len(meta_bytes) + 2
+                        + _ENTRY.size * len(sections))
+        directory = []
+        for name, kind, data in sections:
+            directory.append(_ENTRY.pack(name.encode(), kind, offset,
+                                         len(data)))
+            offset = _align(offset + len(data))
+        directory_name = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory_name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                                        len(self), len(meta_bytes)))
+                file.write(meta_bytes)
+                file.write(struct.pack("<H", len(sections)))
+                file.write(b"".join(directory))
+                for _, _, data in sections:
+                    file.write(bytes(_align(file.tell()) - file.tell()))
+                    file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def _align(offset: int) -> int:
+    """`offset` rounded up to a multiple of 8"""
+    return (offset + 7) & ~7
+
+
+def _little_endian(values: Any, typecode: str) -> bytes:
+    """Bytes of the `typecode` items of `values`, little-endian"""
+    data = memoryview(values).cast("B").tobytes()
+    if sys.byteorder == "big":
+        swapped = array(typecode, data)
+        swapped.byteswap()
+        data = swapped.tobytes()
+    return data
+
+
+def _from_little_endian(view: memoryview, typecode: str) -> Sequence[int]:
+    """`typecode` items of a little-endian section, without a copy"""
+    if sys.byteorder == "little":
+        return view.cast(typecode)
+    values = array(typecode, view.tobytes())
+    values.byteswap()
+    return values
+
+
+def _encode_strings(strings: Iterable[str]) -> bytes:
+    """Offsets of each string into their UTF-8 blob, then the blob"""
+    encoded = [string.encode() for string in strings]
+    offsets = array("Q", [0])
+    offsets.extend(accumulate(map(len, encoded)))
+    return _little_endian(offsets, "Q") + b"".join(encoded)
+
+
+def _encode_table(values: Iterable[Optional[str]]) -> bytes:
+    """Count, then each value as a length and its UTF-8 bytes"""
+    values = list(values)
+    parts = [struct.pack("<I", len(values))]
+    for value in values:
+        if value is None:
+            parts.append(struct.pack("<I", _NULL))
+        else:
+            encoded = value.encode()
+            parts.append(struct.pack("<I", len(encoded)) + encoded)
+    return b"".join(parts)
+
+
+def _decode_table(view: memoryview) -> List[Optional[str]]:
+    """Values of a table section"""
+    (count,), position = struct.unpack_from("<I", view), 4
+    values: List[Optional[str]] = []
+    for _ in range(count):
+        (length,) = struct.unpack_from("<I", view, position)
+        position += 4
+        if length == _NULL:
+            values.append(None)
+        else:
+            values.append(str(view[position:position + length], "utf-8"))
+            position += length
+    return values
+
+
+class _Strings(Sequence):
+    """Strings of a string section, decoded as they are indexed"""
+
+    def __init__(self, view: memoryview, count: int) -> None:
+        """Init method of _Strings"""
+        self._offsets = _from_little_endian(view[:(count + 1) * 8], "Q")
+        self._blob = view[(count + 1) * 8:]
+
+    def __len__(self) -> int:
+        """Number of strings"""
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: Any) -> Any:
+        """String at `index`, or list of strings of a slice"""
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        offsets = self._offsets
+        return str(self._blob[offsets[index]:offsets[index + 1]], "utf-8")
+
+
+class _LazyColumns(dict):
+    """Columns of a snapshot, each read the first time it is looked up"""
+
+    def __init__(self, names: Iterable[str],
+                 load: Callable[[str], Any]) -> None:
+        """Init method of _LazyColumns"""
+        super().__init__()
+        self._names = set(names)
+        self._load = load
+
+    def __missing__(self, column: str) -> Any:
+        """Read `column` from the snapshot"""
+        if column not in self._names:
+            raise KeyError(column)
+        value = self[column] = self._load(column)
+        return value
+
+    def __contains__(self, column: Any) -> bool:
+        """Whether the snapshot holds `column`"""
+        return column in self._names
+
+
+class SnapshotStore(RepoStore):
+    """Read-only RepoStore memory-mapped from a file written by `save`.
+    Opening reads only the header and the small code tables. A column
+    is read the first time a query needs it: numeric columns and code
+    offsets are used in place in the map, and names are decoded one by
+    one as results are built, so a license query never touches stars,
+    languages or the names it does not return. `meta` holds the
+    metadata saved with the store.
+    The map stays open until `close`, which the store does on leaving a
+    `with` block; queries fail once it is closed.
+    Example
+    -------
+    >>> store.save("google.snapshot", {"org": "google"})
+    >>> with SnapshotStore("google.snapshot") as snapshot:
+    ...     snapshot.select(snapshot.equals("license", "apache-2.0"))
+    ['dagger', 'kratu', 'traceur-compiler', 'firmata.py']
+    """
+
+    def __init__(self, path: str) -> None:
+        """Init method of SnapshotStore"""
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = self._view = memoryview(self._map)
+        magic, version, rows, meta_length = _HEADER.unpack_from(view)
+        error = None
+        if magic != SNAPSHOT_MAGIC:
+            error = "{} is not a repo snapshot".format(path)
+        elif version != SNAPSHOT_VERSION:
+            error = "unsupported snapshot version {}".format(version)
+        if error is not None:
+            self.close()
+            raise ValueError(error)
+        position = _HEADER.size
+        self.meta = json.loads(str(view[position:position + meta_length],
+                                   "utf-8"))
+        position += meta_length
+        (count,) = struct.unpack_from("<H", view, position)
+        position += 2
+        self._sections: Dict[str, Tuple[int, int, int]] = {}
+        for _ in range(count):
+            name, kind, offset, length = _ENTRY.unpack_from(view, position)
+            position += _ENTRY.size
+            self._sections[name.rstrip(b"\0").decode()] = (
+                kind, offset, length)
+        self.names = _Strings(self._section("name"), rows)
+        self.tables = {column: _decode_table(self._section(column + ".table"))
+                       for column in self.CATEGORICAL}
+        self._lookup = {column: {value: code
+                                 for code, value in enumerate(table)}
+                        for column, table in self.tables.items()}
+        self._codes = _LazyColumns(self.CATEGORICAL, self._load)
+        self._numeric = _LazyColumns(self.NUMERIC, self._load)
+        self._rankings = {}
+
+    def _section(self, name: str) -> memoryview:
+        """View of the section `name` in the map"""
+        _, offset, length = self._sections[name]
+        return self._view[offset:offset + length]
+
+    def _load(self, column: str) -> Sequence[int]:
+        """Codes or values of `column`"""
+        kind = self._sections[column][0]
+        view = self._section(column)
+        if kind == _U8:
+            return bytes(view)
+        return _from_little_endian(view, "I" if kind == _U32 else "q")
+
+    @memoize
+    def _archived(self) -> bytes:
+        """Archived flags"""
+        return bytes(self._section("archived"))
+
+    def select(self, mask: Optional[Mask] = None) -> List[str]:
+        """Names of the repos selected by `mask`, in order"""
+        names = self.names
+        return [names[position] for position in self.positions(mask)]
+
+    def set(self, position: int, repo: Mapping) -> None:
+        """Snapshots are read-only"""
+        raise TypeError("snapshot stores are read-only")
+
+    def close(self) -> None:
+        """Release the views into the map, then the map and its file"""
+        if self._map.closed:
+            return
+        views = list(vars(self).get("_numeric", {}).values())
+        names = vars(self).get("names")
+        if names is not None:
+            views += [names._offsets, names._blob]
+        for view in views:
+            if isinstance(view, memoryview):
+                view.release()
+        self._view.release()
+        self._map.close()
+
+    def __enter__(self) -> "SnapshotStore":
+        """The store itself"""
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Close the store"""
+        self.close()
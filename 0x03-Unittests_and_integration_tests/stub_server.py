@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""A local stub HTTP server serving canned JSON payloads.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Union,
+)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serve the JSON payload registered for the request path"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        """Answer a GET request"""
+        routes = self.server.routes
+        latency = self.server.latency
+        time.sleep(latency() if callable(latency) else latency)
+        if self.server.fail():
+            self.send_error(503)
+            return
+        if self.path not in routes:
+            self.send_error(404)
+            return
+        body = json.dumps(routes[self.path]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Keep benchmarks quiet"""
+
+
+class StubServer:
+    """Serve `routes` on a free localhost port in a background thread.
+    Every answer is delayed by `latency` seconds, or by what calling it
+    returns, and a share `error_rate` of requests fails with a 503.
+    Example
+    -------
+    >>> with StubServer({"/orgs/google": {"login": "google"}}) as server:
+    ...     get_json(server.url("/orgs/google"))
+    {'login': 'google'}
+    """
+    handler_class = StubHandler
+
+    def __init__(self, routes: Dict[str, Any],
+                 latency: Union[float, Callable[[], float]] = 0,
+                 error_rate: float = 0, seed: int = 0) -> None:
+        """Init method of StubServer"""
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                           self.handler_class)
+        self._server.daemon_threads = True
+        self._server.routes = routes
+        self._server.latency = latency
+        errors = random.Random(seed)
+        lock = threading.Lock()
+
+        def fail() -> bool:
+            with lock:
+                return errors.random() < error_rate
+
+        self._server.fail = fail
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        args=(0.05,), daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        """Root URL of the server"""
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def url(self, path: str) -> str:
+        """Absolute URL of `path`"""
+        return self.base_url + path
+
+    def __enter__(self) -> "StubServer":
+        """Start serving"""
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Stop serving"""
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Unit tests for cache.py module.
+"""
+import os
+import tempfile
+import unittest
+from parameterized import parameterized
+from unittest.mock import Mock, patch
+from cache import (
+    CacheEntry,
+    DiskBackend,
+    MemoryBackend,
+    SizedLRUCache,
+    ValidatorCache,
+    approx_size,
+)
+
+
+class TestMemoryBackend(unittest.TestCase):
+    """
+    Unit tests for MemoryBackend class.
+    """
+
+    def test_lru_eviction(self) -> None:
+        """
+        Tests that the least recently used entry is evicted.
+        """
+        backend = MemoryBackend(max_entries=2)
+        backend.set("a", 1)
+        backend.set("b", 2)
+        backend.get("a")
+        backend.set("c", 3)
+        self.assertIsNone(backend.get("b"))
+        self.assertEqual(backend.get("a"), 1)
+        self.assertEqual(len(backend), 2)
+
+
+class TestSizedLRUCache(unittest.TestCase):
+    """
+    Unit tests for SizedLRUCache class.
+    """
+
+    def test_bounded_by_bytes(self) -> None:
+        """
+        Tests that entries are evicted to stay under max_bytes.
+        """
+        value = ["x" * 100]
+        cache = SizedLRUCache(max_bytes=approx_size(value) * 2)
+        cache.set("a", value)
+        cache.set("b", value)
+        cache.get("a")
+        cache.set("c", value)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), value)
+        stats = cache.stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["resident_bytes"], approx_size(value) * 2)
+        self.assertEqual(stats["hit_rate"], 2 / 3)
+
+    def test_oversized_not_stored(self) -> None:
+        """
+        Tests that a value bigger than the whole cache is skipped.
+        """
+        cache = SizedLRUCache(max_bytes=10)
+        cache.set("a", "x" * 100)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.resident_bytes, 0)
+
+    def test_ttl(self) -> None:
+        """
+        Tests that entries expire after ttl seconds.
+        """
+        cache = SizedLRUCache(max_bytes=1 << 20, ttl=10)
+        with patch('cache.time.monotonic', return_value=100):
+            cache.set("a", 1)
+        with patch('cache.time.monotonic', return_value=110):
+            self.assertIsNone(cache.get("a"))
+
+
+class TestDiskBackend(unittest.TestCase):
+    """
+    Unit tests for DiskBackend class.
+    """
+
+    def test_round_trip(self) -> None:
+        """
+        Tests that values survive a new backend on the same directory.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            DiskBackend(directory).set("url", ["etag", None, {"a": 1}])
+            backend = DiskBackend(directory)
+            self.assertEqual(backend.get("url"), ["etag", None, {"a": 1}])
+            backend.delete("url")
+            self.assertIsNone(backend.get("url"))
+            self.assertEqual(len(backend), 0)
+
+    @patch('cache.time.time', return_value=1000.5)
+    def test_lru_eviction(self, _) -> None:
+        """
+        Tests that least recently read files go once over max_bytes.
+        Time is frozen so every header, and so every file, has one size.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            backend = DiskBackend(directory)
+            backend.set("a", "x" * 100)
+            size = backend.resident_bytes
+            backend = DiskBackend(directory, max_bytes=size * 2)
+            backend.set("b", "x" * 100)
+            backend.get("a")
+            backend.set("c", "x" * 100)
+            self.assertIsNone(backend.get("b"))
+            self.assertEqual(backend.get("a"), "x" * 100)
+            self.assertEqual(len(os.listdir(directory)), 2)
+            self.assertEqual(backend.resident_bytes, sum(
+                os.path.getsize(os.path.join(directory, name))
+                for name in os.listdir(directory)))
+
+    def test_max_age(self) -> None:
+        """
+        Tests that entries older than max_age are ignored.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            backend = DiskBackend(directory, max_age=60)
+            with patch('cache.time.time', return_value=1000):
+                backend.set("a", 1)
+            with patch('cache.time.time', return_value=1059):
+                self.assertEqual(backend.load("a"), (1000, 1))
+            with patch('cache.time.time', return_value=1060):
+                self.assertIsNone(backend.get("a"))
+
+    def test_corrupt_file_ignored(self) -> None:
+        """
+        Tests that an unreadable entry reads as a miss.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            backend = DiskBackend(directory)
+            backend.set("a", 1)
+            with open(backend._path("a"), "w") as file:
+                file.write('{"key": "a", "stor')
+            self.assertIsNone(backend.get("a"))
+
+
+class TestValidatorCache(unittest.TestCase):
+    """
+    Unit tests for ValidatorCache class.
+    """
+
+    @parameterized.expand([
+        ({"ETag": '"v1"'}, {"If-None-Match": '"v1"'}),
+        ({"Last-Modified": "Mon"}, {"If-Modified-Since": "Mon"}),
+    ])
+    def test_conditional_round_trip(self, validators, expected) -> None:
+        """
+        Tests that validators are replayed and a 304 serves the cache.
+        """
+        cache = ValidatorCache()
+        fresh = Mock(status_code=200, headers=validators,
+                     json=lambda: {"a": 1})
+        entry, headers = cache.lookup("url")
+        self.assertEqual(cache.resolve("url", entry, fresh), {"a": 1})
+        entry, headers = cache.lookup("url")
+        self.assertEqual(headers, expected)
+        not_modified = Mock(status_code=304, headers={})
+        self.assertEqual(cache.resolve("url", entry, not_modified), {"a": 1})
+        not_modified.json.assert_not_called()
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1})
+
+    def test_cached_body_read_only(self) -> None:
+        """
+        Tests that callers cannot alter the body later hits are served.
+        """
+        cache = ValidatorCache()
+        fresh = Mock(status_code=200, headers={"ETag": '"v1"'},
+                     json=lambda: {"repos": [1]})
+        first = cache.resolve("url", None, fresh)
+        entry, _ = cache.lookup("url")
+        hit = cache.resolve("url", entry, Mock(status_code=304, headers={}))
+        for payload in (first, hit):
+            with self.assertRaises(TypeError):
+                payload["repos"] = []
+            with self.assertRaises(AttributeError):
+                payload["repos"].append(2)
+        self.assertEqual(cache.lookup("url")[0].payload, {"repos": [1]})
+
+    def test_no_validators_not_stored(self) -> None:
+        """
+        Tests that responses without validators are not cached.
+        """
+        cache = ValidatorCache()
+        response = Mock(status_code=200, headers={}, json=lambda: [])
+        cache.resolve("url", None, response)
+        self.assertEqual(cache.lookup("url"), (None, {}))
+
+    def test_entry_from_stored_list(self) -> None:
+        """
+        Tests that entries read back as lists rebuild a CacheEntry.
+        """
+        backend = MemoryBackend()
+        backend.set("url", ["e", "m", [1]])
+        entry, _ = ValidatorCache(backend).lookup("url")
+        self.assertEqual(entry, CacheEntry("e", "m", [1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
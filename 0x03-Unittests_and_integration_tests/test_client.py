@@ -2,21 +2,32 @@
 """
 Tests for client.py module
 """
+import asyncio
+import io
+import json
+import tempfile
+import time
 import unittest
 from parameterized import parameterized, parameterized_class
-from unittest.mock import patch, PropertyMock, Mock
-from client import GithubOrgClient
+from unittest.mock import patch, AsyncMock, PropertyMock, Mock, call
+from cache import DiskBackend, SizedLRUCache
+from client import AsyncGithubOrgClient, GithubOrgClient
+from utils import SingleFlight
 from fixtures import TEST_PAYLOAD
+from fixture_generator import generate_payload, generate_repos
+from github_emulator import GithubEmulator
+from store import RepoStore
 
+WATERMARK_URL = ("https://api.github.com/orgs/google/repos"
+                 "?sort=updated&direction=desc&per_page=1")
 
-@parameterized_class([
-    {
-        "org_payload": TEST_PAYLOAD[0][0],
-        "repos_payload": TEST_PAYLOAD[0][1],
-        "expected_repos": TEST_PAYLOAD[0][2],
-        "apache2_repos": TEST_PAYLOAD[0][3],
-    },
-])
+
+@parameterized_class(
+    ("org_payload", "repos_payload", "expected_repos", "apache2_repos"),
+    TEST_PAYLOAD + [
+        generate_payload(300, seed=1),
+        generate_payload(2000, seed=2, licenses={"apache-2.0": 9, None: 1}),
+    ])
 class TestIntegrationGithubOrgClient(unittest.TestCase):
     """
     Defines integration tests for GithubOrgClient class.
@@ -25,9 +36,10 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         """
-        Set up class method to mock requests.get.
+        Set up class method to mock pooled HTTP GETs.
         """
-        cls.get_patcher = patch('requests.get', side_effect=cls.get_payload)
+        cls.get_patcher = patch('utils.SessionPool.get',
+                                side_effect=cls.get_payload)
         cls.mock_get = cls.get_patcher.start()
 
     @classmethod
@@ -38,14 +50,20 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
         cls.get_patcher.stop()
 
     @classmethod
-    def get_payload(cls, url):
+    def get_payload(cls, url, **kwargs):
         """
         Mock payloads for different URLs.
         """
         if url == "https://api.github.com/orgs/google":
             return Mock(status_code=200, json=lambda: cls.org_payload)
         if url == "https://api.github.com/orgs/google/repos":
-            return Mock(status_code=200, json=lambda: cls.repos_payload)
+            body = json.dumps(cls.repos_payload).encode()
+            return Mock(status_code=200, json=lambda: cls.repos_payload,
+                        links={}, iter_content=lambda size: [body])
+        if url == WATERMARK_URL:
+            newest = max(cls.repos_payload,
+                         key=lambda repo: repo["updated_at"])
+            return Mock(status_code=200, json=lambda: [newest])
         return Mock(status_code=404)
 
     def test_public_repos(self):
@@ -55,6 +73,144 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
         client = GithubOrgClient("google")
         self.assertEqual(client.public_repos(), self.expected_repos)
 
+    def test_async_public_repos(self):
+        """
+        Test AsyncGithubOrgClient public_repos against the same payloads.
+        """
+        async def public_repos():
+            client = AsyncGithubOrgClient("google", asyncio.Semaphore(2))
+            return (await client.public_repos(),
+                    await client.public_repos(license="apache-2.0"))
+
+        self.assertEqual(asyncio.run(public_repos()),
+                         (self.expected_repos, self.apache2_repos))
+
+    def test_public_repos_many_licenses(self):
+        """
+        Test public_repos method with a collection of licenses.
+        """
+        client = GithubOrgClient("google")
+        licenses = {"apache-2.0", "bsl-1.0"}
+        expected = [repo["name"] for repo in self.repos_payload
+                    if repo.get("license")
+                    and repo["license"]["key"] in licenses]
+        self.assertEqual(client.public_repos(license=licenses), expected)
+        self.assertEqual(
+            client.public_repos(license=licenses, stream=True), expected)
+
+    def test_public_repos_projected(self):
+        """
+        Test public_repos method on repos projected at ingest.
+        """
+        client = GithubOrgClient("google", fields=["owner.login"])
+        self.assertEqual(client.public_repos(), self.expected_repos)
+        self.assertEqual(client.public_repos(license="apache-2.0"),
+                         self.apache2_repos)
+        self.assertEqual(
+            client.public_repos(license="apache-2.0", stream=True),
+            self.apache2_repos)
+        repo = client.repos_payload[0]
+        self.assertEqual(set(repo) - {"updated_at"},
+                         {"name", "license", "owner"})
+        self.assertEqual(repo["owner"], {"login": "google"})
+
+    def test_projected_disk_cache(self):
+        """
+        Test projected repos round-trip through the disk cache.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            backend = DiskBackend(directory)
+            GithubOrgClient("google", cache=backend,
+                            fields=["id"]).repos_payload
+            calls = self.mock_get.call_count
+            client = GithubOrgClient("google", cache=backend, fields=["id"])
+            self.assertEqual(client.public_repos(license="apache-2.0"),
+                             self.apache2_repos)
+            self.assertEqual(self.mock_get.call_count, calls)
+            self.assertEqual(client.repos_payload[0]["id"],
+                             self.repos_payload[0]["id"])
+
+    def test_snapshot(self):
+        """
+        Test public_repos on a client loaded from a snapshot.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = directory + "/google.snapshot"
+            GithubOrgClient("google").save_snapshot(path)
+            calls = self.mock_get.call_count
+            with GithubOrgClient.load_snapshot(path) as client:
+                snapshot = client.repo_store
+                self.assertEqual(client.public_repos(), self.expected_repos)
+                self.assertEqual(client.public_repos(license="apache-2.0"),
+                                 self.apache2_repos)
+            self.assertEqual(self.mock_get.call_count, calls)
+            self.assertTrue(snapshot._map.closed)
+            self.assertNotIn("_snapshot", vars(client))
+
+    def test_export_repos(self):
+        """
+        Test export_repos streaming filtered, projected NDJSON.
+        """
+        file = io.BytesIO()
+        count = GithubOrgClient("google").export_repos(
+            file, license="apache-2.0", fields=["name"], buffer_size=512)
+        self.assertEqual(count, len(self.apache2_repos))
+        self.assertEqual(
+            [json.loads(line) for line in file.getvalue().splitlines()],
+            [{"name": name} for name in self.apache2_repos])
+
+    def test_async_export_repos(self):
+        """
+        Test AsyncGithubOrgClient export_repos into a StreamWriter.
+        """
+        writer = Mock(spec=["write", "drain"], drain=AsyncMock())
+        count = asyncio.run(AsyncGithubOrgClient("google").export_repos(
+            writer, license="apache-2.0", fields=["name"]))
+        data = b"".join(call.args[0] for call in writer.write.call_args_list)
+        self.assertEqual(count, len(self.apache2_repos))
+        self.assertEqual([json.loads(line)["name"]
+                          for line in data.splitlines()], self.apache2_repos)
+
+    def test_extract_repos_parallel(self):
+        """
+        Test extract_repos and repo_store with sharded workers.
+        """
+        client = GithubOrgClient("google")
+        expected = client.extract_repos(["name", "license.key"],
+                                        license="apache-2.0")
+        self.assertEqual(expected[("name",)], self.apache2_repos)
+        with patch.object(GithubOrgClient, 'workers', 2):
+            with patch('parallel.MIN_SHARD_SIZE', 4):
+                client = GithubOrgClient("google")
+                self.assertEqual(
+                    client.extract_repos(["name", "license.key"],
+                                         license="apache-2.0"),
+                    expected)
+                self.assertEqual(client.public_repos(), self.expected_repos)
+                self.assertEqual(client.public_repos(license="apache-2.0"),
+                                 self.apache2_repos)
+
+    def test_public_repos_single_flight(self):
+        """
+        Test public_repos method on payloads shared through a flight.
+        """
+        with patch.object(GithubOrgClient, 'flight', SingleFlight()):
+            client = GithubOrgClient("google")
+            self.assertEqual(client.public_repos(), self.expected_repos)
+            self.assertEqual(client.public_repos(license="apache-2.0"),
+                             self.apache2_repos)
+            self.assertEqual(GithubOrgClient.flight.stats()["calls"], 3)
+
+    def test_public_repos_stream(self):
+        """
+        Test public_repos method streaming the paginated listing.
+        """
+        client = GithubOrgClient("google")
+        self.assertEqual(
+            client.public_repos(license="apache-2.0", stream=True),
+            self.apache2_repos
+        )
+
     def test_public_repos_with_license(self):
         """
         Test public_repos method with license argument.
@@ -66,6 +222,88 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
         )
 
 
+class TestRefreshRepos(unittest.TestCase):
+    """
+    Defines tests for GithubOrgClient.refresh_repos against the emulator.
+    """
+
+    def setUp(self):
+        """
+        Start an emulator serving one page of generated repos.
+        """
+        self.repos = list(generate_repos(80, seed=9))
+        self.github = GithubEmulator({"google": self.repos}, per_page=100)
+        self.github.__enter__()
+        self.addCleanup(self.github.__exit__)
+        patcher = patch.object(GithubOrgClient, 'ORG_URL',
+                               self.github.url("/orgs/{org}"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def used(self):
+        """
+        Requests counted by the emulator so far.
+        """
+        return int(self.github.rate_headers(False)[0]["X-RateLimit-Used"])
+
+    def test_refresh_merges_deltas(self):
+        """
+        Test refresh_repos fetches and merges only the changed repos.
+        """
+        client = GithubOrgClient("google")
+        client.license_index, client.repo_store
+        self.assertEqual(client.refresh_repos(per_page=10), [])
+        repos = [dict(repo) for repo in self.repos]
+        changed = sorted(range(80), key=lambda i: repos[i]["updated_at"])[:3]
+        for i, position in enumerate(changed):
+            repos[position].update(updated_at="2030-01-0{}T00:00:00Z"
+                                   .format(i + 1),
+                                   license={"key": "mit"}, archived=True)
+        new = dict(repos[0], name="brand-new",
+                   updated_at="2030-02-01T00:00:00Z")
+        self.github.set_repos("google", repos + [new])
+        used = self.used()
+        names = client.refresh_repos(per_page=10)
+        self.assertEqual(self.used() - used, 1)
+        self.assertEqual(names, [repos[position]["name"]
+                                 for position in changed] + ["brand-new"])
+        self.assertEqual(client.repos_payload, repos + [new])
+        rebuilt = GithubOrgClient("google")
+        self.assertEqual(client.license_index, rebuilt.license_index)
+        for column in ("name", "license", "archived", "stars"):
+            self.assertEqual(client.repo_store.column(column),
+                             RepoStore(repos + [new]).column(column))
+        self.assertEqual(client.public_repos(license="mit"),
+                         rebuilt.public_repos(license="mit"))
+        self.assertEqual(client.search_repos(archived=True, sort="stars"),
+                         rebuilt.search_repos(archived=True, sort="stars"))
+        self.assertEqual(client.refresh_repos(per_page=10), [])
+
+    def test_refresh_projected_first_page(self):
+        """
+        Test refresh_repos on projected repos and a paginated listing.
+        """
+        repos = list(generate_repos(300, seed=4))
+        self.github.set_repos("google", repos)
+        self.github.per_page = 10
+        client = GithubOrgClient("google", fields=["id"])
+        first_page = list(client.repos_payload)
+        used = self.used()
+        self.assertEqual(client.refresh_repos(per_page=10), [])
+        self.assertEqual(self.used() - used, 1)
+        self.assertEqual(list(client.repos_payload), first_page)
+        repos = [dict(repo) for repo in repos]
+        repos[3].update(updated_at="2030-01-01T00:00:00Z")
+        repos[200].update(updated_at="2030-01-02T00:00:00Z")
+        self.github.set_repos("google", repos)
+        self.assertEqual(client.refresh_repos(per_page=10),
+                         [repos[3]["name"], repos[200]["name"]])
+        self.assertEqual(len(client.repos_payload), 11)
+        self.assertEqual(client.repos_payload[3]["updated_at"],
+                         "2030-01-01T00:00:00Z")
+        self.assertEqual(client.refresh_repos(per_page=10), [])
+
+
 class TestGithubOrgClient(unittest.TestCase):
     """
     Defines unit tests for GithubOrgClient class.
@@ -116,7 +354,170 @@ class TestGithubOrgClient(unittest.TestCase):
             client = GithubOrgClient("test_org")
             self.assertEqual(client.public_repos(), ["repo1", "repo2"])
             mock_public_repos_url.assert_called_once()
-        mock_get_json.assert_called_once_with("http://testurl.com/repos")
+        self.assertEqual(mock_get_json.call_args_list, [
+            call("http://testurl.com/repos"
+                 "?sort=updated&direction=desc&per_page=1"),
+            call("http://testurl.com/repos"),
+        ])
+
+    @patch('client.get_json')
+    def test_invalidate(self, mock_get_json):
+        """
+        Test invalidate refetches the named property only.
+        """
+        mock_get_json.return_value = {"repos_url": "http://testurl.com"}
+        client = GithubOrgClient("test_org")
+        client.org, client.repos_payload
+        client.invalidate("repos_payload")
+        client.org, client.repos_payload
+        self.assertEqual(mock_get_json.call_count, 5)
+        client.invalidate_all()
+        client.repos_payload
+        self.assertEqual(mock_get_json.call_count, 8)
+
+    @patch('client.get_json')
+    def test_license_index(self, mock_get_json):
+        """
+        Test license_index follows repos_payload invalidation.
+        """
+        mock_get_json.side_effect = [
+            {"repos_url": "http://testurl.com"},
+            [],
+            [{"name": "a", "license": {"key": "mit"}},
+             {"name": "b", "license": None},
+             {"name": "c", "license": {"key": "mit"}}],
+            [],
+            [{"name": "d", "license": {"key": "mit"}}],
+        ]
+        client = GithubOrgClient("test_org")
+        self.assertEqual(client.license_index, {"mit": [0, 2]})
+        self.assertEqual(client.public_repos(license="mit"), ["a", "c"])
+        self.assertEqual(client.public_repos(license="gpl"), [])
+        client.invalidate("repos_payload")
+        self.assertEqual(client.public_repos(license="mit"), ["d"])
+        self.assertEqual(client.public_repos(), ["d"])
+        self.assertNotIn("_repo_store", vars(client))
+
+    @patch('client.get_json')
+    def test_search_repos(self, mock_get_json):
+        """
+        Test search_repos filters and sorts on the repo store.
+        """
+        mock_get_json.side_effect = [
+            {"repos_url": "http://testurl.com"},
+            [],
+            [{"name": "a", "license": {"key": "mit"}, "language": "Python",
+              "stargazers_count": 5},
+             {"name": "b", "license": None, "language": "Python",
+              "stargazers_count": 50},
+             {"name": "c", "license": {"key": "mit"}, "language": "Python",
+              "stargazers_count": 500, "archived": True},
+             {"name": "d", "license": {"key": "mit"}, "language": "Go",
+              "stargazers_count": 300}],
+        ]
+        client = GithubOrgClient("test_org")
+        self.assertEqual(client.search_repos(license="mit", sort="stars"),
+                         ["c", "d", "a"])
+        self.assertEqual(client.search_repos(language="Python",
+                                             min_stars=10), ["b", "c"])
+        self.assertEqual(client.search_repos(archived=False, sort="stars",
+                                             limit=2), ["d", "b"])
+        self.assertIs(client.repo_store, client.repo_store)
+
+    @patch('client.get_json')
+    def test_ttl_per_property(self, mock_get_json):
+        """
+        Test ttl given per property name.
+        """
+        mock_get_json.return_value = {"repos_url": "http://testurl.com"}
+        client = GithubOrgClient("test_org", ttl={"repos_payload": 0})
+        client.repos_payload, client.repos_payload
+        self.assertEqual(mock_get_json.call_count, 5)
+        self.assertIs(vars(client)["org"], mock_get_json.return_value)
+        self.assertNotIn("repos_payload", vars(client))
+
+    @patch('client.get_json')
+    def test_shared_cache(self, mock_get_json):
+        """
+        Test clients of the same org share payloads through the cache.
+        """
+        mock_get_json.return_value = {"repos_url": "http://testurl.com"}
+        cache = SizedLRUCache(max_bytes=1 << 20)
+        with patch.object(GithubOrgClient, 'shared_cache', cache):
+            GithubOrgClient("test_org").repos_payload
+            client = GithubOrgClient("test_org")
+            client.repos_payload
+            self.assertEqual(mock_get_json.call_count, 3)
+            client.invalidate("repos_payload")
+            client.repos_payload
+            self.assertEqual(mock_get_json.call_count, 5)
+            GithubOrgClient("other_org").org
+        self.assertEqual(mock_get_json.call_count, 6)
+        self.assertEqual(cache.stats()["hits"], 3)
+
+    @patch('client.get_json')
+    def test_cached_payload_read_only(self, mock_get_json):
+        """
+        Test that clients sharing a cache cannot modify its payloads.
+        """
+        mock_get_json.side_effect = [{"repos_url": "http://testurl.com"},
+                                     [], [{"name": "a"}]]
+        cache = SizedLRUCache(max_bytes=1 << 20)
+        first = GithubOrgClient("test_org", cache=cache)
+        with self.assertRaises(AttributeError):
+            first.repos_payload.append({"name": "evil"})
+        with self.assertRaises(TypeError):
+            first.repos_payload[0]["name"] = "evil"
+        self.assertEqual(
+            GithubOrgClient("test_org", cache=cache).public_repos(), ["a"])
+        self.assertEqual(mock_get_json.call_count, 3)
+
+    @patch('client.get_json')
+    def test_ttl_refetches_through_cache(self, mock_get_json):
+        """
+        Test that expired values are refetched, not read back cached.
+        """
+        mock_get_json.side_effect = [{"v": 1}, {"v": 2}]
+        cache = SizedLRUCache(max_bytes=1 << 20)
+        client = GithubOrgClient("test_org", ttl=60, cache=cache)
+        with patch('utils.time.monotonic', return_value=1000):
+            self.assertEqual(client.org, {"v": 1})
+        with patch('utils.time.monotonic', return_value=1061):
+            self.assertEqual(client.org, {"v": 2})
+        self.assertEqual(mock_get_json.call_count, 2)
+        self.assertEqual(GithubOrgClient("test_org", cache=cache).org,
+                         {"v": 2})
+
+    @patch('client.get_json')
+    def test_public_repos_many(self, mock_get_json):
+        """
+        Test public_repos_many fans out, dedupes and reports errors.
+        """
+        payloads = {
+            "https://api.github.com/orgs/a": {"repos_url": "http://shared"},
+            "https://api.github.com/orgs/b": {"repos_url": "http://shared"},
+            "http://shared": [{"name": "x", "license": {"key": "mit"}},
+                              {"name": "y", "license": None}],
+            "http://shared?sort=updated&direction=desc&per_page=1": [],
+        }
+
+        def get_json(url):
+            if url not in payloads:
+                raise KeyError(url)
+            time.sleep(0.2 if url.startswith("http://shared") else 0.01)
+            return payloads[url]
+
+        mock_get_json.side_effect = get_json
+        results = {result.org: result
+                   for result in GithubOrgClient.public_repos_many(
+                       ["a", "b", "a", "missing"], license="mit")}
+        self.assertEqual(set(results), {"a", "b", "missing"})
+        self.assertEqual(results["a"].repos, ["x"])
+        self.assertEqual(results["b"].repos, ["x"])
+        self.assertIsInstance(results["missing"].error, KeyError)
+        self.assertIsNone(results["missing"].repos)
+        self.assertGreater(results["a"].elapsed, 0)
+        self.assertEqual(mock_get_json.call_count, 5)
 
     @parameterized.expand([
         ({"license": {"key": "my_license"}}, "my_license", True),
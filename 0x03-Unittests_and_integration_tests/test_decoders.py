@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Unit tests for decoders.py module.
+"""
+import json
+import unittest
+from parameterized import parameterized
+from unittest.mock import Mock, patch
+from decoders import (
+    DECODERS,
+    decode,
+    decode_response,
+    get_decoder,
+    set_decoder,
+)
+from fixtures import TEST_PAYLOAD
+from utils import get_json
+
+
+class TestDecoders(unittest.TestCase):
+    """
+    Unit tests for the JSON decoder backends.
+    """
+
+    def tearDown(self) -> None:
+        """
+        Restores the default decoder.
+        """
+        set_decoder(None)
+
+    @parameterized.expand([(name,) for name in DECODERS])
+    def test_backends_agree(self, name: str) -> None:
+        """
+        Tests that every installed backend parses like the stdlib.
+        """
+        body = json.dumps(TEST_PAYLOAD[0][1]).encode()
+        set_decoder(name)
+        self.assertIs(get_decoder(), DECODERS[name])
+        self.assertEqual(decode(body), TEST_PAYLOAD[0][1])
+        self.assertEqual(decode(memoryview(b"[" + body)[1:]),
+                         TEST_PAYLOAD[0][1])
+        with self.assertRaises(ValueError):
+            decode(b'[{"name": ')
+
+    def test_stdlib_fallback(self) -> None:
+        """
+        Tests that the stdlib decoder is always available, last.
+        """
+        self.assertEqual(list(DECODERS)[-1], "json")
+        set_decoder(None)
+        self.assertIs(get_decoder(), next(iter(DECODERS.values())))
+
+    def test_unknown_decoder(self) -> None:
+        """
+        Tests that selecting a backend that is not installed fails.
+        """
+        with self.assertRaises(ValueError):
+            set_decoder("yyjson")
+
+    def test_decode_response_bytes(self) -> None:
+        """
+        Tests that bodies are parsed from bytes, bypassing json().
+        """
+        response = Mock(content='{"login": "google"}'.encode())
+        self.assertEqual(decode_response(response), {"login": "google"})
+        response.json.assert_not_called()
+
+    def test_decode_response_fallback(self) -> None:
+        """
+        Tests that responses without raw bytes use their json().
+        """
+        response = Mock(json=lambda: {"login": "google"})
+        self.assertEqual(decode_response(response), {"login": "google"})
+
+    def test_get_json_custom_decoder(self) -> None:
+        """
+        Tests that get_json parses response bytes with the decoder set.
+        """
+        decoder = Mock(return_value={"payload": True})
+        set_decoder(decoder)
+        with patch('utils.SessionPool.get',
+                   return_value=Mock(content=b'{"payload": true}')):
+            self.assertEqual(get_json("http://a.io"), {"payload": True})
+        decoder.assert_called_once_with(b'{"payload": true}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Unit tests for export.py module.
+"""
+import asyncio
+import io
+import json
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from parameterized import parameterized
+from unittest.mock import AsyncMock, Mock
+from export import (
+    NDJSONWriter,
+    _json_line,
+    async_export_ndjson,
+    encode_line,
+    export_ndjson,
+    project,
+)
+from fixture_generator import generate_repos
+from fixtures import TEST_PAYLOAD
+from frozen import freeze
+
+REPOS = TEST_PAYLOAD[0][1]
+
+
+def read_lines(data: bytes) -> list:
+    """Records of an NDJSON document"""
+    return [json.loads(line) for line in data.splitlines()]
+
+
+class TestProject(unittest.TestCase):
+    """
+    Unit tests for project function.
+    """
+
+    def test_project(self) -> None:
+        """
+        Tests that records keep only their fields, nested as before.
+        """
+        projected = list(project(REPOS, ["name", "license.key"]))
+        self.assertEqual(json.loads(encode_line(projected[0])),
+                         {"name": REPOS[0]["name"],
+                          "license": {"key": "bsd-3-clause"}})
+        self.assertIs(next(project(REPOS, None)), REPOS[0])
+
+    @parameterized.expand([
+        ("default", encode_line),
+        ("json", _json_line),
+    ])
+    def test_encode_line(self, _, encode) -> None:
+        """
+        Tests that every encoder writes one compact line per record.
+        """
+        record = next(project(REPOS, ["name", "owner.login"]))
+        line = encode(record)
+        self.assertTrue(line.endswith(b"\n"))
+        self.assertEqual(line.count(b"\n"), 1)
+        self.assertEqual(json.loads(line), {"name": REPOS[0]["name"],
+                                            "owner": {"login": "google"}})
+
+
+class TestExportNdjson(unittest.TestCase):
+    """
+    Unit tests for NDJSONWriter and export_ndjson.
+    """
+
+    def test_bounded_buffer(self) -> None:
+        """
+        Tests that writes are batched and stay within one buffer.
+        """
+        sink = Mock(spec=["write"])
+        with NDJSONWriter(sink, buffer_size=16384) as writer:
+            for repo in REPOS:
+                writer.write(repo)
+        chunks = [call.args[0] for call in sink.write.call_args_list]
+        longest = max(len(encode_line(repo)) for repo in REPOS)
+        self.assertGreater(len(chunks), 1)
+        self.assertLess(len(chunks), len(REPOS))
+        for chunk in chunks:
+            self.assertLess(len(chunk), 16384 + longest)
+        self.assertEqual(read_lines(b"".join(chunks)), REPOS)
+        self.assertEqual(writer.records, len(REPOS))
+        self.assertEqual(writer.bytes_written, sum(map(len, chunks)))
+
+    def test_export_to_path(self) -> None:
+        """
+        Tests export to a path, consuming the records lazily.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "repos.ndjson")
+            count = export_ndjson(generate_repos(500), path,
+                                  fields=["id", "license.key"])
+            with open(path, "rb") as file:
+                records = read_lines(file.read())
+        self.assertEqual(count, 500)
+        self.assertEqual(records[:2], [
+            {"id": repo["id"], "license": {"key": repo["license"]["key"]}}
+            if repo["license"] else {"id": repo["id"]}
+            for repo in generate_repos(2)])
+
+    def test_export_to_socket(self) -> None:
+        """
+        Tests export through a connected socket.
+        """
+        sender, receiver = socket.socketpair()
+        received = []
+
+        def read() -> None:
+            """Read until the sender closes"""
+            with receiver:
+                for chunk in iter(lambda: receiver.recv(1 << 16), b""):
+                    received.append(chunk)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        with sender:
+            count = export_ndjson(REPOS * 50, sender, buffer_size=16384)
+        reader.join()
+        self.assertEqual(count, len(REPOS) * 50)
+        self.assertEqual(read_lines(b"".join(received)), REPOS * 50)
+
+    @parameterized.expand([
+        ("default", encode_line),
+        ("json", _json_line),
+    ])
+    def test_frozen(self, _, encode) -> None:
+        """
+        Tests that read-only views of shared payloads are encoded.
+        """
+        repo = {"name": "a", "topics": ["x"], "license": {"key": "mit"}}
+        self.assertEqual(json.loads(encode(freeze(repo))), repo)
+        file = io.BytesIO()
+        self.assertEqual(export_ndjson(freeze([repo]), file), 1)
+        self.assertEqual(read_lines(file.getvalue()), [repo])
+
+    def test_export_to_file(self) -> None:
+        """
+        Tests export to a binary file object, which is left open.
+        """
+        file = io.BytesIO()
+        self.assertEqual(export_ndjson(iter(REPOS), file, ["name"]),
+                         len(REPOS))
+        self.assertEqual(read_lines(file.getvalue()),
+                         [{"name": repo["name"]} for repo in REPOS])
+
+
+class TestAsyncExportNdjson(unittest.TestCase):
+    """
+    Unit tests for async_export_ndjson function.
+    """
+
+    def test_async_export(self) -> None:
+        """
+        Tests that every buffered write is drained.
+        """
+        async def repos():
+            for repo in REPOS:
+                yield repo
+
+        writer = Mock(spec=["write", "drain"], drain=AsyncMock())
+        count = asyncio.run(async_export_ndjson(
+            repos(), writer, ["name"], buffer_size=64))
+        chunks = [call.args[0] for call in writer.write.call_args_list]
+        self.assertEqual(count, len(REPOS))
+        self.assertEqual(read_lines(b"".join(chunks)),
+                         [{"name": repo["name"]} for repo in REPOS])
+        self.assertEqual(writer.drain.await_count, len(chunks))
+        self.assertGreater(len(chunks), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
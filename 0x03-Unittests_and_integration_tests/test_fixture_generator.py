@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Unit tests for fixture_generator.py module.
+"""
+import json
+import os
+import tempfile
+import unittest
+from collections import Counter
+from parameterized import parameterized
+from fixtures import TEST_PAYLOAD
+from fixture_generator import (
+    generate_org,
+    generate_payload,
+    generate_repos,
+    write_json,
+    write_ndjson,
+)
+
+
+class TestFixtureGenerator(unittest.TestCase):
+    """
+    Unit tests for the synthetic payload generator.
+    """
+
+    def test_deterministic(self) -> None:
+        """
+        Tests that a seed always yields the same repos.
+        """
+        self.assertEqual(list(generate_repos(50, seed=3)),
+                         list(generate_repos(50, seed=3)))
+        self.assertNotEqual(list(generate_repos(50, seed=3)),
+                            list(generate_repos(50, seed=4)))
+
+    def test_schema(self) -> None:
+        """
+        Tests that repos and their owners have the fixture fields.
+        """
+        fixture = TEST_PAYLOAD[0][1][0]
+        repos = list(generate_repos(100, org="abc"))
+        for repo in repos:
+            self.assertEqual(set(repo), set(fixture))
+            self.assertEqual(set(repo["owner"]), set(fixture["owner"]))
+            self.assertEqual(repo["owner"]["login"], "abc")
+        self.assertEqual(len({repo["name"] for repo in repos}), 100)
+        self.assertEqual(len({repo["id"] for repo in repos}), 100)
+
+    @parameterized.expand([
+        ({"mit": 3, None: 1},),
+        ({"apache-2.0": 1, "bsd-3-clause": 1, "gpl-3.0": 2},),
+    ])
+    def test_license_distribution(self, licenses) -> None:
+        """
+        Tests that licenses are drawn with the given shares.
+        """
+        counts = Counter(repo["license"] and repo["license"]["key"]
+                         for repo in generate_repos(20000,
+                                                    licenses=licenses))
+        total = sum(licenses.values())
+        self.assertEqual(set(counts), set(licenses))
+        for key, share in licenses.items():
+            self.assertAlmostEqual(counts[key] / 20000, share / total,
+                                   delta=0.02)
+
+    def test_payload(self) -> None:
+        """
+        Tests that generated payloads are shaped like TEST_PAYLOAD.
+        """
+        org, repos, names, apache2 = generate_payload(100, seed=5)
+        self.assertEqual(org, generate_org("google", 100))
+        self.assertEqual(org["repos_url"],
+                         "https://api.github.com/orgs/google/repos")
+        self.assertEqual(names, [repo["name"] for repo in repos])
+        self.assertTrue(0 < len(apache2) < len(names))
+
+    def test_write(self) -> None:
+        """
+        Tests that repos stream to disk as JSON and NDJSON.
+        """
+        repos = list(generate_repos(30))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "repos.json")
+            self.assertEqual(write_json(path, iter(repos)), 30)
+            with open(path) as file:
+                self.assertEqual(json.load(file), repos)
+            path = os.path.join(directory, "repos.ndjson")
+            self.assertEqual(write_ndjson(path, iter(repos)), 30)
+            with open(path) as file:
+                self.assertEqual([json.loads(line) for line in file], repos)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Unit tests for github_emulator.py module.
+"""
+import unittest
+from unittest.mock import patch
+import requests
+from client import GithubOrgClient
+from fixtures import TEST_PAYLOAD
+from github_emulator import GithubEmulator, scaled_repos
+
+
+class TestGithubEmulator(unittest.TestCase):
+    """
+    Unit tests for GithubEmulator class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Starts an emulator serving the fixture org and a scaled one.
+        """
+        self.github = GithubEmulator({
+            "google": TEST_PAYLOAD[0][1],
+            "big": scaled_repos(250),
+        }, rate_limit=20)
+        self.github.__enter__()
+        self.addCleanup(self.github.__exit__)
+
+    def test_scaled_repos(self) -> None:
+        """
+        Tests that scaled repos have unique names and fixture licenses.
+        """
+        repos = scaled_repos(20)
+        self.assertEqual(len({repo["name"] for repo in repos}), 20)
+        self.assertEqual(repos[9]["license"], TEST_PAYLOAD[0][1][0]["license"])
+
+    def test_pagination(self) -> None:
+        """
+        Tests that pages are linked and capped at 100 repos.
+        """
+        response = requests.get(
+            self.github.url("/orgs/big/repos?per_page=500&page=2"))
+        self.assertEqual(len(response.json()), 100)
+        self.assertEqual(response.links["next"]["url"], self.github.url(
+            "/orgs/big/repos?per_page=100&page=3"))
+        self.assertEqual(response.links["last"]["url"], self.github.url(
+            "/orgs/big/repos?per_page=100&page=3"))
+        self.assertNotIn("Link", requests.get(
+            self.github.url("/orgs/google/repos")).headers)
+
+    def test_etag(self) -> None:
+        """
+        Tests that revalidated pages get a 304 until they change.
+        """
+        url = self.github.url("/orgs/google/repos")
+        etag = requests.get(url).headers["ETag"]
+        response = requests.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["X-RateLimit-Used"], "1")
+        self.github.set_repos("google", TEST_PAYLOAD[0][1][:2])
+        response = requests.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_rate_limit(self) -> None:
+        """
+        Tests that requests past the rate limit are rejected.
+        """
+        url = self.github.url("/orgs/google")
+        for used in range(1, 21):
+            response = requests.get(url)
+            self.assertEqual(response.headers["X-RateLimit-Remaining"],
+                             str(20 - used))
+        response = requests.get(url)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.headers["X-RateLimit-Remaining"], "0")
+
+    def test_not_found(self) -> None:
+        """
+        Tests that unknown orgs answer a 404.
+        """
+        response = requests.get(self.github.url("/orgs/nobody"))
+        self.assertEqual(response.status_code, 404)
+
+    def test_client(self) -> None:
+        """
+        Tests GithubOrgClient against the emulator.
+        """
+        with patch.object(GithubOrgClient, 'ORG_URL',
+                          self.github.url("/orgs/{org}")):
+            self.assertEqual(len(GithubOrgClient("big").public_repos()), 30)
+            names = GithubOrgClient("big").public_repos(stream=True)
+            google = GithubOrgClient("google").public_repos("apache-2.0")
+        self.assertEqual(names, [repo["name"] for repo in scaled_repos(250)])
+        self.assertEqual(google, [repo["name"]
+                                  for repo in TEST_PAYLOAD[0][1]
+                                  if repo["license"] and
+                                  repo["license"]["key"] == "apache-2.0"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Unit tests for parallel.py module.
+"""
+import unittest
+from functools import partial
+from parameterized import parameterized
+from unittest.mock import patch
+from client import GithubOrgClient
+from fixture_generator import generate_repos
+from parallel import filter_columns, shard_bounds
+from utils import access_nested_map_many
+
+REPOS = list(generate_repos(600, seed=3))
+PATHS = [("name",), ("license", "key"), ("stargazers_count",)]
+APACHE2 = partial(GithubOrgClient._matches, license="apache-2.0")
+
+
+def serial(predicate=None):
+    """Columns of PATHS for the REPOS `predicate` keeps, without shards"""
+    repos = REPOS if predicate is None else list(filter(predicate, REPOS))
+    return access_nested_map_many(repos, PATHS)
+
+
+class TestShardBounds(unittest.TestCase):
+    """
+    Unit tests for shard_bounds function.
+    """
+
+    @parameterized.expand([
+        (10, 3, [(0, 4), (4, 7), (7, 10)]),
+        (4, 4, [(0, 1), (1, 2), (2, 3), (3, 4)]),
+        (5, 1, [(0, 5)]),
+    ])
+    def test_shard_bounds(self, count, shards, expected) -> None:
+        """
+        Tests that shards are contiguous and differ by at most one.
+        """
+        self.assertEqual(shard_bounds(count, shards), expected)
+
+
+class TestFilterColumns(unittest.TestCase):
+    """
+    Unit tests for filter_columns function.
+    """
+
+    @parameterized.expand([
+        ("no workers", None, 100),
+        ("below threshold", 4, 400),
+        ("one worker", 1, 100),
+    ])
+    def test_serial(self, _, workers, min_shard) -> None:
+        """
+        Tests that small inputs never start a process pool.
+        """
+        with patch("parallel.ProcessPoolExecutor") as pool:
+            columns = filter_columns(REPOS, PATHS, APACHE2,
+                                     workers=workers, min_shard=min_shard)
+        pool.assert_not_called()
+        self.assertEqual(columns, serial(APACHE2))
+
+    @parameterized.expand([
+        ("all", None),
+        ("apache-2.0", APACHE2),
+    ])
+    def test_forked(self, _, predicate) -> None:
+        """
+        Tests that shards from forked workers are merged in order.
+        """
+        columns = filter_columns(REPOS, PATHS, predicate, workers=3,
+                                 min_shard=100)
+        self.assertEqual(columns, serial(predicate))
+
+    def test_pickled_slices(self) -> None:
+        """
+        Tests the pickled slices used where processes cannot fork.
+        """
+        with patch("multiprocessing.get_all_start_methods",
+                   return_value=["spawn"]):
+            columns = filter_columns(REPOS, PATHS, APACHE2, workers=2,
+                                     min_shard=100)
+        self.assertEqual(columns, serial(APACHE2))
+
+    def test_iterable(self) -> None:
+        """
+        Tests that inputs which cannot be sliced are processed serially.
+        """
+        with patch("parallel.ProcessPoolExecutor") as pool:
+            columns = filter_columns(iter(REPOS), PATHS, workers=4,
+                                     min_shard=1)
+        pool.assert_not_called()
+        self.assertEqual(columns, serial())
+
+
+if __name__ == '__main__':
+    unittest.main()
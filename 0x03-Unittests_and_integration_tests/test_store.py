@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Unit tests for store.py module.
+"""
+import os
+import tempfile
+import unittest
+from parameterized import parameterized
+from fixtures import TEST_PAYLOAD
+from fixture_generator import generate_repos
+from store import Mask, RepoStore, SnapshotStore
+
+
+class TestMask(unittest.TestCase):
+    """
+    Unit tests for Mask class.
+    """
+
+    def test_operators(self) -> None:
+        """
+        Tests that masks combine bytewise.
+        """
+        a, b = Mask(b"\x01\x01\x00\x00"), Mask(b"\x01\x00\x01\x00")
+        self.assertEqual(a & b, b"\x01\x00\x00\x00")
+        self.assertEqual(a | b, b"\x01\x01\x01\x00")
+        self.assertEqual(~a, b"\x00\x00\x01\x01")
+        self.assertIsInstance(a & b, Mask)
+        with self.assertRaises(ValueError):
+            a & Mask(b"\x01")
+
+
+class TestRepoStore(unittest.TestCase):
+    """
+    Unit tests for RepoStore class.
+    """
+    repos = list(generate_repos(3000, seed=7, licenses={
+        "apache-2.0": 3, "mit": 2, None: 1}))
+
+    def setUp(self) -> None:
+        """
+        Builds a store over generated repos.
+        """
+        self.store = RepoStore(self.repos)
+
+    def scan(self, predicate) -> list:
+        """
+        Names of the repos matching `predicate`, scanning the dicts.
+        """
+        return [repo["name"] for repo in self.repos if predicate(repo)]
+
+    def test_columns(self) -> None:
+        """
+        Tests that every column decodes back to the repo values.
+        """
+        store = RepoStore(TEST_PAYLOAD[0][1])
+        self.assertEqual(len(store), 9)
+        self.assertEqual(store.column("name"), TEST_PAYLOAD[0][2])
+        self.assertEqual(store.column("license"), [
+            repo["license"] and repo["license"]["key"]
+            for repo in TEST_PAYLOAD[0][1]])
+        self.assertEqual(store.column("stars"), [
+            repo["stargazers_count"] for repo in TEST_PAYLOAD[0][1]])
+        self.assertEqual(store.column("archived"), [False] * 9)
+
+    @parameterized.expand([
+        ("apache-2.0",),
+        (None,),
+        ({"mit", "gpl-3.0"},),
+    ])
+    def test_equals(self, license) -> None:
+        """
+        Tests license filters against a scan.
+        """
+        keys = license if isinstance(license, set) else {license}
+        expected = self.scan(lambda repo: (repo["license"] and
+                                           repo["license"]["key"]) in keys)
+        self.assertEqual(
+            self.store.select(self.store.equals("license", license)),
+            expected)
+
+    def test_combined_top(self) -> None:
+        """
+        Tests combined filters sorted by stars against a scan.
+        """
+        store = self.store
+        mask = (store.equals("license", "apache-2.0")
+                & store.equals("language", "Python")
+                & store.between("stars", 3)
+                & ~store.equals("archived", True))
+        matches = [repo for repo in self.repos
+                   if repo["license"]
+                   and repo["license"]["key"] == "apache-2.0"
+                   and repo["language"] == "Python"
+                   and repo["stargazers_count"] >= 3
+                   and not repo["archived"]]
+        ranked = sorted(matches, key=lambda repo: repo["stargazers_count"],
+                        reverse=True)
+        expected = [repo["name"] for repo in ranked]
+        self.assertTrue(expected)
+        self.assertEqual(store.top("stars", None, mask), expected)
+        self.assertEqual(store.top("stars", 5, mask), expected[:5])
+        active = sorted((repo for repo in self.repos if not repo["archived"]),
+                        key=lambda repo: repo["forks_count"], reverse=True)
+        self.assertEqual(store.top("forks", 3, ~store.archived),
+                         [repo["name"] for repo in active[:3]])
+
+    def test_between(self) -> None:
+        """
+        Tests numeric ranges against a scan.
+        """
+        expected = self.scan(lambda repo: 100 <= repo["size"] <= 5000)
+        self.assertEqual(
+            self.store.select(self.store.between("size", 100, 5000)),
+            expected)
+
+    def test_wide_table(self) -> None:
+        """
+        Tests filters on a column with more than 256 distinct values.
+        """
+        repos = [{"name": str(i), "language": "lang{}".format(i % 300)}
+                 for i in range(900)]
+        store = RepoStore(repos)
+        self.assertEqual(store.select(store.equals("language", "lang299")),
+                         ["299", "599", "899"])
+        self.assertEqual(store.column("stars"), [0] * 900)
+
+
+class TestSnapshotStore(unittest.TestCase):
+    """
+    Unit tests for RepoStore.save and SnapshotStore class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creates a directory for snapshot files.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "repos.snapshot")
+
+    @parameterized.expand([
+        ("fixtures", TEST_PAYLOAD[0][1]),
+        ("generated", list(generate_repos(500, seed=2))),
+        ("wide table", [{"name": "r\u00e9po{}".format(i),
+                         "language": "lang{}".format(i % 300),
+                         "stargazers_count": -i}
+                        for i in range(600)]),
+    ])
+    def test_round_trip(self, _, repos) -> None:
+        """
+        Tests that every column and query survives a round trip.
+        """
+        store = RepoStore(repos)
+        store.save(self.path, {"org": "google"})
+        snapshot = SnapshotStore(self.path)
+        self.assertEqual(snapshot.meta, {"org": "google"})
+        self.assertEqual(len(snapshot), len(repos))
+        for column in ("name", "license", "language", "stars", "forks",
+                       "size", "archived"):
+            self.assertEqual(snapshot.column(column), store.column(column))
+        mask = store.equals("license", [None, "apache-2.0"])
+        self.assertEqual(
+            snapshot.top("stars", 5,
+                         snapshot.equals("license", [None, "apache-2.0"])),
+            store.top("stars", 5, mask))
+        self.assertEqual(snapshot.names[-1], repos[-1]["name"])
+
+    def test_lazy(self) -> None:
+        """
+        Tests that a license query reads no numeric column.
+        """
+        RepoStore(TEST_PAYLOAD[0][1]).save(self.path)
+        snapshot = SnapshotStore(self.path)
+        self.assertEqual(snapshot.select(snapshot.equals("license",
+                                                         "apache-2.0")),
+                         TEST_PAYLOAD[0][3])
+        self.assertEqual(len(snapshot._numeric), 0)
+        with self.assertRaises(TypeError):
+            snapshot.set(0, TEST_PAYLOAD[0][1][0])
+
+    def test_close(self) -> None:
+        """
+        Tests that closing releases the map once columns are read.
+        """
+        RepoStore(list(generate_repos(50, seed=3))).save(self.path)
+        with SnapshotStore(self.path) as snapshot:
+            snapshot.top("stars", 3, snapshot.equals("license", "mit"))
+            snapshot.select(snapshot.between("forks", 1))
+        self.assertTrue(snapshot._map.closed)
+        with self.assertRaises(ValueError):
+            snapshot.select()
+        snapshot.close()
+
+    def test_invalid(self) -> None:
+        """
+        Tests that other files and versions are rejected.
+        """
+        RepoStore(TEST_PAYLOAD[0][1]).save(self.path)
+        with open(self.path, "r+b") as file:
+            file.seek(6)
+            file.write(b"\x63\x00")
+        with self.assertRaises(ValueError):
+            SnapshotStore(self.path)
+        with open(self.path, "r+b") as file:
+            file.write(b"[{}]")
+        with self.assertRaises(ValueError):
+            SnapshotStore(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,11 +2,43 @@
 """
 Unit tests for utils.py module.
 """
+import asyncio
+import json
+import pickle
+import threading
+import time
 import unittest
+from types import MappingProxyType
+import requests
 from parameterized import parameterized
-from typing import Dict, Tuple, Union
-from unittest.mock import patch
-from utils import access_nested_map, get_json, memoize
+from typing import Dict, List, Tuple, Union
+from unittest.mock import Mock, patch
+from cache import ValidatorCache
+from fixtures import TEST_PAYLOAD
+from utils import (
+    AsyncSingleFlight,
+    FrozenDict,
+    HedgePolicy,
+    LatencyHistogram,
+    RateLimitScheduler,
+    RetryPolicy,
+    SessionPool,
+    SingleFlight,
+    access_nested_map,
+    access_nested_map_many,
+    get_json,
+    async_get_pages,
+    async_iter_pages,
+    async_memoize,
+    compile_path,
+    invalidate,
+    iter_items,
+    iter_json_array,
+    iter_pages,
+    memoize,
+    prime,
+    record_type,
+)
 
 
 class TestAccessNestedMap(unittest.TestCase):
@@ -43,6 +75,138 @@ class TestAccessNestedMap(unittest.TestCase):
             access_nested_map(nested_map, path)
 
 
+class TestCompilePath(unittest.TestCase):
+    """
+    Unit tests for compile_path function.
+    """
+
+    @parameterized.expand([
+        ({"a": 1}, ("a",), 1),
+        ({"a": {"b": 2}}, ("a",), {"b": 2}),
+        ({"a": {"b": 2}}, ("a", "b"), 2),
+        ({"a": {"b": {"c": 3}}}, ["a", "b", "c"], 3),
+        (MappingProxyType({"a": MappingProxyType({"b": 2})}), ("a", "b"), 2),
+    ])
+    def test_compile_path(self,
+                          nested_map: Dict,
+                          path: Tuple[str],
+                          expected: Union[int, Dict]) -> None:
+        """
+        Tests that compiled getters match access_nested_map.
+        """
+        self.assertEqual(compile_path(path)(nested_map), expected)
+        self.assertEqual(access_nested_map(nested_map, path), expected)
+
+    @parameterized.expand([
+        ({}, ("a",), "a"),
+        ({"a": 1}, ("a", "b"), "b"),
+        ({"a": {"b": None}}, ("a", "b", "c"), "c"),
+        (MappingProxyType({}), ("a", "b"), "a"),
+    ])
+    def test_compile_path_exception(self,
+                                    nested_map: Dict,
+                                    path: Tuple[str],
+                                    key: str) -> None:
+        """
+        Tests that compiled getters raise the same KeyError.
+        """
+        with self.assertRaises(KeyError) as compiled:
+            compile_path(path)(nested_map)
+        with self.assertRaises(KeyError) as reference:
+            access_nested_map(nested_map, path)
+        self.assertEqual(compiled.exception.args, (key,))
+        self.assertEqual(reference.exception.args, (key,))
+
+    def test_compile_path_cached(self) -> None:
+        """
+        Tests that equal paths share one compiled getter.
+        """
+        self.assertIs(compile_path(["a", "b"]), compile_path(("a", "b")))
+
+
+class TestAccessNestedMapMany(unittest.TestCase):
+    """
+    Unit tests for access_nested_map_many function.
+    """
+
+    def test_columns(self) -> None:
+        """
+        Tests that every path becomes one column in record order.
+        """
+        records = [
+            {"name": "a", "license": {"key": "mit"}, "stars": 3},
+            {"name": "b", "license": None},
+            {"name": "c", "license": {"key": "gpl"}, "stars": 1},
+        ]
+        paths = [("name",), ("license", "key"), ("stars",)]
+        self.assertEqual(
+            access_nested_map_many(records, paths, default="?",
+                                   defaults={("stars",): 0}),
+            {("name",): ["a", "b", "c"],
+             ("license", "key"): ["mit", "?", "gpl"],
+             ("stars",): [3, 0, 1]})
+
+    def test_no_records(self) -> None:
+        """
+        Tests that no records give empty columns.
+        """
+        self.assertEqual(access_nested_map_many([], [("a",)]), {("a",): []})
+
+    def test_list_paths(self) -> None:
+        """
+        Tests that list paths are keyed and defaulted as tuples.
+        """
+        records = [{"a": {"b": 1}}, {"a": {}}]
+        self.assertEqual(
+            access_nested_map_many(records, [["a", "b"]],
+                                   defaults={("a", "b"): 0}),
+            {("a", "b"): [1, 0]})
+
+
+class TestRecordType(unittest.TestCase):
+    """
+    Unit tests for record_type function.
+    """
+
+    def test_projection(self) -> None:
+        """
+        Tests that records keep only their paths and read like maps.
+        """
+        Repo = record_type(["name", "license.key", ("owner", "login")])
+        repo = Repo.from_map(TEST_PAYLOAD[0][1][0])
+        self.assertEqual(dict(repo), {
+            "name": "episodes.dart",
+            "license": {"key": "bsd-3-clause"},
+            "owner": {"login": "google"},
+        })
+        self.assertEqual(access_nested_map(repo, ("license", "key")),
+                         "bsd-3-clause")
+        self.assertEqual(compile_path(("owner", "login"))(repo), "google")
+        self.assertFalse(hasattr(repo, "__dict__"))
+        self.assertIs(record_type(("name", "license.key", "owner.login")),
+                      Repo)
+
+    def test_missing_paths(self) -> None:
+        """
+        Tests that missing paths raise KeyError like the source map.
+        """
+        repo = record_type(["name", "license.key"]).from_map(
+            {"name": "a", "license": None})
+        self.assertEqual(dict(repo), {"name": "a"})
+        with self.assertRaises(KeyError):
+            access_nested_map(repo, ("license", "key"))
+        with self.assertRaises(KeyError):
+            repo["owner"]
+
+    def test_pickle(self) -> None:
+        """
+        Tests that records survive pickling.
+        """
+        repo = record_type(["name", "license.key"]).from_map(
+            TEST_PAYLOAD[0][1][0])
+        self.assertEqual(pickle.loads(pickle.dumps(repo)), repo)
+
+
 class TestGetJson(unittest.TestCase):
     """
     Unit tests for get_json function.
@@ -59,11 +223,572 @@ class TestGetJson(unittest.TestCase):
         Tests that get_json returns the correct JSON payload from the URL.
         """
         config = {'return_value.json.return_value': test_payload}
-        with patch('requests.get',
-                   autospec=True,
-                   **config) as mock_request_get:
+        with patch('utils.SessionPool.get', **config) as mock_pool_get:
             self.assertEqual(get_json(test_url), test_payload)
-            mock_request_get.assert_called_once_with(test_url)
+            mock_pool_get.assert_called_once_with(test_url)
+
+    def test_get_json_conditional(self) -> None:
+        """
+        Tests that get_json revalidates cached URLs.
+        """
+        cache = ValidatorCache()
+        responses = [
+            Mock(status_code=200, headers={"ETag": '"v1"'},
+                 json=lambda: {"payload": True}),
+            Mock(status_code=304, headers={}),
+        ]
+        with patch('utils.SessionPool.get',
+                   side_effect=responses) as mock_pool_get:
+            self.assertEqual(get_json("http://a.io", cache=cache),
+                             {"payload": True})
+            self.assertEqual(get_json("http://a.io", cache=cache),
+                             {"payload": True})
+        mock_pool_get.assert_called_with(
+            "http://a.io", headers={"If-None-Match": '"v1"'})
+
+    def test_get_json_timeout(self) -> None:
+        """
+        Tests that `timeout` reaches the request and timeouts are retried.
+        """
+        responses = [requests.Timeout(),
+                     Mock(status_code=200, json=lambda: {"payload": True})]
+        retry = RetryPolicy(retries=1, sleep=lambda seconds: None)
+        with patch('utils.SessionPool.get',
+                   side_effect=responses) as mock_pool_get:
+            self.assertEqual(get_json("http://a.io", retry=retry, timeout=5),
+                             {"payload": True})
+        self.assertEqual(mock_pool_get.call_count, 2)
+        mock_pool_get.assert_called_with("http://a.io", timeout=5)
+
+
+class SimulatedClock:
+    """
+    Clock advancing only when slept on.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def time(self) -> float:
+        """
+        Current simulated time.
+        """
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Advance the simulated time.
+        """
+        self.now += seconds
+
+
+class SimulatedGithub:
+    """
+    Server allowing `limit` requests per fixed `window` of seconds.
+    """
+
+    def __init__(self, clock: SimulatedClock, limit: int,
+                 window: int) -> None:
+        self.clock = clock
+        self.limit = limit
+        self.window = window
+        self.current = None
+        self.used = 0
+        self.rejected = 0
+
+    def get(self, url: str, **kwargs) -> Mock:
+        """
+        Answer a request, rejecting it once the window is spent.
+        """
+        current = int(round(self.clock.now, 6) // self.window)
+        if current != self.current:
+            self.current, self.used = current, 0
+        headers = {"X-RateLimit-Reset": str((current + 1) * self.window)}
+        if self.used >= self.limit:
+            self.rejected += 1
+            headers["X-RateLimit-Remaining"] = "0"
+            return Mock(status_code=403, headers=headers)
+        self.used += 1
+        headers["X-RateLimit-Remaining"] = str(self.limit - self.used)
+        return Mock(status_code=200, headers=headers, json=lambda: {})
+
+
+class TestRateLimitScheduler(unittest.TestCase):
+    """
+    Simulated-clock tests for RateLimitScheduler class.
+    """
+
+    @parameterized.expand([
+        ("paced", 10 / 60, 1),
+        ("budget_only", 1000, 1000),
+    ])
+    def test_sustained_throughput(self, _, rate: float,
+                                  burst: float) -> None:
+        """
+        Tests that throughput stays at the limit without rejections.
+        """
+        clock = SimulatedClock()
+        github = SimulatedGithub(clock, limit=10, window=60)
+        scheduler = RateLimitScheduler(rate, burst, clock=clock.time,
+                                       wall_clock=clock.time,
+                                       sleep=clock.sleep)
+        with patch('utils.SessionPool.get', side_effect=github.get):
+            for _ in range(50):
+                get_json("http://a.io", scheduler=scheduler,
+                         priority=scheduler.BATCH)
+        self.assertEqual(github.rejected, 0)
+        self.assertGreater(clock.now, 4 * 60 - 60)
+        self.assertLessEqual(clock.now, 5 * 60)
+
+    def test_retry_after(self) -> None:
+        """
+        Tests that a Retry-After rejection is waited out and retried.
+        """
+        clock = SimulatedClock()
+        responses = [
+            Mock(status_code=429, headers={"Retry-After": "30"}),
+            Mock(status_code=200, headers={}, json=lambda: {"ok": 1}),
+        ]
+        scheduler = RateLimitScheduler(100, 100, clock=clock.time,
+                                       wall_clock=clock.time,
+                                       sleep=clock.sleep)
+        with patch('utils.SessionPool.get', side_effect=responses):
+            self.assertEqual(get_json("http://a.io", scheduler=scheduler),
+                             {"ok": 1})
+        self.assertEqual(clock.now, 30)
+
+    def test_interactive_first(self) -> None:
+        """
+        Tests that interactive requests overtake waiting batch ones.
+        """
+        scheduler = RateLimitScheduler(rate=1000, burst=1)
+        scheduler.update(Mock(status_code=200, headers={
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(time.time() + 0.2)}))
+        order = []
+
+        def request(name: str, priority: int) -> None:
+            scheduler.acquire(priority)
+            order.append(name)
+
+        threads = [threading.Thread(target=request, args=(
+            "batch{}".format(i), scheduler.BATCH)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        interactive = threading.Thread(
+            target=request, args=("interactive", scheduler.INTERACTIVE))
+        interactive.start()
+        for thread in threads + [interactive]:
+            thread.join()
+        self.assertEqual(order, ["interactive", "batch0", "batch1", "batch2"])
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """
+    Unit tests for RetryPolicy class.
+    """
+
+    def test_retries_transient_failures(self) -> None:
+        """
+        Tests that errors and 5xx answers are retried with backoff.
+        """
+        waits = []
+        responses = [
+            requests.ConnectionError(),
+            Mock(status_code=503),
+            Mock(status_code=200, json=lambda: {"ok": 1}),
+        ]
+        retry = RetryPolicy(retries=2, base=0.1, cap=0.25,
+                            sleep=waits.append)
+        with patch('utils.SessionPool.get', side_effect=responses):
+            self.assertEqual(get_json("http://a.io", retry=retry), {"ok": 1})
+        self.assertEqual(len(waits), 2)
+        for wait in waits:
+            self.assertTrue(0.1 <= wait <= 0.25)
+
+    def test_exhausted(self) -> None:
+        """
+        Tests that the last 5xx raises instead of parsing the error page.
+        """
+        response = Mock(status_code=502)
+        response.raise_for_status.side_effect = requests.HTTPError()
+        retry = RetryPolicy(retries=1, sleep=lambda seconds: None)
+        with patch('utils.SessionPool.get', return_value=response):
+            with self.assertRaises(requests.HTTPError):
+                get_json("http://a.io", retry=retry)
+        response.json.assert_not_called()
+
+
+class TestHedgePolicy(unittest.TestCase):
+    """
+    Unit tests for HedgePolicy and LatencyHistogram classes.
+    """
+
+    def test_histogram_quantile(self) -> None:
+        """
+        Tests that quantiles land in the right bucket.
+        """
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.quantile(0.5))
+        for _ in range(95):
+            histogram.record(0.010)
+        for _ in range(5):
+            histogram.record(1.0)
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.010, delta=0.002)
+        self.assertAlmostEqual(histogram.quantile(0.99), 1.0, delta=0.2)
+
+    def test_hedge_wins(self) -> None:
+        """
+        Tests that a hedge answers for a slow first request.
+        """
+        responses = iter([0.5, 0.0])
+
+        def get(url):
+            delay = next(responses)
+            time.sleep(delay)
+            return Mock(status_code=200, json=lambda: {"delay": delay})
+
+        hedge = HedgePolicy(default_delay=0.05)
+        start = time.perf_counter()
+        with patch('utils.SessionPool.get', side_effect=get):
+            self.assertEqual(get_json("http://a.io", hedge=hedge),
+                             {"delay": 0.0})
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertEqual(hedge.hedged, 1)
+
+    def test_hedge_paced_and_loser_closed(self) -> None:
+        """
+        Tests that hedges wait on the scheduler and losers are closed.
+        """
+        slow = Mock(status_code=200, headers={}, json=lambda: "slow")
+        fast = Mock(status_code=200, headers={}, json=lambda: "fast")
+        responses = iter([(0.3, slow), (0.0, fast)])
+
+        def get(url):
+            delay, response = next(responses)
+            time.sleep(delay)
+            return response
+
+        scheduler = RateLimitScheduler(rate=1000, burst=10)
+        hedge = HedgePolicy(default_delay=0.05)
+        with patch.object(scheduler, 'acquire',
+                          wraps=scheduler.acquire) as acquire:
+            with patch('utils.SessionPool.get', side_effect=get):
+                self.assertEqual(get_json("http://a.io", scheduler=scheduler,
+                                          hedge=hedge), "fast")
+        self.assertEqual(acquire.call_count, 2)
+        time.sleep(0.4)
+        slow.close.assert_called_once_with()
+        fast.close.assert_not_called()
+
+    def test_delay_adapts(self) -> None:
+        """
+        Tests that the hedge delay follows recorded latencies.
+        """
+        hedge = HedgePolicy(quantile=0.9, default_delay=1, min_samples=10)
+        self.assertEqual(hedge.delay("http://a.io"), 1)
+        for _ in range(10):
+            hedge.histogram("http://a.io").record(0.02)
+        self.assertAlmostEqual(hedge.delay("http://a.io"), 0.02, delta=0.004)
+
+
+class TestSingleFlight(unittest.TestCase):
+    """
+    Unit tests for SingleFlight and AsyncSingleFlight classes.
+    """
+
+    def test_coalesces_concurrent_calls(self) -> None:
+        """
+        Tests that concurrent calls share one request and one result.
+        """
+        flight = SingleFlight()
+        barrier = threading.Barrier(6)
+        results = []
+
+        def get(url):
+            time.sleep(0.05)
+            return Mock(status_code=200,
+                        json=lambda: {"repos": [{"name": "a"}]})
+
+        def call():
+            barrier.wait()
+            results.append(get_json("http://a.io", flight=flight))
+
+        with patch('utils.SessionPool.get', side_effect=get) as mock_get:
+            threads = [threading.Thread(target=call) for _ in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        mock_get.assert_called_once()
+        self.assertEqual(flight.stats(), {"calls": 1, "coalesced": 5})
+        self.assertEqual(results, [{"repos": [{"name": "a"}]}] * 6)
+        self.assertIsInstance(results[0], FrozenDict)
+
+    def test_views_are_read_only(self) -> None:
+        """
+        Tests that results cannot be modified, only thawed.
+        """
+        payload = SingleFlight().do("k", lambda: {"repos": [{"name": "a"}]})
+        with self.assertRaises(TypeError):
+            payload["repos"] = []
+        with self.assertRaises(TypeError):
+            payload["repos"][0]["name"] = "b"
+        copy = payload.thaw()
+        copy["repos"][0]["name"] = "b"
+        self.assertEqual(payload["repos"][0]["name"], "a")
+
+    def test_errors_shared_and_forgotten(self) -> None:
+        """
+        Tests that a failed call raises for its caller and is not kept.
+        """
+        flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.do("k", Mock(side_effect=ValueError))
+        self.assertEqual(flight.do("k", lambda: 1), 1)
+
+    def test_async(self) -> None:
+        """
+        Tests that concurrent awaiters share one coroutine.
+        """
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return [1, 2]
+
+        async def gather():
+            return await asyncio.gather(
+                *(flight.do("k", fetch) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(gather()), [[1, 2]] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats(), {"calls": 1, "coalesced": 4})
+
+
+class TestIterPages(unittest.TestCase):
+    """
+    Unit tests for iter_pages function.
+    """
+
+    @staticmethod
+    def pages(url: str) -> Mock:
+        """
+        Two-page listing linked through rel="next".
+        """
+        if url == "http://a.io/repos":
+            return Mock(json=lambda: [1, 2],
+                        links={"next": {"url": "http://a.io/repos?page=2"}})
+        return Mock(json=lambda: [3], links={})
+
+    @parameterized.expand([(True,), (False,)])
+    def test_iter_pages(self, prefetch: bool) -> None:
+        """
+        Tests that iter_pages follows the next links in order.
+        """
+        with patch('utils.SessionPool.get',
+                   side_effect=self.pages) as mock_pool_get:
+            pages = list(iter_pages("http://a.io/repos", prefetch=prefetch))
+        self.assertEqual(pages, [[1, 2], [3]])
+        self.assertEqual(mock_pool_get.call_count, 2)
+
+
+class TestIterJsonArray(unittest.TestCase):
+    """
+    Unit tests for iter_json_array function.
+    """
+
+    @parameterized.expand([
+        ([],),
+        ([1, 22, 333, -4.5e3, "é€", None, True, {"a": [1, {}]}, []],),
+        (TEST_PAYLOAD[0][1],),
+    ])
+    def test_byte_by_byte(self, array: List) -> None:
+        """
+        Tests that elements survive any chunk boundary.
+        """
+        body = json.dumps(array, ensure_ascii=False, indent=1).encode()
+        chunks = [body[i:i + 1] for i in range(len(body))]
+        self.assertEqual(list(iter_json_array(chunks)), array)
+        self.assertEqual(list(iter_json_array([body])), array)
+
+    @parameterized.expand([
+        ([b'[1, 2'],),
+        ([b'{"a": 1}'],),
+        ([b'[1 2]'],),
+    ])
+    def test_invalid(self, chunks: List[bytes]) -> None:
+        """
+        Tests that malformed or truncated arrays raise ValueError.
+        """
+        with self.assertRaises(ValueError):
+            list(iter_json_array(chunks))
+
+    def test_invalid_stops_reading(self) -> None:
+        """
+        Tests that a syntax error is raised without reading further.
+        """
+        def chunks():
+            yield b'[{"a": 1 "b": 2}, '
+            for _ in range(100000):
+                read.append(1)
+                yield b'{"a": 1}, '
+            yield b'1]'
+
+        read = []
+        with self.assertRaises(json.JSONDecodeError) as caught:
+            list(iter_json_array(chunks()))
+        self.assertEqual(caught.exception.msg, "Expecting ',' delimiter")
+        self.assertLess(len(read), 10)
+
+    def test_iter_items(self) -> None:
+        """
+        Tests that iter_items streams the elements of every page.
+        """
+        def pages(url, stream):
+            if url == "http://a.io/r":
+                return Mock(iter_content=lambda size: [b'[1, ', b'2]'],
+                            links={"next": {"url": "http://a.io/r2"}})
+            return Mock(iter_content=lambda size: [b'[3]'], links={})
+
+        with patch('utils.SessionPool.get', side_effect=pages):
+            self.assertEqual(list(iter_items("http://a.io/r")), [1, 2, 3])
+
+
+class TestAsyncGetPages(unittest.TestCase):
+    """
+    Unit tests for async_get_pages function.
+    """
+
+    @staticmethod
+    def pages(url: str) -> Mock:
+        """
+        Three-page listing advertising its last page.
+        """
+        page = int(url.rsplit("=", 1)[1]) if "page=" in url else 1
+        links = {}
+        if page == 1:
+            links = {"next": {"url": "http://a.io/r?page=2"},
+                     "last": {"url": "http://a.io/r?page=3"}}
+        return Mock(json=lambda: [page], links=links)
+
+    def test_async_get_pages(self) -> None:
+        """
+        Tests that remaining pages are requested directly, in order.
+        """
+        with patch('utils.SessionPool.get',
+                   side_effect=self.pages) as mock_pool_get:
+            pages = asyncio.run(async_get_pages("http://a.io/r"))
+        self.assertEqual(pages, [[1], [2], [3]])
+        self.assertEqual(
+            sorted(call.args[0] for call in mock_pool_get.call_args_list),
+            ["http://a.io/r", "http://a.io/r?page=2", "http://a.io/r?page=3"])
+
+
+class TestAsyncIterPages(unittest.TestCase):
+    """
+    Unit tests for async_iter_pages function.
+    """
+
+    def test_async_iter_pages(self) -> None:
+        """
+        Tests that pages are yielded in order, following next links.
+        """
+        responses = {
+            "http://a.io/r": Mock(json=lambda: [1, 2], links={
+                "next": {"url": "http://a.io/r?page=2"}}),
+            "http://a.io/r?page=2": Mock(json=lambda: [3], links={}),
+        }
+
+        async def collect():
+            return [page async for page in async_iter_pages("http://a.io/r")]
+
+        with patch('utils.SessionPool.get',
+                   side_effect=responses.__getitem__) as mock_pool_get:
+            self.assertEqual(asyncio.run(collect()), [[1, 2], [3]])
+        self.assertEqual(mock_pool_get.call_count, 2)
+
+    def test_async_iter_pages_closed(self) -> None:
+        """
+        Tests that closing the iterator early cancels the next fetch.
+        """
+        responses = {
+            "http://a.io/r": Mock(json=lambda: [1], links={
+                "next": {"url": "http://a.io/r?page=2"}}),
+            "http://a.io/r?page=2": Mock(json=lambda: [2], links={}),
+        }
+
+        async def first():
+            pages = async_iter_pages("http://a.io/r")
+            page = await pages.__anext__()
+            await pages.aclose()
+            return page
+
+        with patch('utils.SessionPool.get',
+                   side_effect=responses.__getitem__):
+            self.assertEqual(asyncio.run(first()), [1])
+
+
+class TestSessionPool(unittest.TestCase):
+    """
+    Unit tests for SessionPool class.
+    """
+
+    def test_adapter_shared_per_host(self) -> None:
+        """
+        Tests that requests to one host share one sized adapter.
+        """
+        pool = SessionPool(pool_size=2, host_pool_sizes={"a.io": 8})
+        _, first = pool._adapter("https://a.io/x")
+        _, second = pool._adapter("https://a.io/y")
+        _, other = pool._adapter("https://b.io/x")
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(first._pool_maxsize, 8)
+        self.assertEqual(other._pool_maxsize, 2)
+
+    def test_session_per_thread(self) -> None:
+        """
+        Tests that each thread gets its own session.
+        """
+        pool = SessionPool()
+        sessions = []
+        thread = threading.Thread(
+            target=lambda: sessions.append(pool.session()))
+        thread.start()
+        thread.join()
+        self.assertIs(pool.session(), pool.session())
+        self.assertIsNot(pool.session(), sessions[0])
+
+    def test_reap_idle(self) -> None:
+        """
+        Tests that idle hosts are reaped and recreated on demand.
+        """
+        pool = SessionPool(idle_timeout=10)
+        _, adapter = pool._adapter("https://a.io/x")
+        now = time.monotonic()
+        self.assertEqual(pool.reap_idle(now), 0)
+        self.assertEqual(pool.reap_idle(now + 10), 1)
+        _, fresh = pool._adapter("https://a.io/x")
+        self.assertIsNot(adapter, fresh)
+
+    def test_reaper_thread(self) -> None:
+        """
+        Tests that idle hosts are reaped without further requests.
+        """
+        pool = SessionPool(idle_timeout=0.05)
+        pool._adapter("https://a.io/x")
+        time.sleep(0.3)
+        self.assertEqual(pool._adapters, {})
+        self.assertIsNone(pool._reaper)
+        pool._adapter("https://a.io/x")
+        stop = pool._reaper
+        pool.close()
+        self.assertTrue(stop.is_set())
+        self.assertIsNone(pool._reaper)
 
 
 class TestMemoize(unittest.TestCase):
@@ -101,6 +826,230 @@ class TestMemoize(unittest.TestCase):
             self.assertEqual(test_instance.a_property, 42)
             mock_method.assert_called_once()
 
+    def test_memoize_concurrent(self) -> None:
+        """
+        Tests that concurrent readers share a single computation.
+        """
+        calls = []
+
+        class TestClass:
+            """
+            A class with a slow memoized property.
+            """
+            @memoize
+            def a_property(self):
+                """
+                Slow property counting its calls.
+                """
+                calls.append(1)
+                time.sleep(0.05)
+                return 42
+
+        test_instance = TestClass()
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(test_instance.a_property))
+            for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [42] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_memoize_ttl(self) -> None:
+        """
+        Tests that a memoized value is recomputed once expired.
+        """
+        calls = []
+
+        class TestClass:
+            """
+            A class with an expiring memoized property.
+            """
+            @memoize(ttl=10)
+            def a_property(self):
+                """
+                Property returning its call count.
+                """
+                calls.append(1)
+                return len(calls)
+
+        test_instance = TestClass()
+        with patch('utils.time.monotonic', return_value=100):
+            self.assertEqual(test_instance.a_property, 1)
+        with patch('utils.time.monotonic', return_value=109):
+            self.assertEqual(test_instance.a_property, 1)
+        with patch('utils.time.monotonic', return_value=110):
+            self.assertEqual(test_instance.a_property, 2)
+
+    def test_memoize_plain_attribute(self) -> None:
+        """
+        Tests that values which never expire are read as attributes.
+        """
+
+        class TestClass:
+            """
+            A class choosing its ttl per instance.
+            """
+            def __init__(self, ttl):
+                """
+                Keep the ttl of the instance.
+                """
+                self.ttl = ttl
+
+            @memoize(ttl=lambda self: self.ttl)
+            def a_property(self):
+                """
+                Property returning 42.
+                """
+                return 42
+
+        plain, expiring = TestClass(None), TestClass(60)
+        self.assertEqual((plain.a_property, expiring.a_property), (42, 42))
+        self.assertEqual(vars(plain)["a_property"], 42)
+        self.assertNotIn("_a_property", vars(plain))
+        self.assertNotIn("a_property", vars(expiring))
+        invalidate(plain, "a_property")
+        self.assertNotIn("a_property", vars(plain))
+        prime(plain, "a_property", 7)
+        self.assertEqual(plain.a_property, 7)
+
+    def test_memoize_stale_while_revalidate(self) -> None:
+        """
+        Tests that a stale value is served while refreshed in background.
+        """
+        calls = []
+        refreshing = threading.Event()
+
+        class TestClass:
+            """
+            A class with a property allowed to be served stale.
+            """
+            @memoize(ttl=lambda self: 10, stale_ttl=5)
+            def a_property(self):
+                """
+                Property returning its call count.
+                """
+                calls.append(1)
+                if len(calls) > 1:
+                    refreshing.wait()
+                return len(calls)
+
+        test_instance = TestClass()
+        with patch('utils.time.monotonic', return_value=100):
+            self.assertEqual(test_instance.a_property, 1)
+        with patch('utils.time.monotonic', return_value=112):
+            self.assertEqual(test_instance.a_property, 1)
+            self.assertEqual(test_instance.a_property, 1)
+            refreshing.set()
+            lock = test_instance._memoize_locks["_a_property"]
+            with lock:
+                self.assertEqual(test_instance.a_property, 2)
+        self.assertEqual(len(calls), 2)
+
+    def test_invalidate(self) -> None:
+        """
+        Tests that invalidate drops named or all memoized values.
+        """
+        calls = []
+
+        class TestClass:
+            """
+            A class with two memoized properties.
+            """
+            @memoize
+            def first(self):
+                """
+                First property.
+                """
+                calls.append("first")
+
+            @memoize(ttl=60)
+            def second(self):
+                """
+                Second property.
+                """
+                calls.append("second")
+
+        test_instance = TestClass()
+        test_instance.first, test_instance.second
+        invalidate(test_instance, "second")
+        test_instance.first, test_instance.second
+        invalidate(test_instance)
+        test_instance.first, test_instance.second
+        self.assertEqual(calls, ["first", "second", "second",
+                                 "first", "second"])
+        with self.assertRaises(AttributeError):
+            invalidate(test_instance, "a_method")
+
+    def test_prime(self) -> None:
+        """
+        Tests that prime sets memoized values and restarts their ttl.
+        """
+        calls = []
+
+        class TestClass:
+            """
+            A class with two memoized properties.
+            """
+            @memoize
+            def first(self):
+                """
+                First property.
+                """
+                calls.append("first")
+                return 1
+
+            @memoize(ttl=60)
+            def second(self):
+                """
+                Second property.
+                """
+                calls.append("second")
+                return 2
+
+        test_instance = TestClass()
+        prime(test_instance, "first", 10)
+        test_instance.second
+        with patch("utils.time.monotonic", return_value=time.monotonic()):
+            prime(test_instance, "second", 20)
+        with patch("utils.time.monotonic",
+                   return_value=time.monotonic() + 59):
+            self.assertEqual((test_instance.first, test_instance.second),
+                             (10, 20))
+        self.assertEqual(calls, ["second"])
+        with self.assertRaises(AttributeError):
+            prime(test_instance, "missing", 1)
+
+    def test_async_memoize(self) -> None:
+        """
+        Tests that concurrent awaiters share a single pending call.
+        """
+        calls = []
+
+        class TestClass:
+            """
+            A class with a memoized coroutine method.
+            """
+            @async_memoize
+            async def a_method(self):
+                """
+                Slow coroutine counting its calls.
+                """
+                calls.append(1)
+                await asyncio.sleep(0.01)
+                return 42
+
+        async def gather(test_instance):
+            return await asyncio.gather(
+                *(test_instance.a_method() for _ in range(8)))
+
+        test_instance = TestClass()
+        self.assertEqual(asyncio.run(gather(test_instance)), [42] * 8)
+        self.assertEqual(asyncio.run(gather(test_instance)), [42] * 8)
+        self.assertEqual(len(calls), 1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,20 +1,76 @@
 #!/usr/bin/env python3
 """Generic utilities for github org client.
 """
+import asyncio
+import bisect
+import codecs
+import heapq
+import itertools
+import json
+import random
+import re
+import threading
+import time
 import requests
-from functools import wraps
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from contextlib import nullcontext
+from functools import lru_cache, partial, wraps
 from typing import (
     Mapping,
     Sequence,
     Any,
+    AsyncIterator,
+    Awaitable,
     Dict,
     Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
 )
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+from requests.adapters import HTTPAdapter
+
+from cache import ValidatorCache
+from frozen import FrozenDict, FrozenList, freeze
+from decoders import decode_response
 
 __all__ = [
     "access_nested_map",
+    "compile_path",
+    "access_nested_map_many",
+    "Record",
+    "record_type",
     "get_json",
+    "RateLimitScheduler",
+    "RetryPolicy",
+    "LatencyHistogram",
+    "HedgePolicy",
+    "FrozenDict",
+    "FrozenList",
+    "freeze",
+    "SingleFlight",
+    "AsyncSingleFlight",
+    "iter_pages",
+    "iter_json_array",
+    "iter_items",
+    "async_get_json",
+    "async_get_pages",
+    "async_iter_pages",
     "memoize",
+    "async_memoize",
+    "invalidate",
+    "prime",
+    "SessionPool",
+    "get_pool",
+    "set_pool",
 ]
 
 
@@ -40,15 +96,1047 @@ def access_nested_map(nested_map: Mapping, path: Sequence) -> Any:
     return nested_map
 
 
-def get_json(url: str) -> Dict:
+def _step(nested_map: Any, key: Any) -> Any:
+    """One level of access_nested_map for any Mapping"""
+    if not isinstance(nested_map, Mapping):
+        raise KeyError(key)
+    return nested_map[key]
+
+
+@lru_cache(maxsize=1024)
+def _compile_path(path: Tuple) -> Callable[[Mapping], Any]:
+    """Getter for `path`, specialized on its length"""
+    if len(path) == 1:
+        first, = path
+
+        def get(nested_map):
+            if type(nested_map) is dict:
+                return nested_map[first]
+            return _step(nested_map, first)
+    elif len(path) == 2:
+        first, second = path
+
+        def get(nested_map):
+            if type(nested_map) is dict:
+                nested_map = nested_map[first]
+            else:
+                nested_map = _step(nested_map, first)
+            if type(nested_map) is dict:
+                return nested_map[second]
+            return _step(nested_map, second)
+    else:
+        def get(nested_map):
+            for key in path:
+                if type(nested_map) is dict:
+                    nested_map = nested_map[key]
+                else:
+                    nested_map = _step(nested_map, key)
+            return nested_map
+    return get
+
+
+def compile_path(path: Sequence) -> Callable[[Mapping], Any]:
+    """Compile a key path into a getter equivalent to access_nested_map.
+    The getter indexes plain dicts directly and only falls back to the
+    Mapping check for other types; it raises the same KeyError as
+    access_nested_map. Compiled getters are cached by path.
+    Example
+    -------
+    >>> get_license_key = compile_path(("license", "key"))
+    >>> get_license_key({"license": {"key": "mit"}})
+    'mit'
+    """
+    return _compile_path(tuple(path))
+
+
+def access_nested_map_many(records: Iterable[Mapping],
+                           paths: Iterable[Sequence],
+                           default: Any = None,
+                           defaults: Optional[Mapping] = None
+                           ) -> Dict[Tuple, List]:
+    """Extract several key paths from many nested maps in one pass.
+    Paths are sequences of keys, and each column is keyed by its path
+    as a tuple, holding the value found in each record in order. A
+    missing path yields the default for that path from `defaults`, or
+    `default`, instead of raising KeyError.
+    Example
+    -------
+    >>> repos = [{"name": "a", "license": {"key": "mit"}}, {"name": "b"}]
+    >>> access_nested_map_many(repos, [("name",), ("license", "key")])
+    {('name',): ['a', 'b'], ('license', 'key'): ['mit', None]}
+    """
+    defaults = defaults or {}
+    columns: Dict[Tuple, List] = {}
+    extractors = []
+    for path in paths:
+        path = tuple(path)
+        column = columns[path] = []
+        extractors.append((compile_path(path), column.append,
+                           defaults.get(path, default)))
+    for record in records:
+        for get, append, missing in extractors:
+            try:
+                append(get(record))
+            except KeyError:
+                append(missing)
+    return columns
+
+
+_MISSING = object()
+
+
+class Record(Mapping):
+    """Base of the slim records built by `record_type`.
+    A record keeps only the values of its key paths, in `__slots__`. It
+    reads like the nested map it was projected from: top-level keys give
+    their value and prefixes of nested paths give a dict rebuilt from the
+    paths under them, so access_nested_map and compiled getters work on
+    records and dicts alike.
+    """
+    __slots__ = ()
+    _paths: Tuple[Tuple, ...] = ()
+    _fields: Tuple[str, ...] = ()
+    _getters: Tuple[Callable, ...] = ()
+
+    @classmethod
+    def from_map(cls, nested_map: Mapping) -> "Record":
+        """Project `nested_map` onto the paths of the record type"""
+        record = cls.__new__(cls)
+        for field, get in zip(cls._fields, cls._getters):
+            try:
+                value = get(nested_map)
+            except KeyError:
+                value = _MISSING
+            object.__setattr__(record, field, value)
+        return record
+
+    def _tree(self, prefix: Tuple) -> Any:
+        """Value at `prefix`, rebuilding a dict for inner nodes"""
+        tree: Dict = {}
+        found = False
+        for path, field in zip(self._paths, self._fields):
+            if path[:len(prefix)] != prefix:
+                continue
+            value = getattr(self, field)
+            if value is _MISSING:
+                continue
+            if len(path) == len(prefix):
+                return value
+            node = tree
+            for key in path[len(prefix):-1]:
+                node = node.setdefault(key, {})
+            node[path[-1]] = value
+            found = True
+        if not found:
+            raise KeyError(prefix[-1])
+        return tree
+
+    def __getitem__(self, key: Any) -> Any:
+        """Value or rebuilt sub-map under the top-level `key`"""
+        return self._tree((key,))
+
+    def __iter__(self) -> Iterator:
+        """Top-level keys with at least one value"""
+        seen = []
+        for path, field in zip(self._paths, self._fields):
+            if path[0] not in seen and getattr(self, field) is not _MISSING:
+                seen.append(path[0])
+        return iter(seen)
+
+    def __len__(self) -> int:
+        """Number of top-level keys"""
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        """Record shown as the map it stands for"""
+        return "{}({!r})".format(type(self).__name__, dict(self))
+
+    def __reduce__(self) -> Tuple:
+        """Pickle as its paths and values"""
+        values = tuple(getattr(self, field) for field in self._fields)
+        return _rebuild_record, (self._paths, values)
+
+
+def _field_name(path: Tuple) -> str:
+    """Identifier for the slot holding `path`"""
+    return re.sub(r"\W", "_", "_".join(str(key) for key in path))
+
+
+@lru_cache(maxsize=256)
+def _record_type(paths: Tuple[Tuple, ...]) -> type:
+    """Record class for `paths`"""
+    fields = tuple("f{}_{}".format(i, _field_name(path))
+                   for i, path in enumerate(paths))
+    return type("Record", (Record,), {
+        "__slots__": fields,
+        "_paths": paths,
+        "_fields": fields,
+        "_getters": tuple(compile_path(path) for path in paths),
+    })
+
+
+def record_type(paths: Iterable[Union[str, Sequence]]) -> type:
+    """Slim `__slots__` record class keeping only `paths`.
+    Paths are key sequences or dotted strings. Record classes are cached
+    by their paths.
+    Example
+    -------
+    >>> Repo = record_type(["name", "license.key"])
+    >>> repo = Repo.from_map(TEST_PAYLOAD[0][1][0])
+    >>> repo["name"], access_nested_map(repo, ("license", "key"))
+    ('episodes.dart', 'bsd-3-clause')
+    """
+    normalized = []
+    for path in paths:
+        path = tuple(path.split(".")) if isinstance(path, str) else tuple(path)
+        if path not in normalized:
+            normalized.append(path)
+    return _record_type(tuple(normalized))
+
+
+def _rebuild_record(paths: Tuple[Tuple, ...], values: Tuple) -> Record:
+    """Unpickle a record"""
+    record = _record_type(paths).__new__(_record_type(paths))
+    for field, value in zip(record._fields, values):
+        object.__setattr__(record, field, value)
+    return record
+
+
+class SessionPool:
+    """Keep-alive HTTP connection pool shared between threads.
+    Connections are pooled per host through one `HTTPAdapter` per
+    ``scheme://host/`` prefix; every thread talks through its own
+    `requests.Session` mounted on those shared adapters, so connection
+    reuse is shared while session state is not.
+    Parameters
+    ----------
+    pool_size: int
+        default number of connections kept alive per host
+    host_pool_sizes: Mapping
+        per-host overrides of `pool_size`, keyed by host name
+    idle_timeout: float
+        seconds after which the connections of an unused host are closed
+    While any host is pooled, a daemon thread calls `reap_idle` every
+    half `idle_timeout`; it exits once no host is left or on `close`.
+    Hosts are reaped whole: a host still in use keeps every pooled
+    connection, up to its pool size.
+    Example
+    -------
+    >>> pool = SessionPool(4, host_pool_sizes={"api.github.com": 16})
+    >>> pool.get("https://api.github.com/orgs/google").json()["login"]
+    'google'
+    """
+
+    def __init__(self,
+                 pool_size: int = 10,
+                 host_pool_sizes: Optional[Mapping[str, int]] = None,
+                 idle_timeout: float = 60.0) -> None:
+        """Init method of SessionPool"""
+        self.pool_size = pool_size
+        self.host_pool_sizes = dict(host_pool_sizes or {})
+        self.idle_timeout = idle_timeout
+        self._adapters: Dict[str, HTTPAdapter] = {}
+        self._last_used: Dict[str, float] = {}
+        self._reaper: Optional[threading.Event] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def pool_size_for(self, host: str) -> int:
+        """Number of keep-alive connections allowed for `host`"""
+        return self.host_pool_sizes.get(host, self.pool_size)
+
+    def _adapter(self, url: str) -> Tuple[str, HTTPAdapter]:
+        """Adapter serving `url`, created on first use of its host"""
+        parts = urlsplit(url)
+        prefix = "{}://{}/".format(parts.scheme, parts.netloc)
+        now = time.monotonic()
+        with self._lock:
+            adapter = self._adapters.get(prefix)
+            if adapter is None:
+                size = self.pool_size_for(parts.hostname or "")
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+                self._adapters[prefix] = adapter
+                if self._reaper is None:
+                    self._reaper = threading.Event()
+                    threading.Thread(target=self._reap_periodically,
+                                     args=(self._reaper,),
+                                     daemon=True).start()
+            self._last_used[prefix] = now
+        return prefix, adapter
+
+    def _reap_periodically(self, stop: threading.Event) -> None:
+        """Reap idle hosts until none is left or `stop` is set"""
+        while not stop.wait(self.idle_timeout / 2):
+            self.reap_idle()
+            with self._lock:
+                if not self._adapters:
+                    if self._reaper is stop:
+                        self._reaper = None
+                    return
+
+    def session(self) -> requests.Session:
+        """`requests.Session` of the calling thread"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """Send a GET request over a pooled connection"""
+        prefix, adapter = self._adapter(url)
+        session = self.session()
+        if session.adapters.get(prefix) is not adapter:
+            session.mount(prefix, adapter)
+        return session.get(url, **kwargs)
+
+    def reap_idle(self, now: Optional[float] = None) -> int:
+        """Close the connections of hosts idle for `idle_timeout` seconds.
+        Returns the number of hosts reaped.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [prefix for prefix, used in self._last_used.items()
+                    if now - used >= self.idle_timeout]
+            adapters = [self._adapters.pop(prefix) for prefix in idle]
+            for prefix in idle:
+                del self._last_used[prefix]
+        for adapter in adapters:
+            adapter.close()
+        return len(adapters)
+
+    def close(self) -> None:
+        """Close every pooled connection and stop reaping"""
+        with self._lock:
+            adapters = list(self._adapters.values())
+            self._adapters.clear()
+            self._last_used.clear()
+            if self._reaper is not None:
+                self._reaper.set()
+                self._reaper = None
+        for adapter in adapters:
+            adapter.close()
+
+
+_pool: Optional[SessionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> SessionPool:
+    """Process-wide `SessionPool` used by `get_json` by default.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SessionPool()
+    return _pool
+
+
+def set_pool(pool: Optional[SessionPool]) -> None:
+    """Replace the process-wide `SessionPool`, closing the previous one.
+    Passing None makes `get_pool` build a fresh default pool.
+    """
+    global _pool
+    with _pool_lock:
+        previous, _pool = _pool, pool
+    if previous is not None and previous is not pool:
+        previous.close()
+
+
+class RateLimitScheduler:
+    """Pace requests to stay within a GitHub-style rate limit.
+    Requests take a token from a bucket refilled at `rate` per second,
+    holding at most `burst` tokens. The budget reported by the
+    X-RateLimit-Remaining and X-RateLimit-Reset response headers is
+    tracked too: once it is spent, requests sleep until the reset
+    instead of being rejected, and a Retry-After header holds every
+    request for that long. Waiting requests are served interactive
+    first, then batch, each in arrival order.
+    `clock`, `wall_clock` and `sleep` can be replaced by a simulated
+    clock in tests.
+    Example
+    -------
+    >>> scheduler = RateLimitScheduler(rate=5000 / 3600, burst=100)
+    >>> get_json(url, scheduler=scheduler, priority=scheduler.BATCH)
+    """
+    INTERACTIVE = 0
+    BATCH = 1
+
+    def __init__(self, rate: float, burst: float = 1,
+                 clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        """Init method of RateLimitScheduler"""
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._refilled = clock()
+        self.remaining: Optional[int] = None
+        self._reset_at = 0.0
+        self._blocked_until = 0.0
+        self._waiters: List[Tuple[int, int]] = []
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+
+    def _delay(self, now: float) -> float:
+        """Seconds before the next request may go, lock held"""
+        self._tokens = min(self.burst, self._tokens
+                           + (now - self._refilled) * self.rate)
+        self._refilled = now
+        if self.remaining is not None and now >= self._reset_at:
+            self.remaining = None
+        delay = max(0.0, (1 - self._tokens) / self.rate,
+                    self._blocked_until - now)
+        if self.remaining is not None and self.remaining <= 0:
+            delay = max(delay, self._reset_at - now)
+        return delay
+
+    def acquire(self, priority: int = INTERACTIVE) -> None:
+        """Block until a request of `priority` may be sent"""
+        with self._cond:
+            ticket = (priority, next(self._tickets))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    if self._waiters[0] != ticket:
+                        self._cond.wait()
+                        continue
+                    delay = self._delay(self._clock())
+                    if delay <= 0:
+                        break
+                    self._cond.release()
+                    try:
+                        self._sleep(delay)
+                    finally:
+                        self._cond.acquire()
+                self._tokens -= 1
+                if self.remaining is not None:
+                    self.remaining -= 1
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+    def update(self, response: Any) -> bool:
+        """Record the rate-limit headers of `response`.
+        Returns whether the response is a rate-limit rejection.
+        """
+        headers = response.headers
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        retry_after = headers.get("Retry-After")
+        with self._cond:
+            now = self._clock()
+            if remaining is not None and reset is not None:
+                self.remaining = int(remaining)
+                self._reset_at = now + float(reset) - self._wall_clock()
+            if retry_after is not None:
+                self._blocked_until = now + float(retry_after)
+            self._cond.notify_all()
+        return response.status_code in (403, 429) and (
+            retry_after is not None or remaining == "0")
+
+    def send(self, request: Callable[[], Any],
+             priority: int = INTERACTIVE) -> Any:
+        """Response of `request()`, sent within the limit.
+        Requests rejected for exceeding the limit are sent again once
+        the limit allows it.
+        """
+        while True:
+            self.acquire(priority)
+            response = request()
+            if not self.update(response):
+                return response
+
+
+class RetryPolicy:
+    """Retry transient failures with decorrelated-jitter backoff.
+    A request is retried up to `retries` times when it raises a
+    connection error or timeout, or answers one of `statuses`. The n-th
+    wait is drawn uniformly between `base` and three times the previous
+    wait, capped at `cap` seconds. Once retries are exhausted, the error
+    is raised instead of parsing the error page as JSON.
+    Example
+    -------
+    >>> get_json(url, retry=RetryPolicy(retries=5, base=0.05, cap=2))
+    """
+
+    def __init__(self, retries: int = 3,
+                 base: float = 0.1,
+                 cap: float = 10.0,
+                 statuses: Iterable[int] = (500, 502, 503, 504),
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        """Init method of RetryPolicy"""
+        self.retries = retries
+        self.base = base
+        self.cap = cap
+        self.statuses = frozenset(statuses)
+        self._sleep = sleep
+
+    def backoff(self, previous: float) -> float:
+        """Wait before the next attempt, given the previous wait"""
+        return min(self.cap, random.uniform(self.base, previous * 3))
+
+    def call(self, request: Callable[[], Any]) -> Any:
+        """Response of `request()`, retried on transient failures"""
+        wait = self.base
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                response = request()
+            except (requests.ConnectionError, requests.Timeout):
+                if last:
+                    raise
+            else:
+                if response.status_code not in self.statuses:
+                    return response
+                if last:
+                    response.raise_for_status()
+                    return response
+            wait = self.backoff(wait)
+            self._sleep(wait)
+
+
+class LatencyHistogram:
+    """Thread-safe histogram of latencies in log-spaced buckets.
+    Bucket bounds grow by a factor of 2 ** (1 / 4) from 1 ms, so
+    quantiles are accurate to within about 19%.
+    """
+    _BOUNDS = tuple(0.001 * 2 ** (i / 4) for i in range(80))
+
+    def __init__(self) -> None:
+        """Init method of LatencyHistogram"""
+        self.counts = [0] * (len(self._BOUNDS) + 1)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Add one latency"""
+        bucket = bisect.bisect_left(self._BOUNDS, seconds)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding quantile `q`"""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q * self.count
+            seen = 0
+            for bucket, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank and count:
+                    break
+        return self._BOUNDS[min(bucket, len(self._BOUNDS) - 1)]
+
+
+_hedge_executor = ThreadPoolExecutor(max_workers=32,
+                                     thread_name_prefix="hedge")
+
+
+def _close_response(future: Future) -> None:
+    """Release the connection of a response nobody will read"""
+    if future.exception() is None:
+        future.result().close()
+
+
+class HedgePolicy:
+    """Send a second identical request when the first one is slow.
+    The hedge fires once the request has been outstanding longer than
+    the `quantile` latency recorded for its URL, or `default_delay`
+    until `min_samples` latencies are known; whichever response arrives
+    first wins and the loser's response is closed once it arrives.
+    Latencies of every attempt are recorded in per-URL `histograms`.
+    Example
+    -------
+    >>> hedge = HedgePolicy(quantile=0.95)
+    >>> get_json(url, hedge=hedge)
+    >>> hedge.histograms[url].quantile(0.99)
+    """
+
+    def __init__(self, quantile: float = 0.95,
+                 default_delay: float = 0.5,
+                 min_delay: float = 0.005,
+                 min_samples: int = 20) -> None:
+        """Init method of HedgePolicy"""
+        self.quantile = quantile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.hedged = 0
+        self._lock = threading.Lock()
+
+    def histogram(self, url: str) -> LatencyHistogram:
+        """Latency histogram of `url`"""
+        with self._lock:
+            histogram = self.histograms.get(url)
+            if histogram is None:
+                histogram = self.histograms[url] = LatencyHistogram()
+            return histogram
+
+    def delay(self, url: str) -> float:
+        """Seconds to wait before hedging a request to `url`"""
+        histogram = self.histogram(url)
+        if histogram.count < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, histogram.quantile(self.quantile))
+
+    def send(self, url: str, request: Callable[[], Any]) -> Any:
+        """Response of `request()` or of its hedge, whichever is first"""
+        histogram = self.histogram(url)
+
+        def attempt() -> Any:
+            """Timed request"""
+            start = time.perf_counter()
+            response = request()
+            histogram.record(time.perf_counter() - start)
+            return response
+
+        first = _hedge_executor.submit(attempt)
+        done, _ = wait([first], timeout=self.delay(url))
+        if done:
+            return first.result()
+        with self._lock:
+            self.hedged += 1
+        attempts = [first, _hedge_executor.submit(attempt)]
+        pending = set(attempts)
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None or not pending:
+                    for loser in attempts:
+                        if loser is not future:
+                            loser.add_done_callback(_close_response)
+                    return future.result()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one.
+    The first caller for a key runs the call; callers arriving while it
+    is in flight wait for it and share its result. Results are handed to
+    every caller as frozen views, so no caller can corrupt what the
+    others see.
+    Example
+    -------
+    >>> flight = SingleFlight()
+    >>> get_json(url, flight=flight)
+    >>> flight.stats()
+    {'calls': 1, 'coalesced': 0}
+    """
+
+    def __init__(self) -> None:
+        """Init method of SingleFlight"""
+        self.calls = 0
+        self.coalesced = 0
+        self._futures: Dict[Any, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Any:
+        """Frozen result of `fn()`, shared with concurrent callers"""
+        with self._lock:
+            future = self._futures.get(key)
+            leader = future is None
+            if leader:
+                future = self._futures[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if leader:
+            try:
+                future.set_result(freeze(fn()))
+            except BaseException as exc:
+                future.set_exception(exc)
+            finally:
+                with self._lock:
+                    del self._futures[key]
+        return future.result()
+
+    def stats(self) -> Dict[str, int]:
+        """Calls made and calls coalesced into them"""
+        return {"calls": self.calls, "coalesced": self.coalesced}
+
+
+class AsyncSingleFlight(SingleFlight):
+    """SingleFlight for coroutines, sharing one task per key"""
+
+    async def do(self, key: Any, fn: Callable[[], Awaitable]) -> Any:
+        """Frozen result of `await fn()`, shared with concurrent callers"""
+        task = self._futures.get(key)
+        if task is None:
+            self.calls += 1
+            task = self._futures[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._futures.pop(key, None))
+        else:
+            self.coalesced += 1
+        return freeze(await asyncio.shield(task))
+
+
+def get_json(url: str,
+             pool: Optional[SessionPool] = None,
+             cache: Optional[ValidatorCache] = None,
+             scheduler: Optional[RateLimitScheduler] = None,
+             priority: int = RateLimitScheduler.INTERACTIVE,
+             retry: Optional[RetryPolicy] = None,
+             hedge: Optional[HedgePolicy] = None,
+             flight: Optional[SingleFlight] = None,
+             timeout: Optional[float] = None) -> Dict:
     """Get JSON from remote URL.
+    The request goes through `pool`, or the process-wide pool from
+    `get_pool` when omitted, so repeated calls reuse open connections.
+    With a `cache`, the request is made conditional on the validators
+    of the previous response and a 304 answer returns the cached body;
+    bodies stored in the cache are returned as read-only views.
+    With a `scheduler`, every request, hedges included, waits for its
+    turn at `priority` within the API rate limit. `retry` retries
+    transient failures, timeouts among them, and `hedge` races a second
+    request against a slow one. `timeout` bounds, in seconds, the wait
+    for the server to connect and for each read; None waits forever.
+    With a `flight`, concurrent calls for the same URL share one request
+    and one parse, and return read-only views of the payload.
+    The body is parsed from its raw bytes by the decoder selected in
+    `decoders`, orjson or simdjson when installed.
     """
-    response = requests.get(url)
-    return response.json()
+    if flight is not None:
+        return flight.do(url, partial(get_json, url, pool, cache, scheduler,
+                                      priority, retry, hedge, None, timeout))
+    pool = pool or get_pool()
+    entry, headers = cache.lookup(url) if cache is not None else (None, {})
+    kwargs = {"headers": headers} if headers else {}
+    if timeout is not None:
+        kwargs["timeout"] = timeout
+    request = partial(pool.get, url, **kwargs)
+    if scheduler is not None:
+        request = partial(scheduler.send, request, priority)
+    if hedge is not None:
+        request = partial(hedge.send, url, request)
+    if retry is not None:
+        request = partial(retry.call, request)
+    response = request()
+    if cache is None:
+        return decode_response(response)
+    return cache.resolve(url, entry, response)
+
+
+def _fetch_links(pool: SessionPool, url: str) -> Tuple[Any, Dict]:
+    """Parsed body at `url` and the links of its Link header"""
+    response = pool.get(url)
+    return decode_response(response), response.links
+
+
+def _fetch_page(pool: SessionPool, url: str) -> Tuple[List, Optional[str]]:
+    """Parsed page at `url` and the URL of the next page, if any"""
+    page, links = _fetch_links(pool, url)
+    return page, links.get("next", {}).get("url")
+
+
+def iter_pages(url: str,
+               pool: Optional[SessionPool] = None,
+               prefetch: bool = True) -> Iterator[List]:
+    """Iterate over the pages of a paginated JSON listing.
+    Pages are followed through the ``Link: <...>; rel="next"`` header.
+    With `prefetch`, the next page is downloaded in the background while
+    the current one is consumed, so at most two pages are held at once.
+    Example
+    -------
+    >>> for page in iter_pages("https://api.github.com/orgs/google/repos"):
+    ...     print(len(page))
+    30
+    30
+    """
+    pool = pool or get_pool()
+    if not prefetch:
+        while url is not None:
+            page, url = _fetch_page(pool, url)
+            yield page
+        return
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(_fetch_page, pool, url)
+        try:
+            while future is not None:
+                page, next_url = future.result()
+                future = None
+                if next_url is not None:
+                    future = executor.submit(_fetch_page, pool, next_url)
+                yield page
+                del page
+        finally:
+            if future is not None:
+                future.cancel()
+
+
+_io_executor = ThreadPoolExecutor(max_workers=64,
+                                  thread_name_prefix="get_json")
+
+
+async def _run_io(fn: Callable, *args: Any) -> Any:
+    """Run blocking `fn(*args)` on the I/O thread pool"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _io_executor, fn, *args)
 
 
-def memoize(fn: Callable) -> Callable:
+_WHITESPACE = " \t\r\n"
+# Longest partial token a decode error can point back over, "-Infinit".
+_PARTIAL_TOKEN = 16
+
+
+def _truncated(error: json.JSONDecodeError) -> bool:
+    """Whether `error` may come from input cut short, not malformed"""
+    return (error.msg.startswith("Unterminated string")
+            or len(error.doc) - error.pos <= _PARTIAL_TOKEN)
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """Parse a JSON array incrementally from chunks of UTF-8 bytes.
+    Each element is yielded as soon as it is complete, so only one
+    element and the unparsed tail of the input are held at a time.
+    Malformed input raises JSONDecodeError where it is found, without
+    reading further; input ending early raises ValueError.
+    Example
+    -------
+    >>> list(iter_json_array([b'[{"a": 1}, {"b"', b': 2}]']))
+    [{'a': 1}, {'b': 2}]
+    """
+    chunks = iter(chunks)
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer, pos, eof = "", 0, False
+    state = "start"
+
+    def read_more() -> None:
+        """Append at least as much input as is pending, or hit EOF"""
+        nonlocal buffer, pos, eof
+        if eof:
+            raise ValueError("truncated JSON array")
+        pending = buffer[pos:]
+        parts = [pending]
+        wanted = max(len(pending), 1)
+        read = 0
+        while read < wanted:
+            chunk = next(chunks, None)
+            if chunk is None:
+                eof = True
+                parts.append(text.decode(b"", final=True))
+                break
+            part = text.decode(chunk)
+            parts.append(part)
+            read += len(part)
+        buffer, pos = "".join(parts), 0
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos == len(buffer):
+            read_more()
+            continue
+        char = buffer[pos]
+        if state == "start":
+            if char != "[":
+                raise ValueError("expected a JSON array")
+            pos += 1
+            state = "first"
+        elif state == "after":
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError("expected ',' or ']' at {}".format(pos))
+            pos += 1
+            state = "value"
+        elif state == "first" and char == "]":
+            return
+        else:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as error:
+                if not _truncated(error):
+                    raise
+                read_more()
+                continue
+            if end == len(buffer) and not eof:
+                read_more()
+                continue
+            yield value
+            pos = end
+            state = "after"
+
+
+def _open_stream(pool: SessionPool, url: str) -> Tuple[Any, Optional[str]]:
+    """Response at `url` with its body unread, and the next page URL"""
+    response = pool.get(url, stream=True)
+    return response, response.links.get("next", {}).get("url")
+
+
+def iter_items(url: str,
+               pool: Optional[SessionPool] = None,
+               chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Iterate over the elements of a paginated JSON array listing.
+    Each page is parsed incrementally from the response stream with
+    `iter_json_array`, so memory stays bounded by one element rather
+    than one page. The next page is requested as soon as the headers of
+    the current one arrive, while its body is still being parsed.
+    Example
+    -------
+    >>> names = [repo["name"] for repo in iter_items(
+    ...     "https://api.github.com/orgs/google/repos")]
+    """
+    pool = pool or get_pool()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = executor.submit(_open_stream, pool, url)
+        try:
+            while pending is not None:
+                response, next_url = pending.result()
+                pending = None
+                if next_url is not None:
+                    pending = executor.submit(_open_stream, pool, next_url)
+                try:
+                    yield from iter_json_array(
+                        response.iter_content(chunk_size))
+                finally:
+                    response.close()
+        finally:
+            if pending is not None and not pending.cancel():
+                pending.result()[0].close()
+
+
+async def async_get_json(url: str,
+                         pool: Optional[SessionPool] = None,
+                         semaphore: Optional[asyncio.Semaphore] = None,
+                         flight: Optional[AsyncSingleFlight] = None) -> Any:
+    """Get JSON from remote URL without blocking the event loop.
+    The request and the parsing run on a shared pool of 64 I/O threads
+    over the pooled connections of `pool`; `semaphore` bounds how many
+    run at once. With a `flight`, concurrent calls for the same URL
+    share one request, as with get_json.
+    """
+    if flight is not None:
+        return await flight.do(url, partial(async_get_json, url, pool,
+                                            semaphore))
+    async with semaphore or nullcontext():
+        return await _run_io(get_json, url, pool)
+
+
+def _page_url(url: str, page: int) -> str:
+    """`url` with its ``page`` query parameter set to `page`"""
+    parts = urlsplit(url)
+    query = parse_qs(parts.query)
+    query["page"] = [str(page)]
+    return urlunsplit(parts._replace(query=urlencode(query, doseq=True)))
+
+
+async def async_get_pages(url: str,
+                          pool: Optional[SessionPool] = None,
+                          semaphore: Optional[asyncio.Semaphore] = None
+                          ) -> List[List]:
+    """Fetch every page of a paginated JSON listing.
+    When the first page advertises a ``rel="last"`` link, the remaining
+    pages are fetched concurrently; otherwise ``rel="next"`` links are
+    followed one after another.
+    """
+    pool = pool or get_pool()
+    semaphore = semaphore or nullcontext()
+
+    async def fetch(page_url: str) -> Tuple[Any, Dict]:
+        """Body and links of one page"""
+        async with semaphore:
+            return await _run_io(_fetch_links, pool, page_url)
+
+    page, links = await fetch(url)
+    pages = [page]
+    last_url = links.get("last", {}).get("url")
+    if last_url is not None:
+        query = parse_qs(urlsplit(last_url).query)
+        last = int(query.get("page", ["1"])[0])
+        rest = await asyncio.gather(*(fetch(_page_url(url, number))
+                                      for number in range(2, last + 1)))
+        return pages + [page for page, _ in rest]
+    next_url = links.get("next", {}).get("url")
+    while next_url is not None:
+        page, links = await fetch(next_url)
+        pages.append(page)
+        next_url = links.get("next", {}).get("url")
+    return pages
+
+
+async def async_iter_pages(url: str,
+                           pool: Optional[SessionPool] = None,
+                           semaphore: Optional[asyncio.Semaphore] = None
+                           ) -> AsyncIterator[List]:
+    """Iterate over the pages of a paginated JSON listing, asynchronously.
+    Pages are followed through their ``rel="next"`` links and, as with
+    iter_pages, the next page is downloaded while the current one is
+    consumed, so at most two pages are held at once whatever the size
+    of the listing.
+    Example
+    -------
+    >>> async for page in async_iter_pages(
+    ...         "https://api.github.com/orgs/google/repos"):
+    ...     print(len(page))
+    """
+    pool = pool or get_pool()
+    semaphore = semaphore or nullcontext()
+
+    async def fetch(page_url: str) -> Tuple[List, Optional[str]]:
+        """Body of one page and the URL of the next"""
+        async with semaphore:
+            return await _run_io(_fetch_page, pool, page_url)
+
+    pending = asyncio.ensure_future(fetch(url))
+    try:
+        while pending is not None:
+            page, next_url = await pending
+            pending = None
+            if next_url is not None:
+                pending = asyncio.ensure_future(fetch(next_url))
+            yield page
+            del page
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+def _memoize_lock(obj: Any, attr_name: str) -> threading.Lock:
+    """Lock guarding the computation of `attr_name` on `obj`"""
+    locks = vars(obj).setdefault("_memoize_locks", {})
+    return locks.setdefault(attr_name, threading.Lock())
+
+
+class _MemoizedProperty:
+    """Non-data descriptor reading a memoized member through `fget`.
+    Values that never expire are stored in the instance ``__dict__``
+    under the member's name, where they shadow the descriptor: reading
+    them again is a plain attribute lookup.
+    """
+
+    def __init__(self, fget: Callable) -> None:
+        """Init method of _MemoizedProperty"""
+        self.fget = fget
+        self.__doc__ = fget.__doc__
+
+    def __get__(self, obj: Any, owner: Optional[type] = None) -> Any:
+        """Memoized value of `obj`, or the descriptor on its class"""
+        if obj is None:
+            return self
+        return self.fget(obj)
+
+
+def memoize(fn: Optional[Callable] = None,
+            ttl: Union[None, float, Callable[[Any], Optional[float]]] = None,
+            stale_ttl: Union[float, Callable[[Any], float]] = 0
+            ) -> Callable:
     """Decorator to memoize a method.
+    The value is computed at most once per instance, even when several
+    threads read the property at the same time: late readers block on
+    the in-flight computation and reuse its result.
+    With `ttl`, the value expires `ttl` seconds after it was computed.
+    For `stale_ttl` more seconds, reads keep returning the expired value
+    while a background thread recomputes it. Both may be callables of
+    the instance, so each instance can pick its own expiry; a `ttl` of
+    None never expires, and such values are read back as plain instance
+    attributes.
     Example
     -------
     class MyClass:
@@ -63,13 +1151,144 @@ def memoize(fn: Callable) -> Callable:
     >>> my_object.a_method
     42
     """
-    attr_name = "_{}".format(fn.__name__)
+    if fn is None:
+        return lambda fn: memoize(fn, ttl=ttl, stale_ttl=stale_ttl)
+    name = fn.__name__
+    attr_name = "_{}".format(name)
+
+    def store(self, value):
+        """Store `value`, with its expiry times if it expires"""
+        lifetime = ttl(self) if callable(ttl) else ttl
+        members = vars(self)
+        if lifetime is None:
+            members.pop(attr_name, None)
+            members[name] = value
+            return value
+        grace = stale_ttl(self) if callable(stale_ttl) else stale_ttl
+        fresh_until = time.monotonic() + lifetime
+        members.pop(name, None)
+        members[attr_name] = (value, fresh_until, fresh_until + grace)
+        return value
+
+    def compute(self):
+        """Compute the value and store it"""
+        return store(self, fn(self))
+
+    def refresh(self, lock: threading.Lock) -> None:
+        """Recompute a stale value, keeping it if that fails"""
+        try:
+            compute(self)
+        except Exception:
+            pass
+        finally:
+            lock.release()
 
     @wraps(fn)
     def memoized(self):
         """"memoized wraps"""
-        if not hasattr(self, attr_name):
-            setattr(self, attr_name, fn(self))
-        return getattr(self, attr_name)
+        members = vars(self)
+        if name in members:
+            return members[name]
+        entry = members.get(attr_name)
+        now = time.monotonic()
+        if entry is not None and now < entry[1]:
+            return entry[0]
+        lock = _memoize_lock(self, attr_name)
+        if entry is not None and now < entry[2]:
+            if lock.acquire(blocking=False):
+                threading.Thread(target=refresh, args=(self, lock),
+                                 daemon=True).start()
+            return entry[0]
+        with lock:
+            if name in members:
+                return members[name]
+            entry = members.get(attr_name)
+            if entry is not None and time.monotonic() < entry[1]:
+                return entry[0]
+            return compute(self)
+
+    memoized.memoize_attr = attr_name
+    memoized.memoize_store = store
+    return _MemoizedProperty(memoized)
+
+
+def _memoized_attrs(cls: type) -> Dict[str, str]:
+    """Memoized members of `cls` mapped to the attribute caching them"""
+    attrs = {}
+    for name in dir(cls):
+        member = getattr(cls, name, None)
+        member = getattr(member, "fget", member)
+        attr_name = getattr(member, "memoize_attr", None)
+        if attr_name is not None:
+            attrs[name] = attr_name
+    return attrs
+
+
+def invalidate(obj: Any, *names: str) -> None:
+    """Drop memoized values of `obj` so that the next read recomputes.
+    Every memoized member of `obj` is dropped when no name is given.
+    Example
+    -------
+    >>> invalidate(client, "repos_payload")
+    """
+    attrs = _memoized_attrs(type(obj))
+    for name in names:
+        if name not in attrs:
+            raise AttributeError("{!r} is not memoized".format(name))
+    for name in names or attrs:
+        attr_name = attrs[name]
+        with _memoize_lock(obj, attr_name):
+            vars(obj).pop(attr_name, None)
+            vars(obj).pop(name, None)
+
+
+def prime(obj: Any, name: str, value: Any) -> None:
+    """Set the memoized member `name` of `obj` as if just computed.
+    Expiry times, if any, restart from now.
+    Example
+    -------
+    >>> prime(client, "repos_payload", merged_repos)
+    """
+    member = getattr(getattr(type(obj), name, None), "fget", None)
+    store = getattr(member, "memoize_store", None)
+    if store is None:
+        raise AttributeError("{!r} is not memoized".format(name))
+    with _memoize_lock(obj, member.memoize_attr):
+        store(obj, value)
+
+
+def async_memoize(fn: Callable) -> Callable:
+    """Decorator to memoize a coroutine method.
+    The first call schedules the coroutine as a task; every caller,
+    including concurrent ones, awaits that same task through a shield,
+    so a cancelled caller does not cancel it for the others. A task that
+    failed or was cancelled is replaced on the next call.
+    Example
+    -------
+    class MyClass:
+        @async_memoize
+        async def a_method(self):
+            print("a_method called")
+            return 42
+    >>> my_object = MyClass()
+    >>> asyncio.run(my_object.a_method())
+    a_method called
+    42
+    >>> asyncio.run(my_object.a_method())
+    42
+    """
+    attr_name = "_{}".format(fn.__name__)
+
+    @wraps(fn)
+    async def memoized(self):
+        """"memoized wraps"""
+        task = getattr(self, attr_name, None)
+        failed = task is not None and task.done() and (
+            task.cancelled() or task.exception() is not None)
+        if task is None or failed:
+            task = asyncio.ensure_future(fn(self))
+            setattr(self, attr_name, task)
+        return await asyncio.shield(task)
 
-    return property(memoized)
+    memoized.memoize_attr = attr_name
+    return memoized